@@ -0,0 +1,47 @@
+from fastapi import Depends
+from app.db.backends import StorageBackend, get_db
+from app.db.async_database import AsyncDatabase
+from app.db.unit_of_work import AsyncUnitOfWork
+from app.services.list_service import ListService, AsyncListService
+from app.services.task_service import TaskService, AsyncTaskService
+from app.services.optimized_task_service import OptimizedTaskService
+
+# Storage version a response reflects, and the version a read must at least reflect
+STORAGE_VERSION_HEADER = "X-Storage-Version"
+MIN_STORAGE_VERSION_HEADER = "X-Min-Storage-Version"
+
+def get_list_service(db: StorageBackend = Depends(get_db)) -> ListService:
+    """Provide a ListService bound to the configured storage backend"""
+    return ListService(db)
+
+def get_task_service(db: StorageBackend = Depends(get_db)) -> TaskService:
+    """Provide a TaskService bound to the configured storage backend"""
+    return TaskService(db)
+
+def get_optimized_task_service(db: StorageBackend = Depends(get_db)) -> OptimizedTaskService:
+    """Provide an OptimizedTaskService bound to the configured storage backend"""
+    return OptimizedTaskService(db)
+
+def get_async_db(db: StorageBackend = Depends(get_db)) -> AsyncDatabase:
+    """Provide the configured storage backend behind the async storage API"""
+    return AsyncDatabase(db)
+
+def get_unit_of_work(db: AsyncDatabase = Depends(get_async_db)):
+    """Provide the unit of work of the request, dropping whatever it did not commit"""
+    uow = AsyncUnitOfWork(db)
+    try:
+        yield uow
+    finally:
+        uow.rollback()
+
+def get_async_list_service(
+    db: AsyncDatabase = Depends(get_async_db), uow: AsyncUnitOfWork = Depends(get_unit_of_work)
+) -> AsyncListService:
+    """Provide an AsyncListService bound to the configured storage backend"""
+    return AsyncListService(db, uow)
+
+def get_async_task_service(
+    db: AsyncDatabase = Depends(get_async_db), uow: AsyncUnitOfWork = Depends(get_unit_of_work)
+) -> AsyncTaskService:
+    """Provide an AsyncTaskService bound to the configured storage backend"""
+    return AsyncTaskService(db, uow)
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException, status, Query, Depends
 from typing import List
 from app.schemas.list_schema import ListCreate, ListUpdate, ListResponse
-from app.services.list_service import ListService
+from app.services.list_service import AsyncListService
+from app.api.deps import get_async_list_service
 from app.services.auth_service import AuthService
 
 router = APIRouter(prefix="/lists", tags=["lists"])
@@ -10,14 +11,14 @@ router = APIRouter(prefix="/lists", tags=["lists"])
 auth_service = AuthService()
 
 @router.get("/", response_model=List[ListResponse])
-async def get_lists(current_user: dict = Depends(auth_service.get_current_user)):
+async def get_lists(current_user: dict = Depends(auth_service.get_current_user), list_service: AsyncListService = Depends(get_async_list_service)):
     """Get all lists with their tasks"""
-    return ListService.get_lists()
+    return await list_service.get_lists()
 
 @router.get("/{list_id}", response_model=ListResponse)
-async def get_list(list_id: str, current_user: dict = Depends(auth_service.get_current_user)):
+async def get_list(list_id: str, current_user: dict = Depends(auth_service.get_current_user), list_service: AsyncListService = Depends(get_async_list_service)):
     """Get a specific list by ID"""
-    list_data = ListService.get_list(list_id)
+    list_data = await list_service.get_list(list_id)
     if list_data is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -26,14 +27,14 @@ async def get_list(list_id: str, current_user: dict = Depends(auth_service.get_c
     return list_data
 
 @router.post("/", response_model=ListResponse, status_code=status.HTTP_201_CREATED)
-async def create_list(list_data: ListCreate, current_user: dict = Depends(auth_service.get_current_user)):
+async def create_list(list_data: ListCreate, current_user: dict = Depends(auth_service.get_current_user), list_service: AsyncListService = Depends(get_async_list_service)):
     """Create a new list"""
-    return ListService.create_list(list_data)
+    return await list_service.create_list(list_data)
 
 @router.put("/{list_id}", response_model=ListResponse)
-async def update_list(list_id: str, list_data: ListUpdate, current_user: dict = Depends(auth_service.get_current_user)):
+async def update_list(list_id: str, list_data: ListUpdate, current_user: dict = Depends(auth_service.get_current_user), list_service: AsyncListService = Depends(get_async_list_service)):
     """Update an existing list"""
-    updated_list = ListService.update_list(list_id, list_data)
+    updated_list = await list_service.update_list(list_id, list_data)
     if updated_list is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -42,9 +43,9 @@ async def update_list(list_id: str, list_data: ListUpdate, current_user: dict =
     return updated_list
 
 @router.delete("/{list_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_list(list_id: str, current_user: dict = Depends(auth_service.get_current_user)):
+async def delete_list(list_id: str, current_user: dict = Depends(auth_service.get_current_user), list_service: AsyncListService = Depends(get_async_list_service)):
     """Delete a list"""
-    deleted = ListService.delete_list(list_id)
+    deleted = await list_service.delete_list(list_id)
     if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
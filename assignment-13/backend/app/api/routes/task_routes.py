@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException, status, Query, Depends
 from typing import List
 from app.schemas.task_schema import TaskCreate, TaskUpdate, TaskResponse
-from app.services.task_service import TaskService
+from app.services.task_service import AsyncTaskService
+from app.api.deps import get_async_task_service
 from app.services.auth_service import AuthService
 
 router = APIRouter(tags=["tasks"])
@@ -11,19 +12,19 @@ auth_service = AuthService()
 
 # Tasks within a specific list
 @router.get("/lists/{list_id}/tasks", response_model=List[TaskResponse])
-async def get_tasks(list_id: str, current_user: dict = Depends(auth_service.get_current_user)):
+async def get_tasks(list_id: str, current_user: dict = Depends(auth_service.get_current_user), task_service: AsyncTaskService = Depends(get_async_task_service)):
     """Get all tasks in a list"""
-    return TaskService.get_tasks(list_id)
+    return await task_service.get_tasks(list_id)
 
 @router.get("/lists/{list_id}/tasks/ordered", response_model=List[TaskResponse])
-async def get_tasks_ordered_by_deadline(list_id: str, current_user: dict = Depends(auth_service.get_current_user)):
+async def get_tasks_ordered_by_deadline(list_id: str, current_user: dict = Depends(auth_service.get_current_user), task_service: AsyncTaskService = Depends(get_async_task_service)):
     """Get tasks ordered by deadline in a list"""
-    return TaskService.get_tasks_ordered_by_deadline(list_id)
+    return await task_service.get_tasks_ordered_by_deadline(list_id)
 
 @router.get("/lists/{list_id}/tasks/{task_id}", response_model=TaskResponse)
-async def get_task(list_id: str, task_id: str, current_user: dict = Depends(auth_service.get_current_user)):
+async def get_task(list_id: str, task_id: str, current_user: dict = Depends(auth_service.get_current_user), task_service: AsyncTaskService = Depends(get_async_task_service)):
     """Get a specific task by ID"""
-    task = TaskService.get_task(list_id, task_id)
+    task = await task_service.get_task(list_id, task_id)
     if task is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -32,9 +33,9 @@ async def get_task(list_id: str, task_id: str, current_user: dict = Depends(auth
     return task
 
 @router.post("/lists/{list_id}/tasks", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
-async def add_task(list_id: str, task: TaskCreate, current_user: dict = Depends(auth_service.get_current_user)):
+async def add_task(list_id: str, task: TaskCreate, current_user: dict = Depends(auth_service.get_current_user), task_service: AsyncTaskService = Depends(get_async_task_service)):
     """Add a task to a list"""
-    created_task = TaskService.add_task(list_id, task)
+    created_task = await task_service.add_task(list_id, task)
     if created_task is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -43,9 +44,9 @@ async def add_task(list_id: str, task: TaskCreate, current_user: dict = Depends(
     return created_task
 
 @router.put("/lists/{list_id}/tasks/{task_id}", response_model=TaskResponse)
-async def update_task(list_id: str, task_id: str, task: TaskUpdate, current_user: dict = Depends(auth_service.get_current_user)):
+async def update_task(list_id: str, task_id: str, task: TaskUpdate, current_user: dict = Depends(auth_service.get_current_user), task_service: AsyncTaskService = Depends(get_async_task_service)):
     """Update a task"""
-    updated_task = TaskService.update_task(list_id, task_id, task)
+    updated_task = await task_service.update_task(list_id, task_id, task)
     if updated_task is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -54,9 +55,9 @@ async def update_task(list_id: str, task_id: str, task: TaskUpdate, current_user
     return updated_task
 
 @router.delete("/lists/{list_id}/tasks/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_task(list_id: str, task_id: str, current_user: dict = Depends(auth_service.get_current_user)):
+async def delete_task(list_id: str, task_id: str, current_user: dict = Depends(auth_service.get_current_user), task_service: AsyncTaskService = Depends(get_async_task_service)):
     """Delete a task"""
-    deleted = TaskService.delete_task(list_id, task_id)
+    deleted = await task_service.delete_task(list_id, task_id)
     if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -65,9 +66,9 @@ async def delete_task(list_id: str, task_id: str, current_user: dict = Depends(a
     return None
 
 @router.patch("/lists/{list_id}/tasks/{task_id}/complete", response_model=TaskResponse)
-async def toggle_task_completion(list_id: str, task_id: str, current_user: dict = Depends(auth_service.get_current_user)):
+async def toggle_task_completion(list_id: str, task_id: str, current_user: dict = Depends(auth_service.get_current_user), task_service: AsyncTaskService = Depends(get_async_task_service)):
     """Toggle task completion status"""
-    updated_task = TaskService.toggle_task_completion(list_id, task_id)
+    updated_task = await task_service.toggle_task_completion(list_id, task_id)
     if updated_task is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -77,11 +78,11 @@ async def toggle_task_completion(list_id: str, task_id: str, current_user: dict
 
 # Special task endpoints
 @router.get("/tasks/due-this-week", response_model=List[TaskResponse])
-async def get_tasks_due_this_week(current_user: dict = Depends(auth_service.get_current_user)):
+async def get_tasks_due_this_week(current_user: dict = Depends(auth_service.get_current_user), task_service: AsyncTaskService = Depends(get_async_task_service)):
     """Get tasks due this week across all lists"""
-    return TaskService.get_tasks_due_this_week()
+    return await task_service.get_tasks_due_this_week()
 
 @router.get("/lists/{list_id}/tasks/ordered", response_model=List[TaskResponse])
-async def get_tasks_ordered_by_deadline(list_id: str, current_user: dict = Depends(auth_service.get_current_user)):
+async def get_tasks_ordered_by_deadline(list_id: str, current_user: dict = Depends(auth_service.get_current_user), task_service: AsyncTaskService = Depends(get_async_task_service)):
     """Get tasks ordered by deadline in a list"""
-    return TaskService.get_tasks_ordered_by_deadline(list_id)
+    return await task_service.get_tasks_ordered_by_deadline(list_id)
@@ -11,6 +11,67 @@ class Settings(BaseSettings):
     DATABASE_DIR: Path = BASE_DIR / "db"
     DATABASE_FILE: Path = DATABASE_DIR / "data.json"
     
+    # Storage backend: json, optimized_json, sharded_json, sqlite, memory or shared_snapshot
+    STORAGE_BACKEND: str = "json"
+    
+    # Worker threads that run blocking storage calls for the async API
+    STORAGE_EXECUTOR_WORKERS: int = 8
+    
+    # Mutations waiting in each storage writer lane before submitters have to wait for room
+    WRITE_QUEUE_SIZE: int = 1000
+    # Writer lanes of the async API; mutations of one list always share a lane
+    WRITE_LANES: int = 8
+    
+    # Locks that writes to different lists are spread over; 1 serializes every write
+    LOCK_STRIPES: int = 64
+    
+    # Database deletes leave tombstones; a list is vacuumed in the background once it holds at
+    # least VACUUM_MIN_GARBAGE of them and they make up VACUUM_GARBAGE_RATIO of its task slots,
+    # or VACUUM_MAX_GARBAGE of them whatever the list's size
+    VACUUM_GARBAGE_RATIO: float = 0.25
+    VACUUM_MIN_GARBAGE: int = 32
+    VACUUM_MAX_GARBAGE: int = 1024
+    
+    # Durability level for writes: none, batch or always (see app/db/atomic.py)
+    DURABILITY: str = "batch"
+    
+    # On-disk snapshot format (see app/db/codecs.py); reads detect the format of existing files
+    STORAGE_CODEC: str = "json"  # json, json_compact, orjson, msgpack or mmap
+    STORAGE_COMPRESSION: str = "none"  # none, zlib or gzip
+    
+    # Write-ahead log configuration
+    WAL_FILE: Path = DATABASE_DIR / "data.wal"
+    WAL_COMPACTION_THRESHOLD: int = 1000
+    
+    # Group commit: concurrent log appends that arrive during an fsync share the next one
+    GROUP_COMMIT_ENABLED: bool = False
+    GROUP_COMMIT_MAX_BATCH: int = 64
+    
+    # Sharded JSON configuration: a manifest plus one file per list
+    SHARD_DIR: Path = DATABASE_DIR / "shards"
+    
+    # OptimizedDatabase cache coherence: seconds between file polls, 0 checks the file on every read
+    CACHE_WATCH_INTERVAL: float = 0
+    # How OptimizedDatabase persists its write-through cache: "sync" or "background"
+    OPTIMIZED_PERSIST_MODE: str = "sync"
+    # Approximate bytes of decoded lists OptimizedDatabase keeps resident, 0 for no limit.
+    # Cold lists are evicted and reloaded on access, which needs STORAGE_CODEC = "mmap";
+    # OptimizedDatabase logs a warning when a budget is set with any other codec
+    OPTIMIZED_CACHE_BUDGET_BYTES: int = 0
+    
+    # Shared snapshot of a worker pool (see app/db/shared_snapshot.py), best placed on a tmpfs like /dev/shm
+    SHARED_SNAPSHOT_DIR: Path = DATABASE_DIR / "shared"
+    # The primary publishes at most once per interval; writes arriving meanwhile share the next snapshot
+    SHARED_SNAPSHOT_PUBLISH_INTERVAL_MS: float = 10
+    
+    # Read replica that follows the write-ahead log (see app/replica.py): seconds between log
+    # polls, and how long a read asking for a newer version waits before the replica gives up
+    REPLICA_POLL_INTERVAL: float = 0.05
+    REPLICA_MAX_STALENESS_MS: float = 500
+    
+    # SQLite database configuration
+    SQLITE_FILE: Path = DATABASE_DIR / "data.db"
+    
     class Config:
         env_file = ".env"
 
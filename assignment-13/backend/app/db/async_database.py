@@ -0,0 +1,91 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+from app.core.config import settings
+from app.db.backends import StorageBackend
+from app.db.write_actor import WriteActor, get_write_actor
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Bounded pool shared by every async storage call"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.STORAGE_EXECUTOR_WORKERS, thread_name_prefix="storage"
+            )
+        return _executor
+
+
+class AsyncDatabase:
+    """Async facade over a storage backend
+
+    Reads run on a bounded thread pool so that a slow write never blocks the event loop
+    for other requests. Mutations go to the backend's WriteActor, which applies the
+    mutations of each list one at a time in the order they were submitted.
+    """
+
+    def __init__(self, db: StorageBackend, executor: Optional[ThreadPoolExecutor] = None,
+                 writer: Optional[WriteActor] = None):
+        self.db = db
+        self._executor = executor or get_executor()
+        self.writer = writer or get_write_actor(db)
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """Run a blocking storage call on the pool and await its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args))
+
+    async def mutate(self, list_id: Optional[str], func: Callable[..., Any], *args) -> Any:
+        """Run a mutation, or a read-modify-write of several storage calls, in the list's writer lane"""
+        return await self.writer.submit(list_id, func, *args)
+
+    # List operations
+    async def get_lists(self) -> List[Dict]:
+        return await self.run(self.db.get_lists)
+
+    async def get_list(self, list_id: str) -> Optional[Dict]:
+        return await self.run(self.db.get_list, list_id)
+
+    async def create_list(self, list_data: Dict) -> Dict:
+        return await self.writer.submit_collection(list_data.get("id"), self.db.create_list, list_data)
+
+    async def update_list(self, list_id: str, list_data: Dict) -> Optional[Dict]:
+        return await self.mutate(list_id, self.db.update_list, list_id, list_data)
+
+    async def delete_list(self, list_id: str) -> bool:
+        return await self.writer.submit_collection(list_id, self.db.delete_list, list_id)
+
+    # Task operations
+    async def get_tasks(self, list_id: str) -> List[Dict]:
+        return await self.run(self.db.get_tasks, list_id)
+
+    async def get_task(self, list_id: str, task_id: str) -> Optional[Dict]:
+        return await self.run(self.db.get_task, list_id, task_id)
+
+    async def add_task(self, list_id: str, task_data: Dict) -> Optional[Dict]:
+        return await self.mutate(list_id, self.db.add_task, list_id, task_data)
+
+    async def update_task(self, list_id: str, task_id: str, task_data: Dict) -> Optional[Dict]:
+        return await self.mutate(list_id, self.db.update_task, list_id, task_id, task_data)
+
+    async def delete_task(self, list_id: str, task_id: str) -> bool:
+        return await self.mutate(list_id, self.db.delete_task, list_id, task_id)
+
+    async def get_tasks_due_this_week(self) -> List[Dict]:
+        return await self.run(self.db.get_tasks_due_this_week)
+
+    async def get_tasks_ordered_by_deadline(self, list_id: str) -> List[Dict]:
+        return await self.run(self.db.get_tasks_ordered_by_deadline, list_id)
+
+    async def get_tasks_by_completion(self, list_id: str, completed: bool = False) -> List[Dict]:
+        return await self.run(self.db.get_tasks_by_completion, list_id, completed)
+
+    async def get_tasks_by_date_range(self, start_date: datetime, end_date: datetime) -> List[Dict]:
+        return await self.run(self.db.get_tasks_by_date_range, start_date, end_date)
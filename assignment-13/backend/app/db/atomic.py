@@ -0,0 +1,53 @@
+import os
+import tempfile
+from pathlib import Path
+from typing import Union
+
+# none:   never fsync, a crash can lose the most recent writes
+# batch:  fsync once per write batch (a group of log records or a snapshot) and the directory after renames
+# always: additionally fsync every log record on its own, even when group commit is enabled
+DURABILITY_LEVELS = ("none", "batch", "always")
+
+
+def validate_durability(durability: str) -> str:
+    """Reject unknown durability levels early"""
+    if durability not in DURABILITY_LEVELS:
+        raise ValueError(f"Unknown durability level '{durability}', expected one of: {', '.join(DURABILITY_LEVELS)}")
+    return durability
+
+
+def fsync_directory(path: Union[str, Path]):
+    """Flush a directory entry so that a rename inside it survives a crash"""
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_temp(path: Union[str, Path], content: Union[str, bytes], durability: str) -> str:
+    """Write content to a temp file next to path and return the temp file's path"""
+    mode = 'wb' if isinstance(content, bytes) else 'w'
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=f".{os.path.basename(path)}.")
+    try:
+        with os.fdopen(fd, mode) as f:
+            f.write(content)
+            f.flush()
+            if durability != "none":
+                os.fsync(f.fileno())
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path
+
+
+def replace(tmp_path: Union[str, Path], path: Union[str, Path], durability: str):
+    """Atomically move a temp file over path"""
+    os.replace(tmp_path, path)
+    if durability != "none":
+        fsync_directory(path)
+
+
+def atomic_write(path: Union[str, Path], content: Union[str, bytes], durability: str):
+    """Replace a file so that readers see either the old or the new content, never a partial one"""
+    replace(write_temp(path, content, durability), path, durability)
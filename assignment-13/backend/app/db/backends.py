@@ -0,0 +1,100 @@
+from typing import Callable, Dict, List, Optional, Protocol
+from app.core.config import settings
+
+
+class StorageBackend(Protocol):
+    """Operations every storage engine must provide to the service layer"""
+
+    def get_lists(self) -> List[Dict]: ...
+
+    def get_list(self, list_id: str) -> Optional[Dict]: ...
+
+    def create_list(self, list_data: Dict) -> Dict: ...
+
+    def update_list(self, list_id: str, list_data: Dict) -> Optional[Dict]: ...
+
+    def delete_list(self, list_id: str) -> bool: ...
+
+    def get_tasks(self, list_id: str) -> List[Dict]: ...
+
+    def get_task(self, list_id: str, task_id: str) -> Optional[Dict]: ...
+
+    def add_task(self, list_id: str, task_data: Dict) -> Optional[Dict]: ...
+
+    def update_task(self, list_id: str, task_id: str, task_data: Dict) -> Optional[Dict]: ...
+
+    def delete_task(self, list_id: str, task_id: str) -> bool: ...
+
+    def get_tasks_due_this_week(self) -> List[Dict]: ...
+
+    def get_tasks_ordered_by_deadline(self, list_id: str) -> List[Dict]: ...
+
+
+def _json_backend() -> StorageBackend:
+    from app.db.database import db
+    return db
+
+
+def _optimized_json_backend() -> StorageBackend:
+    from app.db.optimized_database import optimized_db
+    return optimized_db
+
+
+def _sharded_json_backend() -> StorageBackend:
+    from app.db.sharded_database import ShardedDatabase
+    return ShardedDatabase()
+
+
+def _sqlite_backend() -> StorageBackend:
+    from app.db.sqlite_database import SqliteDatabase
+    return SqliteDatabase()
+
+
+def _memory_backend() -> StorageBackend:
+    from app.db.memory_database import InMemoryDatabase
+    return InMemoryDatabase()
+
+
+def _shared_snapshot_backend() -> StorageBackend:
+    from app.db.shared_snapshot import SharedSnapshotDatabase
+    return SharedSnapshotDatabase()
+
+
+# Factories are imported lazily so that only the selected engine touches disk
+_registry: Dict[str, Callable[[], StorageBackend]] = {
+    "json": _json_backend,
+    "optimized_json": _optimized_json_backend,
+    "sharded_json": _sharded_json_backend,
+    "sqlite": _sqlite_backend,
+    "memory": _memory_backend,
+    "shared_snapshot": _shared_snapshot_backend,
+}
+_instances: Dict[str, StorageBackend] = {}
+
+
+def register_backend(name: str, factory: Callable[[], StorageBackend]):
+    """Register a storage backend factory under a name usable in STORAGE_BACKEND"""
+    _registry[name] = factory
+    _instances.pop(name, None)
+
+
+def available_backends() -> List[str]:
+    """Names of all registered storage backends"""
+    return sorted(_registry)
+
+
+def get_backend(name: Optional[str] = None) -> StorageBackend:
+    """Get the shared instance of a storage backend, the configured one by default"""
+    name = name or settings.STORAGE_BACKEND
+    if name not in _instances:
+        if name not in _registry:
+            raise ValueError(
+                f"Unknown storage backend '{name}', expected one of: {', '.join(available_backends())}"
+            )
+        _instances[name] = _registry[name]()
+    return _instances[name]
+
+
+def get_db() -> StorageBackend:
+    """FastAPI dependency providing the configured storage backend"""
+    return get_backend()
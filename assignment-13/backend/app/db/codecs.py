@@ -0,0 +1,116 @@
+import gzip
+import json
+import zlib
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, List
+from app.db.snapshot import MappedSnapshot, encode_snapshot, is_snapshot
+
+try:
+    import orjson
+except ImportError:  # optional accelerated JSON encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional binary format
+    msgpack = None
+
+# json:         pretty-printed stdlib JSON, the historical on-disk format
+# json_compact: stdlib JSON without indentation or spaces after separators
+# orjson:       compact JSON written by orjson, requires the orjson package
+# msgpack:      binary MessagePack, requires the msgpack package
+# mmap:         binary snapshot with an offset index, read lazily through mmap (see app/db/snapshot.py)
+CODECS = ("json", "json_compact", "orjson", "msgpack", "mmap")
+COMPRESSIONS = ("none", "zlib", "gzip")
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def plain(value: Any) -> Dict:
+    """Encoder fallback for mapping-like records such as TaskRecord"""
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def _encode_json(data: Any) -> bytes:
+    return json.dumps(data, indent=2, default=plain).encode("utf-8")
+
+
+def _encode_json_compact(data: Any) -> bytes:
+    return json.dumps(data, separators=(",", ":"), default=plain).encode("utf-8")
+
+
+def _encode_orjson(data: Any) -> bytes:
+    return orjson.dumps(data, default=plain)
+
+
+def _encode_msgpack(data: Any) -> bytes:
+    return msgpack.packb(data, use_bin_type=True, default=plain)
+
+
+_ENCODERS: Dict[str, Callable[[Any], bytes]] = {
+    "json": _encode_json,
+    "json_compact": _encode_json_compact,
+    "orjson": _encode_orjson,
+    "msgpack": _encode_msgpack,
+    "mmap": encode_snapshot,
+}
+_REQUIREMENTS = {"orjson": lambda: orjson, "msgpack": lambda: msgpack}
+
+
+def available_codecs() -> List[str]:
+    """Codecs whose optional dependency is installed"""
+    return [codec for codec in CODECS if codec not in _REQUIREMENTS or _REQUIREMENTS[codec]() is not None]
+
+
+def validate_codec(codec: str) -> str:
+    """Reject unknown codecs and codecs whose package is missing early"""
+    if codec not in CODECS:
+        raise ValueError(f"Unknown storage codec '{codec}', expected one of: {', '.join(CODECS)}")
+    if codec not in available_codecs():
+        raise ValueError(f"Storage codec '{codec}' requires the {codec} package")
+    return codec
+
+
+def validate_compression(compression: str, codec: str = "json") -> str:
+    """Reject unknown compression framings, and framings the codec cannot be read through, early"""
+    if compression not in COMPRESSIONS:
+        raise ValueError(
+            f"Unknown storage compression '{compression}', expected one of: {', '.join(COMPRESSIONS)}"
+        )
+    if codec == "mmap" and compression != "none":
+        raise ValueError("The mmap codec is read in place and cannot be compressed")
+    return compression
+
+
+def encode(data: Any, codec: str = "json", compression: str = "none") -> bytes:
+    """Serialize a document with a codec and optional compression framing"""
+    content = _ENCODERS[codec](data)
+    if compression == "zlib":
+        return zlib.compress(content)
+    if compression == "gzip":
+        # mtime=0 keeps the output deterministic for identical documents
+        return gzip.compress(content, mtime=0)
+    return content
+
+
+def _is_zlib(content: bytes) -> bool:
+    # A zlib header is a deflate CMF byte followed by a FLG byte that makes the pair a multiple of 31
+    return len(content) >= 2 and content[0] == 0x78 and (content[0] << 8 | content[1]) % 31 == 0
+
+
+def decode(content: bytes) -> Any:
+    """Deserialize a document written by encode(), detecting the codec and compression"""
+    if content[:2] == GZIP_MAGIC:
+        content = gzip.decompress(content)
+    elif _is_zlib(content):
+        content = zlib.decompress(content)
+    if is_snapshot(content):
+        return MappedSnapshot(content).document()
+    # Every JSON codec writes an object, so the first significant byte tells JSON and MessagePack apart
+    if content.lstrip()[:1] in (b"{", b"["):
+        return orjson.loads(content) if orjson is not None else json.loads(content)
+    if msgpack is None:
+        raise ValueError("Data is not JSON and the msgpack package is not installed to decode it")
+    return msgpack.unpackb(content, raw=False)
@@ -1,13 +1,85 @@
 import json
 import os
-from typing import Dict, List, Any, Optional
+import threading
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 from app.core.config import settings
-from datetime import datetime
+from app.db.wal import WriteAheadLog
+from app.db.atomic import replace, validate_durability, write_temp
+from app.db.codecs import decode, encode, validate_codec, validate_compression
+from app.db.group_commit import GroupCommitter
+from app.db.deadline_index import stamp_deadline, this_week_epochs
+from app.db.task_record import TaskRecord
+from app.db.versioned_state import ListVersion, StateVersion
 
 class Database:
-    def __init__(self):
-        self.db_file = settings.DATABASE_FILE
+    """WAL-backed JSON storage with its state resident in memory as immutable versions
+    
+    Writers build the next version of the lists they change and publish it with a reference
+    swap, so readers never lock and see one consistent version for as long as they hold it.
+    Records returned by reads are shared with the stored versions and must not be mutated.
+    """
+    
+    def __init__(self, db_file: Optional[Path] = None, wal_file: Optional[Path] = None):
+        self.db_file = db_file or settings.DATABASE_FILE
+        self.durability = validate_durability(settings.DURABILITY)
+        self.codec = validate_codec(settings.STORAGE_CODEC)
+        self.compression = validate_compression(settings.STORAGE_COMPRESSION, self.codec)
         self._ensure_db_exists()
+        self._wal = WriteAheadLog(wal_file or settings.WAL_FILE, self.durability)
+        self._init_locks()
+        self._init_vacuum()
+        self._compacting = False
+        self._load()
+        self._group_commit = None
+        if settings.GROUP_COMMIT_ENABLED:
+            self._group_commit = GroupCommitter(
+                self._wal,
+                max_batch=settings.GROUP_COMMIT_MAX_BATCH,
+                on_commit=self._after_append,
+            )
+    
+    def _init_locks(self):
+        """A lock for the list collection, striped locks for the lists and one for publishing
+        
+        Task mutations only take the lock of their list's stripe, so writes to different lists
+        run in parallel. create_list and delete_list also take the collection lock, and
+        compaction takes every lock. Locks are always taken in that order.
+        """
+        self._collection_lock = threading.RLock()
+        self._list_locks = [threading.RLock() for _ in range(max(1, settings.LOCK_STRIPES))]
+        # Guards what every list shares: publishing a version, the lsn and the compaction flag
+        self._shared_lock = threading.Lock()
+    
+    def _init_vacuum(self):
+        """Lists whose tombstones wait for the background vacuum, and what it purged so far"""
+        self._vacuum_pending = set()
+        self._vacuuming = False
+        self._vacuums = 0
+        self._purged = 0
+    
+    def _list_lock(self, list_id: str) -> threading.RLock:
+        return self._list_locks[hash(list_id) % len(self._list_locks)]
+    
+    @contextmanager
+    def _locked(self, record: Dict[str, Any]) -> Iterator[None]:
+        """Hold the locks a log record needs while it is applied"""
+        list_id = record["list"].get("id") if record["op"] == "create_list" else record["list_id"]
+        with ExitStack() as stack:
+            if record["op"] in ("create_list", "delete_list"):
+                stack.enter_context(self._collection_lock)
+            stack.enter_context(self._list_lock(list_id))
+            yield
+    
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """Hold every lock, for work that needs the whole database to stand still"""
+        with ExitStack() as stack:
+            stack.enter_context(self._collection_lock)
+            for lock in self._list_locks:
+                stack.enter_context(lock)
+            yield
     
     def _ensure_db_exists(self):
         """Ensure the database file exists with proper structure"""
@@ -15,174 +87,262 @@ class Database:
             with open(self.db_file, 'w') as f:
                 json.dump({"lists": []}, f)
     
+    def _read_snapshot(self) -> Dict[str, Any]:
+        """Read the last compacted snapshot"""
+        with open(self.db_file, 'rb') as f:
+            content = f.read()
+        # An empty file is a fresh database; a corrupted one must fail loudly rather than be
+        # replaced by an empty structure on the next write
+        if not content.strip():
+            return {"lists": []}
+        return decode(content)
+    
+    def _init_state(self, data: Dict[str, Any]):
+        """Make a database document the resident state and index it"""
+        self._version = StateVersion.of({**data, "lists": [self._compact(lst) for lst in data.get("lists", [])]})
+        self._lsn = data.get("lsn", 0)
+    
+    def _load(self):
+        """Load the snapshot, build the indexes and replay the log on top"""
+        self._init_state(self._read_snapshot())
+        # Deletes in the log can start a vacuum, which must wait for the replay
+        with self._exclusive():
+            for record in self._wal.read_records(after_lsn=self._lsn):
+                self._apply_record(record)
+                self._lsn = record["lsn"]
+        self._wal.start_after(self._lsn)
+    
+    @property
+    def lsn(self) -> int:
+        """Sequence number of the last logged mutation, the version token of read-your-writes reads"""
+        return self._lsn
+    
+    def snapshot(self) -> StateVersion:
+        """The current version, for a series of reads that must agree with each other"""
+        return self._version
+    
+    def _publish(self, list_id: str, version):
+        """Swap in a database version with one list replaced, or removed when version is None"""
+        # The caller holds the list's lock, so only other lists can change in the meantime
+        with self._shared_lock:
+            self._version = self._version.replace(list_id, version)
+        if version is not None and version.garbage >= max(settings.VACUUM_MIN_GARBAGE, min(
+            settings.VACUUM_GARBAGE_RATIO * version.size, settings.VACUUM_MAX_GARBAGE
+        )):
+            self._schedule_vacuum(list_id)
+    
     def read_db(self) -> Dict[str, List[Dict]]:
-        """Read the entire database"""
-        with open(self.db_file, 'r') as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                # If the file is empty or corrupted, initialize with empty structure
-                return {"lists": []}
-    
-    def write_db(self, data: Dict[str, List[Dict]]):
-        """Write data to the database"""
-        with open(self.db_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        """Return the document of the current version"""
+        return self._version.document(self._lsn)
+    
+    def _log(self, record: Dict[str, Any]):
+        """Append a mutation to the log"""
+        self._after_append(self._wal.append(record))
+    
+    def _after_append(self, lsn: int):
+        """Record the durable sequence number and schedule compaction when the log grows too long"""
+        with self._shared_lock:
+            # Writers of different lists can get here out of order
+            self._lsn = max(self._lsn, lsn)
+            if self._wal.record_count < settings.WAL_COMPACTION_THRESHOLD or self._compacting:
+                return
+            self._compacting = True
+        threading.Thread(target=self.compact, daemon=True).start()
+    
+    def compact(self):
+        """Flush the resident state into a new snapshot and truncate the log"""
+        try:
+            # Only pairing the version with its lsn needs the locks; versions never change afterwards
+            with self._exclusive():
+                if self._group_commit:
+                    # Records applied in memory must be in the log before the snapshot claims their lsn
+                    self._group_commit.drain()
+                version, lsn = self._version, self._lsn
+            content = encode(version.document(lsn), self.codec, self.compression)
+            tmp_file = write_temp(self.db_file, content, self.durability)
+            with self._exclusive():
+                replace(tmp_file, self.db_file, self.durability)
+                self._wal.truncate(lsn)
+        finally:
+            self._compacting = False
+    
+    def _apply_record(self, record: Dict[str, Any]) -> Any:
+        """Apply a single log record by publishing the next version of its list"""
+        result, change = self._prepare(record)
+        if change is not None:
+            self._publish(*change)
+        return result
+    
+    @staticmethod
+    def _compact(lst: Dict) -> Dict:
+        """A list document with its tasks as compact TaskRecords instead of dicts"""
+        if "tasks" not in lst:
+            return lst
+        return {**lst, "tasks": [TaskRecord.of(task) for task in lst["tasks"]]}
+    
+    def _prepare(self, record: Dict[str, Any]) -> Tuple[Any, Optional[Tuple[str, Optional[ListVersion]]]]:
+        """The result of a log record and the (list_id, version) it publishes, None if it does not apply"""
+        op = record["op"]
+        if op == "create_list":
+            lst = self._compact(record["list"])
+            return lst, (lst.get("id"), ListVersion.of(lst))
+        
+        list_id = record["list_id"]
+        current = self._version.lists.get(list_id)
+        if op == "delete_list":
+            if current is None:
+                return False, None
+            return True, (list_id, None)
+        if op == "update_list":
+            if current is None:
+                return None, None
+            # The tasks are kept
+            updated = current.with_fields(record["list"])
+            return updated.data, (list_id, updated)
+        if op == "add_task":
+            if current is None:
+                return None, None
+            task = TaskRecord.of(record["task"])
+            return task, (list_id, current.with_task(task))
+        
+        position = None if current is None else current.position(record["task_id"])
+        if position is None:
+            return (False if op == "delete_task" else None), None
+        if op == "update_task":
+            task = TaskRecord.of(record["task"])
+            return task, (list_id, current.with_task_replaced(position, task))
+        if op == "delete_task":
+            return True, (list_id, current.without_task(position))
+        raise ValueError(f"Unknown log operation: {op}")
+    
+    def _schedule_vacuum(self, list_id: str):
+        """Have the background vacuum purge a list's tombstones"""
+        with self._shared_lock:
+            self._vacuum_pending.add(list_id)
+            if self._vacuuming:
+                return
+            self._vacuuming = True
+        threading.Thread(target=self.vacuum, daemon=True).start()
+    
+    def vacuum(self):
+        """Replace every list waiting for the vacuum with a version without tombstones"""
+        try:
+            while True:
+                with self._shared_lock:
+                    if not self._vacuum_pending:
+                        return
+                    list_id = self._vacuum_pending.pop()
+                # Like a task mutation, so writes to other lists carry on
+                with self._list_lock(list_id):
+                    current = self._version.lists.get(list_id)
+                    if current is None or not current.garbage:
+                        continue
+                    self._publish(list_id, current.vacuumed())
+                with self._shared_lock:
+                    self._vacuums += 1
+                    self._purged += current.garbage
+        finally:
+            with self._shared_lock:
+                self._vacuuming = False
+    
+    def garbage_stats(self) -> Dict[str, Any]:
+        """Tombstones waiting to be purged, and what the vacuum purged so far"""
+        version = self._version
+        tombstones = sum(lst.garbage for lst in version.lists.values())
+        slots = sum(lst.size for lst in version.lists.values())
+        with self._shared_lock:
+            return {
+                "tombstones": tombstones,
+                "task_slots": slots,
+                "garbage_ratio": tombstones / slots if slots else 0.0,
+                "lists_pending_vacuum": len(self._vacuum_pending),
+                "vacuums": self._vacuums,
+                "purged_tombstones": self._purged,
+            }
+    
+    def _commit(self, record: Dict[str, Any]) -> Any:
+        """Log a mutation if it applies, and publish it once it is durable
+        
+        A failed append raises before anything is published, so readers never see a write
+        the client was told failed, and no later compaction can persist it. The list's lock
+        is held until the new version is published, so the next writer of the list builds on
+        it; writers of other lists still join the same group commit batch meanwhile.
+        """
+        with self._locked(record):
+            result, change = self._prepare(record)
+            if change is None:
+                return result
+            if self._group_commit:
+                self._group_commit.submit(record).result()
+            else:
+                self._log(record)
+            self._publish(*change)
+            return result
     
     # List operations
     def get_lists(self) -> List[Dict]:
         """Get all lists"""
-        data = self.read_db()
-        return data.get("lists", [])
+        return self._version.get_lists()
     
     def get_list(self, list_id: str) -> Optional[Dict]:
         """Get a specific list by ID"""
-        lists = self.get_lists()
-        for lst in lists:
-            if lst.get("id") == list_id:
-                return lst
-        return None
+        return self._version.get_list(list_id)
     
     def create_list(self, list_data: Dict) -> Dict:
         """Create a new list"""
-        data = self.read_db()
-        data["lists"].append(list_data)
-        self.write_db(data)
-        return list_data
+        return self._commit({"op": "create_list", "list": list_data})
     
     def update_list(self, list_id: str, list_data: Dict) -> Optional[Dict]:
         """Update an existing list"""
-        data = self.read_db()
-        for i, lst in enumerate(data["lists"]):
-            if lst.get("id") == list_id:
-                # Preserve the tasks
-                list_data["tasks"] = lst.get("tasks", [])
-                data["lists"][i] = list_data
-                self.write_db(data)
-                return list_data
-        return None
+        list_fields = {key: value for key, value in list_data.items() if key != "tasks"}
+        return self._commit({"op": "update_list", "list_id": list_id, "list": list_fields})
     
     def delete_list(self, list_id: str) -> bool:
         """Delete a list"""
-        data = self.read_db()
-        initial_count = len(data["lists"])
-        data["lists"] = [lst for lst in data["lists"] if lst.get("id") != list_id]
-        if len(data["lists"]) < initial_count:
-            self.write_db(data)
-            return True
-        return False
+        return self._commit({"op": "delete_list", "list_id": list_id})
     
     # Task operations
     def get_tasks(self, list_id: str) -> List[Dict]:
         """Get all tasks in a list"""
-        lst = self.get_list(list_id)
-        if lst:
-            return lst.get("tasks", [])
-        return []
+        return self._version.get_tasks(list_id)
     
     def get_task(self, list_id: str, task_id: str) -> Optional[Dict]:
         """Get a specific task by ID"""
-        tasks = self.get_tasks(list_id)
-        for task in tasks:
-            if task.get("id") == task_id:
-                return task
-        return None
+        return self._version.get_task(list_id, task_id)
     
     def add_task(self, list_id: str, task_data: Dict) -> Optional[Dict]:
         """Add a task to a list"""
-        data = self.read_db()
-        for lst in data["lists"]:
-            if lst.get("id") == list_id:
-                if "tasks" not in lst:
-                    lst["tasks"] = []
-                lst["tasks"].append(task_data)
-                self.write_db(data)
-                return task_data
-        return None
+        return self._commit({"op": "add_task", "list_id": list_id, "task": stamp_deadline(task_data)})
     
     def update_task(self, list_id: str, task_id: str, task_data: Dict) -> Optional[Dict]:
         """Update a task"""
-        data = self.read_db()
-        for lst in data["lists"]:
-            if lst.get("id") == list_id:
-                for i, task in enumerate(lst.get("tasks", [])):
-                    if task.get("id") == task_id:
-                        lst["tasks"][i] = task_data
-                        self.write_db(data)
-                        return task_data
-        return None
+        return self._commit(
+            {"op": "update_task", "list_id": list_id, "task_id": task_id, "task": stamp_deadline(task_data)}
+        )
     
     def delete_task(self, list_id: str, task_id: str) -> bool:
         """Delete a task"""
-        data = self.read_db()
-        for lst in data["lists"]:
-            if lst.get("id") == list_id:
-                if "tasks" not in lst:
-                    return False
-                initial_count = len(lst["tasks"])
-                lst["tasks"] = [task for task in lst["tasks"] if task.get("id") != task_id]
-                if len(lst["tasks"]) < initial_count:
-                    self.write_db(data)
-                    return True
-        return False
+        return self._commit({"op": "delete_task", "list_id": list_id, "task_id": task_id})
     
     def get_tasks_due_this_week(self) -> List[Dict]:
         """Get all tasks due this week across all lists"""
-        data = self.read_db()
-        due_this_week = []
-        today = datetime.now().date()
-        
-        for lst in data.get("lists", []):
-            for task in lst.get("tasks", []):
-                if "deadline" in task:
-                    # Parse the deadline string
-                    try:
-                        deadline_date = datetime.fromisoformat(task["deadline"]).date()
-                        days_difference = (deadline_date - today).days
-                        
-                        # If due within the next 7 days
-                        if 0 <= days_difference <= 7:
-                            # Add list info to the task
-                            task_with_list = task.copy()
-                            task_with_list["list_id"] = lst.get("id")
-                            task_with_list["list_name"] = lst.get("name")
-                            due_this_week.append(task_with_list)
-                    except ValueError:
-                        # Skip if date format is invalid
-                        continue
-                        
-        return due_this_week
+        return self._version.get_tasks_due_between(*this_week_epochs())
     
     def get_tasks_ordered_by_deadline(self, list_id: str) -> List[Dict]:
         """Get tasks in a list ordered by deadline"""
-        tasks = self.get_tasks(list_id)
-        
-        # Filter tasks with valid deadlines
-        tasks_with_deadline = []
-        tasks_without_deadline = []
-        
-        for task in tasks:
-            if "deadline" in task:
-                try:
-                    deadline_date = datetime.fromisoformat(task["deadline"])
-                    task_copy = task.copy()
-                    task_copy["_parsed_deadline"] = deadline_date
-                    tasks_with_deadline.append(task_copy)
-                except ValueError:
-                    tasks_without_deadline.append(task)
-            else:
-                tasks_without_deadline.append(task)
-        
-        # Sort tasks with deadline
-        sorted_tasks = sorted(tasks_with_deadline, key=lambda x: x["_parsed_deadline"])
-        
-        # Remove the temporary parsing field
-        for task in sorted_tasks:
-            if "_parsed_deadline" in task:
-                del task["_parsed_deadline"]
-        
-        # Return sorted tasks followed by tasks without deadlines
-        return sorted_tasks + tasks_without_deadline
+        return self._version.get_tasks_ordered_by_deadline(list_id)
+
+_db: Optional[Database] = None
+_db_lock = threading.Lock()
+
 
-# Create a singleton instance
-db = Database()
+def __getattr__(name: str) -> Any:
+    # The singleton db is created on first use, so that importing the class, as the in-memory
+    # backend and the replica do, never opens the configured files or starts a compaction
+    global _db
+    if name != "db":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _db_lock:
+        if _db is None:
+            _db = Database()
+        return _db
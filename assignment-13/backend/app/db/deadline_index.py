@@ -0,0 +1,112 @@
+import math
+from bisect import bisect_left, insort
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+Entry = Tuple[int, str, str]
+
+
+def datetime_epoch(value: datetime) -> int:
+    """Epoch seconds of a deadline
+
+    Naive deadlines are interpreted in local time, like datetime.now() in the queries.
+    """
+    return math.floor(value.timestamp())
+
+
+def deadline_epoch(deadline) -> Optional[int]:
+    """Convert a stored deadline string to epoch seconds, or None when it is missing or invalid"""
+    if not deadline:
+        return None
+    try:
+        return datetime_epoch(datetime.fromisoformat(deadline.replace('Z', '+00:00')))
+    except (ValueError, AttributeError):
+        return None
+
+
+def stamp_deadline(task: Dict) -> Dict:
+    """Store the epoch of a task's deadline next to its display string
+
+    Writers that already know the epoch, like the task services, set deadline_epoch themselves
+    and the deadline string is not parsed again.
+    """
+    if "deadline_epoch" not in task:
+        task["deadline_epoch"] = deadline_epoch(task.get("deadline"))
+    return task
+
+
+def task_epoch(task: Dict) -> Optional[int]:
+    """Stored deadline epoch of a task, parsing the string only for records written before it existed"""
+    if "deadline_epoch" in task:
+        return task["deadline_epoch"]
+    return deadline_epoch(task.get("deadline"))
+
+
+def day_start_epoch(day: date) -> int:
+    """Epoch seconds of local midnight at the start of a day"""
+    return math.floor(datetime.combine(day, time.min).timestamp())
+
+
+def this_week_epochs() -> Tuple[int, int]:
+    """(start, end) epochs of the tasks due this week: start <= deadline_epoch < end
+
+    Due from the start of today until the end of the 7th day from now.
+    """
+    today = datetime.now().date()
+    return day_start_epoch(today), day_start_epoch(today + timedelta(days=8))
+
+
+class DeadlineIndex:
+    """Sorted (deadline_epoch, list_id, task_id) entries kept globally and per list"""
+
+    def __init__(self):
+        self._global: List[Entry] = []
+        self._by_list: Dict[str, List[Entry]] = {}
+        self._entries: Dict[str, Entry] = {}
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, list_id: str, task: Dict):
+        """Index a task if it has a valid deadline"""
+        epoch = task_epoch(task)
+        if epoch is None:
+            return
+        entry = (epoch, list_id, task.get("id"))
+        self._entries[entry[2]] = entry
+        insort(self._global, entry)
+        insort(self._by_list.setdefault(list_id, []), entry)
+
+    def remove(self, task_id: str):
+        """Drop a task from the index"""
+        entry = self._entries.pop(task_id, None)
+        if entry is None:
+            return
+        for entries in (self._global, self._by_list[entry[1]]):
+            del entries[bisect_left(entries, entry)]
+
+    def update(self, list_id: str, task: Dict):
+        """Re-index a task whose deadline may have changed"""
+        self.remove(task.get("id"))
+        self.add(list_id, task)
+
+    def remove_list(self, list_id: str):
+        """Drop every task of a list from the index"""
+        removed = self._by_list.pop(list_id, [])
+        for entry in removed:
+            del self._entries[entry[2]]
+        if removed:
+            self._global = [entry for entry in self._global if entry[1] != list_id]
+
+    def range(self, start_epoch: int, end_epoch: int) -> List[Tuple[str, str]]:
+        """(list_id, task_id) pairs with start_epoch <= deadline < end_epoch, earliest first"""
+        lo = bisect_left(self._global, (start_epoch,))
+        hi = bisect_left(self._global, (end_epoch,))
+        return [(list_id, task_id) for _, list_id, task_id in self._global[lo:hi]]
+
+    def ordered(self, list_id: str) -> List[str]:
+        """Task IDs of a list in deadline order"""
+        return [task_id for _, _, task_id in self._by_list.get(list_id, [])]
@@ -0,0 +1,57 @@
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+FileIdentity = Tuple[int, int, int]
+
+logger = logging.getLogger(__name__)
+
+
+def file_identity(path: Path) -> Optional[FileIdentity]:
+    """(st_mtime_ns, st_size, st_ino) of a file, or None if it does not exist
+
+    Atomic writes replace the file, so the inode changes even when the modification
+    time and size happen to match.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+class FileWatcher:
+    """Poll a file's identity in a background thread and report every change
+
+    The standard library has no inotify binding, so this is a cheap stat() loop that
+    pushes invalidations to its subscriber instead of every reader stat'ing the file.
+    """
+
+    def __init__(self, path: Path, interval: float, on_change: Callable[[], None]):
+        self.path = Path(path)
+        self.interval = interval
+        self._on_change = on_change
+        self._identity = file_identity(self.path)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"watch-{self.path.name}", daemon=True)
+
+    def start(self) -> "FileWatcher":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            identity = file_identity(self.path)
+            if identity != self._identity:
+                try:
+                    self._on_change()
+                except Exception:
+                    # Keep watching; the change is reported again on the next poll
+                    logger.exception("Handling a change of %s failed", self.path)
+                    continue
+                self._identity = identity
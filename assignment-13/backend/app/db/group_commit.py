@@ -0,0 +1,71 @@
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.db.wal import WriteAheadLog
+
+
+class GroupCommitter:
+    """Coalesce log appends from concurrent writers into one fsync'd write per batch
+
+    Writers call submit() and wait on the returned future, which resolves to the
+    record's sequence number once the batch holding it is durable. Asyncio callers can await it through
+    asyncio.wrap_future().
+
+    A record submitted while no batch is being written is written at once, so a lone writer
+    waits for nothing but its own fsync. Records submitted during a write form the next batch.
+    """
+
+    def __init__(self, wal: WriteAheadLog, max_batch: int,
+                 on_commit: Optional[Callable[[int], None]] = None):
+        self._wal = wal
+        self._max_batch = max_batch
+        self._on_commit = on_commit
+        self._pending: List[Tuple[Dict[str, Any], Future]] = []
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, record: Dict[str, Any]) -> Future:
+        """Queue a record for the next batch"""
+        future: Future = Future()
+        with self._condition:
+            self._pending.append((record, future))
+            self._condition.notify_all()
+        return future
+
+    def drain(self):
+        """Block until every submitted record has been written"""
+        with self._condition:
+            while self._pending or self._in_flight:
+                self._condition.wait()
+
+    def _next_batch(self) -> List[Tuple[Dict[str, Any], Future]]:
+        """Wait for a record, then take every record that arrived during the previous write"""
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+            batch = self._pending[:self._max_batch]
+            del self._pending[:self._max_batch]
+            self._in_flight = len(batch)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                lsn = self._wal.append_many([record for record, _ in batch])
+                if self._on_commit:
+                    self._on_commit(lsn)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                # Each writer learns the sequence number of its own record
+                first_lsn = lsn - len(batch) + 1
+                for offset, (_, future) in enumerate(batch):
+                    future.set_result(first_lsn + offset)
+            finally:
+                with self._condition:
+                    self._in_flight = 0
+                    self._condition.notify_all()
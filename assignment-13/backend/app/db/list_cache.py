@@ -0,0 +1,113 @@
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+
+class ListCache:
+    """Resident lists in recency order, evicting cold lists beyond an approximate byte budget
+
+    Sizes are the compact JSON size of each list, which tracks its real footprint closely
+    enough to bound memory. Pinned lists are never evicted: a list that was changed since
+    the file was last written, or that has no file to be reloaded from, would be lost.
+    """
+
+    def __init__(self, budget: int = 0, on_evict: Optional[Callable[[str], None]] = None):
+        self.budget = budget
+        self._on_evict = on_evict
+        self._lists: "OrderedDict[str, Dict]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._pinned = set()
+        self.resident_bytes = 0
+        # Counters survive clear() so that they describe the whole life of the process
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+    def __contains__(self, list_id: str) -> bool:
+        return list_id in self._lists
+
+    def __len__(self) -> int:
+        return len(self._lists)
+
+    def peek(self, list_id: str) -> Optional[Dict]:
+        """Get a list without counting the access or refreshing its recency"""
+        return self._lists.get(list_id)
+
+    def get(self, list_id: str) -> Optional[Dict]:
+        """Get a list and mark it most recently used"""
+        lst = self._lists.get(list_id)
+        if lst is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._lists.move_to_end(list_id)
+        return lst
+
+    def size(self, list_id: str) -> int:
+        """Approximate size of a resident list"""
+        return self._sizes[list_id]
+
+    def put(self, list_id: str, lst: Dict, size: int, pinned: bool = False):
+        """Make a list resident as the most recently used one"""
+        self.resident_bytes += size - self._sizes.get(list_id, 0)
+        self._lists[list_id] = lst
+        self._lists.move_to_end(list_id)
+        self._sizes[list_id] = size
+        if pinned:
+            self._pinned.add(list_id)
+        self._evict()
+
+    def resize(self, list_id: str, delta: int):
+        """Adjust a changed list's size and pin it until the change is written"""
+        self._sizes[list_id] += delta
+        self.resident_bytes += delta
+        self._pinned.add(list_id)
+        self._evict()
+
+    def pop(self, list_id: str):
+        """Forget a deleted list"""
+        if self._lists.pop(list_id, None) is not None:
+            self.resident_bytes -= self._sizes.pop(list_id)
+        self._pinned.discard(list_id)
+
+    def unpin_all(self):
+        """Every resident list can now be reloaded from the file"""
+        self._pinned.clear()
+        self._evict()
+
+    def clear(self):
+        """Drop every resident list, keeping the counters"""
+        self._lists.clear()
+        self._sizes.clear()
+        self._pinned.clear()
+        self.resident_bytes = 0
+
+    def _evict(self):
+        """Evict the least recently used unpinned lists until the budget is met"""
+        if not self.budget or self.resident_bytes <= self.budget:
+            return
+        # The most recently used list is the one being worked on, so it always stays
+        for list_id in list(self._lists)[:-1]:
+            if self.resident_bytes <= self.budget:
+                break
+            if list_id in self._pinned:
+                continue
+            del self._lists[list_id]
+            size = self._sizes.pop(list_id)
+            self.resident_bytes -= size
+            self.evictions += 1
+            self.evicted_bytes += size
+            if self._on_evict:
+                self._on_evict(list_id)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit, miss and eviction counters plus the current residency"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+            "resident_lists": len(self._lists),
+            "resident_bytes": self.resident_bytes,
+            "budget_bytes": self.budget,
+        }
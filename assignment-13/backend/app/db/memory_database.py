@@ -0,0 +1,18 @@
+from typing import Dict, Any
+from app.db.database import Database
+
+class InMemoryDatabase(Database):
+    """Database that keeps its state in memory only, without touching disk"""
+
+    def __init__(self):
+        self._init_locks()
+        self._init_vacuum()
+        self._compacting = False
+        self._group_commit = None
+        self._init_state({"lists": []})
+
+    def _log(self, record: Dict[str, Any]):
+        """Nothing to persist"""
+
+    def compact(self):
+        """Nothing to persist"""
@@ -0,0 +1,46 @@
+"""Rewrite a database snapshot in another codec
+
+Run with the server stopped, for example:
+
+    python -m app.db.migrate_codec --codec msgpack --compression zlib
+
+Then set STORAGE_CODEC and STORAGE_COMPRESSION to the same values so that new snapshots keep
+the format. Reads detect the format, so the server starts on either file.
+"""
+import argparse
+import os
+from pathlib import Path
+from typing import List, Optional, Tuple
+from app.core.config import settings
+from app.db.atomic import atomic_write, validate_durability
+from app.db.codecs import CODECS, COMPRESSIONS, decode, encode, validate_codec, validate_compression
+
+
+def migrate(path: Path, codec: str, compression: str = "none", durability: str = "batch") -> Tuple[int, int]:
+    """Atomically re-encode the snapshot at path and return its size before and after"""
+    validate_codec(codec)
+    validate_compression(compression, codec)
+    validate_durability(durability)
+    with open(path, 'rb') as f:
+        content = f.read()
+    data = decode(content) if content.strip() else {"lists": []}
+    migrated = encode(data, codec, compression)
+    atomic_write(path, migrated, durability)
+    return len(content), len(migrated)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Rewrite a database snapshot in another codec")
+    parser.add_argument("path", nargs="?", default=str(settings.DATABASE_FILE), help="snapshot to migrate")
+    parser.add_argument("--codec", choices=CODECS, default=settings.STORAGE_CODEC)
+    parser.add_argument("--compression", choices=COMPRESSIONS, default=settings.STORAGE_COMPRESSION)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.path):
+        parser.error(f"{args.path} does not exist")
+    before, after = migrate(Path(args.path), args.codec, args.compression, settings.DURABILITY)
+    print(f"Migrated {args.path} to {args.codec}/{args.compression}: {before} -> {after} bytes")
+
+
+if __name__ == "__main__":
+    main()
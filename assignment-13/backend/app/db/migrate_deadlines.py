@@ -0,0 +1,56 @@
+"""Store the epoch of every task's deadline in an existing database snapshot
+
+Tasks written before deadline_epoch existed still work, because the deadline index falls back
+to parsing their deadline string, but every load then pays for the parsing. Run once with the
+server stopped, for example:
+
+    python -m app.db.migrate_deadlines
+
+The snapshot is rewritten in the configured STORAGE_CODEC and STORAGE_COMPRESSION.
+"""
+import argparse
+import os
+from pathlib import Path
+from typing import List, Optional
+from app.core.config import settings
+from app.db.atomic import atomic_write, validate_durability
+from app.db.codecs import decode, encode, validate_codec, validate_compression
+from app.db.deadline_index import deadline_epoch
+
+
+def migrate(path: Path, codec: str = "json", compression: str = "none", durability: str = "batch") -> int:
+    """Atomically add deadline_epoch to every task of the snapshot at path and return how many changed"""
+    validate_codec(codec)
+    validate_compression(compression, codec)
+    validate_durability(durability)
+    with open(path, 'rb') as f:
+        content = f.read()
+    if not content.strip():
+        return 0
+    data = decode(content)
+
+    changed = 0
+    for lst in data.get("lists", []):
+        for task in lst.get("tasks", []):
+            epoch = deadline_epoch(task.get("deadline"))
+            if "deadline_epoch" not in task or task["deadline_epoch"] != epoch:
+                task["deadline_epoch"] = epoch
+                changed += 1
+    if changed:
+        atomic_write(path, encode(data, codec, compression), durability)
+    return changed
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Store deadline epochs in a database snapshot")
+    parser.add_argument("path", nargs="?", default=str(settings.DATABASE_FILE), help="snapshot to migrate")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.path):
+        parser.error(f"{args.path} does not exist")
+    changed = migrate(Path(args.path), settings.STORAGE_CODEC, settings.STORAGE_COMPRESSION, settings.DURABILITY)
+    print(f"Migrated {args.path}: {changed} tasks updated")
+
+
+if __name__ == "__main__":
+    main()
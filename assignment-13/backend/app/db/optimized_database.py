@@ -1,19 +1,60 @@
+import atexit
 import json
+import logging
+import math
 import os
+import threading
+from pathlib import Path
 from typing import Dict, List, Any, Optional
 from app.core.config import settings
-from datetime import datetime, timedelta
+from app.db.atomic import atomic_write, validate_durability
+from app.db.codecs import decode, encode, validate_codec, validate_compression
+from app.db.deadline_index import DeadlineIndex, stamp_deadline, this_week_epochs
+from app.db.file_watcher import FileWatcher, file_identity
+from app.db.list_cache import ListCache
+from app.db.snapshot import MAGIC, MappedSnapshot, SnapshotBuilder
+from app.db.task_record import TaskRecord
+from datetime import datetime
 from collections import defaultdict
-import time
+
+logger = logging.getLogger(__name__)
+
+PERSIST_MODES = ("sync", "background")
 
 class OptimizedDatabase:
-    def __init__(self):
-        self.db_file = settings.DATABASE_FILE
+    def __init__(self, db_file: Optional[Path] = None):
+        self.db_file = db_file or settings.DATABASE_FILE
+        self.durability = validate_durability(settings.DURABILITY)
+        self.codec = validate_codec(settings.STORAGE_CODEC)
+        self.compression = validate_compression(settings.STORAGE_COMPRESSION, self.codec)
+        if settings.OPTIMIZED_PERSIST_MODE not in PERSIST_MODES:
+            raise ValueError(
+                f"Unknown persist mode '{settings.OPTIMIZED_PERSIST_MODE}', expected one of: {', '.join(PERSIST_MODES)}"
+            )
+        self.persist_mode = settings.OPTIMIZED_PERSIST_MODE
+        if settings.OPTIMIZED_CACHE_BUDGET_BYTES > 0 and self.codec != "mmap":
+            # Only lists backed by a mapped snapshot can be dropped and reloaded, so
+            # once a write goes out in another codec every list stays resident
+            logger.warning(
+                "OPTIMIZED_CACHE_BUDGET_BYTES is only enforced with STORAGE_CODEC = 'mmap', "
+                "lists written with '%s' stay in memory", self.codec
+            )
         self._ensure_db_exists()
         self._cache = {}
-        self._cache_timestamp = 0
-        self._cache_ttl = 30  # Cache for 30 seconds
-        
+        # Decoded lists, bounded by the memory budget when one is configured
+        self._lists = ListCache(settings.OPTIMIZED_CACHE_BUDGET_BYTES, on_evict=self._evicted)
+        # Identity of the file the cache was loaded from; None when there is nothing cached
+        self._cache_identity = None
+        self._lock = threading.RLock()
+        # Signalled whenever the background writer has caught up with the cache
+        self._persisted = threading.Condition(self._lock)
+        self._dirty = False
+        self._writing = False
+        self._writer = None
+        self._watcher = None
+        if settings.CACHE_WATCH_INTERVAL > 0:
+            self._watcher = FileWatcher(self.db_file, settings.CACHE_WATCH_INTERVAL, self._on_file_change).start()
+    
     def _ensure_db_exists(self):
         """Ensure the database file exists with proper structure"""
         if not os.path.exists(self.db_file):
@@ -21,85 +62,280 @@ class OptimizedDatabase:
                 json.dump({"lists": []}, f)
     
     def _is_cache_valid(self) -> bool:
-        """Check if cache is still valid"""
-        return time.time() - self._cache_timestamp < self._cache_ttl
+        """Check if the cache still matches the file on disk"""
+        # Until pending writes reach the disk the cache is the newer copy
+        if self._dirty or self._writing:
+            return True
+        if self._cache_identity is None:
+            return False
+        # The watcher pushes invalidations, otherwise every check costs a single stat()
+        return self._watcher is not None or file_identity(self.db_file) == self._cache_identity
+    
+    def _clear_cache(self):
+        """Drop the cached lists and everything derived from them"""
+        self._cache.clear()
+        self._lists.clear()
     
     def _invalidate_cache(self):
         """Invalidate the cache"""
-        self._cache.clear()
-        self._cache_timestamp = 0
+        self._cache_identity = None
+        self._clear_cache()
+    
+    def _evicted(self, list_id: str):
+        """Drop what was derived from an evicted list; it is rebuilt when the list is reloaded"""
+        self._cache.get('task_indexes', {}).pop(list_id, None)
+    
+    def _on_file_change(self):
+        """Drop the cache when the file was changed by someone else"""
+        with self._lock:
+            if self._dirty or self._writing or file_identity(self.db_file) == self._cache_identity:
+                return
+            self._invalidate_cache()
+    
+    def _load(self):
+        """Load the file's list headers, decoding lists up front only when the format requires it"""
+        with self._lock:
+            if 'headers' in self._cache and self._is_cache_valid():
+                return
+            # Stat before reading: a write racing with the read then shows up as a changed identity
+            identity = file_identity(self.db_file)
+            # Indexes built from the previous document must not outlive it
+            self._clear_cache()
+            with open(self.db_file, 'rb') as f:
+                content = f.read(len(MAGIC))
+                if content == MAGIC:
+                    # Snapshots only have their list headers decoded; tasks wait for first access
+                    snapshot = MappedSnapshot.map(f)
+                    self._cache['snapshot'] = snapshot
+                    self._cache['metadata'] = snapshot.metadata()
+                    self._cache['headers'] = {header["id"]: header for header in snapshot.list_headers()}
+                else:
+                    content += f.read()
+                    # Writes are atomic, so an unparsable file is real corruption and must not be
+                    # silently replaced by an empty structure on the next write
+                    self._set_document(decode(content) if content.strip() else {"lists": []})
+            self._cache_identity = identity
+    
+    def _set_document(self, data: Dict[str, Any]):
+        """Make a fully decoded document the cached state"""
+        lists = data.get("lists", [])
+        self._cache['metadata'] = {key: value for key, value in data.items() if key != "lists"}
+        self._cache['headers'] = {lst.get("id"): self._header(lst) for lst in lists}
+        # Without a snapshot to reload from, lists of a decoded document can never be evicted
+        for lst in lists:
+            self._compact(lst)
+            self._lists.put(lst.get("id"), lst, self._record_size(lst), pinned=True)
+    
+    @staticmethod
+    def _header(lst: Dict) -> Dict:
+        """Lightweight list header: the list's fields without its tasks, plus a task count"""
+        header = {key: value for key, value in lst.items() if key != "tasks"}
+        header["task_count"] = len(lst.get("tasks", []))
+        return header
+    
+    @staticmethod
+    def _compact(lst: Dict) -> Dict:
+        """Store a resident list's tasks as compact TaskRecords instead of dicts"""
+        if "tasks" in lst:
+            lst["tasks"] = [TaskRecord.of(task) for task in lst["tasks"]]
+        return lst
+    
+    @staticmethod
+    def _record_size(record: Dict) -> int:
+        """Approximate memory footprint of a list or task, measured as compact JSON"""
+        return len(encode(record, "json_compact"))
+    
+    def _resident(self, list_id: str) -> Optional[Dict]:
+        """A list with its tasks, decoded from the snapshot and cached on first access"""
+        self._load()
+        if list_id not in self._cache['headers']:
+            return None
+        lst = self._lists.get(list_id)
+        if lst is None:
+            snapshot = self._cache['snapshot']
+            lst = self._compact(snapshot.get_list(list_id))
+            self._lists.put(list_id, lst, snapshot.encoded_size(list_id))
+        return lst
     
     def read_db(self) -> Dict[str, List[Dict]]:
-        """Read the entire database with caching"""
-        if not self._is_cache_valid():
-            with open(self.db_file, 'r') as f:
-                try:
-                    data = json.load(f)
-                    self._cache['data'] = data
-                    self._cache_timestamp = time.time()
-                    return data
-                except json.JSONDecodeError:
-                    # If the file is empty or corrupted, initialize with empty structure
-                    data = {"lists": []}
-                    self._cache['data'] = data
-                    self._cache_timestamp = time.time()
-                    return data
-        return self._cache.get('data', {"lists": []})
+        """Read the entire database, decoding every list"""
+        with self._lock:
+            self._load()
+            data = dict(self._cache['metadata'])
+            data["lists"] = self.get_lists()
+            return data
     
     def write_db(self, data: Dict[str, List[Dict]]):
-        """Write data to the database and invalidate cache"""
-        with open(self.db_file, 'w') as f:
-            json.dump(data, f, indent=2)
-        self._invalidate_cache()
+        """Replace the whole database, keeping the new document cached"""
+        with self._lock:
+            self._clear_cache()
+            self._set_document(data)
+            self._persist()
+    
+    def _render(self) -> bytes:
+        """Encode the cached database; lists that were never decoded are copied from the snapshot"""
+        headers = self._cache['headers']
+        snapshot = self._cache.get('snapshot')
+        if self.codec == "mmap":
+            builder = SnapshotBuilder()
+            for list_id in headers:
+                if list_id in self._lists:
+                    builder.add_list(self._lists.peek(list_id))
+                else:
+                    builder.copy_list(snapshot, list_id)
+            return builder.build(self._cache['metadata'])
+        data = dict(self._cache['metadata'])
+        data["lists"] = [
+            self._lists.peek(list_id) if list_id in self._lists else snapshot.get_list(list_id) for list_id in headers
+        ]
+        return encode(data, self.codec, self.compression)
+    
+    def _written(self):
+        """Adopt the file just written: remember its identity and map it when it is a snapshot"""
+        self._cache_identity = file_identity(self.db_file)
+        if self.codec == "mmap":
+            self._cache['snapshot'] = MappedSnapshot.open(self.db_file)
+            # Changed lists can be reloaded from the new snapshot, so they may be evicted again
+            self._lists.unpin_all()
     
-    # Optimized List operations with indexing
+    def _persist(self):
+        """Write the cached document to disk, now or on the background writer"""
+        if self.persist_mode == "sync":
+            atomic_write(self.db_file, self._render(), self.durability)
+            self._written()
+            return
+        self._dirty = True
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_behind, name="optimized-db-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.flush)
+        self._persisted.notify_all()
+    
+    def _write_behind(self):
+        """Background writer: persist the latest cached document, coalescing bursts of mutations"""
+        while True:
+            with self._lock:
+                while not self._dirty:
+                    self._persisted.wait()
+                content = self._render()
+                self._dirty = False
+                self._writing = True
+            try:
+                atomic_write(self.db_file, content, self.durability)
+            finally:
+                with self._lock:
+                    self._writing = False
+                    if not self._dirty:
+                        self._written()
+                    self._persisted.notify_all()
+    
+    def flush(self):
+        """Block until every mutation has been written to disk"""
+        with self._lock:
+            while self._dirty or self._writing:
+                self._persisted.wait()
+    
+    def _get_deadline_index(self) -> DeadlineIndex:
+        """Get the sorted deadline index, building it once per cached document"""
+        with self._lock:
+            self._load()
+            if 'deadline_index' in self._cache:
+                return self._cache['deadline_index']
+            
+            # Entries only hold IDs, so evicted lists are not kept alive by the index
+            deadline_index = DeadlineIndex()
+            for list_id in list(self._cache['headers']):
+                for task in self._resident(list_id).get("tasks", []):
+                    deadline_index.add(list_id, task)
+            self._cache['deadline_index'] = deadline_index
+            return deadline_index
+    
+    def _index_task(self, lst: Dict, task: Dict):
+        """Patch a new or changed task into the cached deadline index"""
+        if 'deadline_index' in self._cache:
+            self._cache['deadline_index'].update(lst.get("id"), task)
+    
+    def _unindex_task(self, task_id: str):
+        """Remove a task from the cached deadline index"""
+        if 'deadline_index' in self._cache:
+            self._cache['deadline_index'].remove(task_id)
+    
+    def _tasks_with_list(self, entries: List[tuple]) -> List[Dict]:
+        """Resolve (list_id, task_id) index entries to task copies tagged with their list"""
+        tasks = []
+        for list_id, task_id in entries:
+            lst = self._resident(list_id)
+            task = lst["tasks"][self._task_index(lst)[task_id]]
+            task_with_list = task.copy()
+            task_with_list["list_id"] = list_id
+            task_with_list["list_name"] = lst.get("name")
+            tasks.append(task_with_list)
+        return tasks
+    
+    def _task_index(self, lst: Dict) -> Dict[str, int]:
+        """Task-id to position index of a cached list, built the first time the list is touched"""
+        task_indexes = self._cache.setdefault('task_indexes', {})
+        list_id = lst.get("id")
+        if list_id not in task_indexes:
+            task_indexes[list_id] = {task.get("id"): i for i, task in enumerate(lst.get("tasks", []))}
+        return task_indexes[list_id]
+    
+    # Optimized List operations: each list is decoded on first access
     def get_lists(self) -> List[Dict]:
         """Get all lists with optimized caching"""
-        data = self.read_db()
-        return data.get("lists", [])
+        with self._lock:
+            self._load()
+            return [self._resident(list_id) for list_id in list(self._cache['headers'])]
     
     def get_list(self, list_id: str) -> Optional[Dict]:
-        """Get a specific list by ID with optimized search"""
-        # Use cached index if available
-        if 'list_index' in self._cache and self._is_cache_valid():
-            return self._cache['list_index'].get(list_id)
-        
-        # Build index and cache it
-        lists = self.get_lists()
-        list_index = {lst.get("id"): lst for lst in lists}
-        self._cache['list_index'] = list_index
-        self._cache_timestamp = time.time()
-        
-        return list_index.get(list_id)
+        """Get a specific list by ID, decoding only that list"""
+        with self._lock:
+            return self._resident(list_id)
     
+    # Mutations patch the cached lists and their indexes in place, then persist them
     def create_list(self, list_data: Dict) -> Dict:
         """Create a new list"""
-        data = self.read_db()
-        data["lists"].append(list_data)
-        self.write_db(data)
-        return list_data
+        with self._lock:
+            self._load()
+            list_id = list_data.get("id")
+            self._compact(list_data)
+            self._cache['headers'][list_id] = self._header(list_data)
+            self._lists.put(list_id, list_data, self._record_size(list_data), pinned=True)
+            for task in list_data.get("tasks", []):
+                self._index_task(list_data, task)
+            self._persist()
+            return list_data
     
     def update_list(self, list_id: str, list_data: Dict) -> Optional[Dict]:
         """Update an existing list with optimized search"""
-        data = self.read_db()
-        for i, lst in enumerate(data["lists"]):
-            if lst.get("id") == list_id:
-                # Preserve the tasks
-                list_data["tasks"] = lst.get("tasks", [])
-                data["lists"][i] = list_data
-                self.write_db(data)
-                return list_data
-        return None
+        with self._lock:
+            lst = self._resident(list_id)
+            if lst is None:
+                return None
+            # Preserve the tasks
+            list_data["tasks"] = lst.get("tasks", [])
+            header = self._header(list_data)
+            size = self._lists.size(list_id) + self._record_size(header) - self._record_size(self._cache['headers'][list_id])
+            self._cache['headers'][list_id] = header
+            self._lists.put(list_id, list_data, size, pinned=True)
+            for task in list_data["tasks"]:
+                self._index_task(list_data, task)
+            self._persist()
+            return list_data
     
     def delete_list(self, list_id: str) -> bool:
         """Delete a list"""
-        data = self.read_db()
-        initial_count = len(data["lists"])
-        data["lists"] = [lst for lst in data["lists"] if lst.get("id") != list_id]
-        if len(data["lists"]) < initial_count:
-            self.write_db(data)
+        with self._lock:
+            self._load()
+            if list_id not in self._cache['headers']:
+                return False
+            if 'deadline_index' in self._cache:
+                self._cache['deadline_index'].remove_list(list_id)
+            del self._cache['headers'][list_id]
+            self._lists.pop(list_id)
+            self._cache.get('task_indexes', {}).pop(list_id, None)
+            self._persist()
             return True
-        return False
     
     # Optimized Task operations
     def get_tasks(self, list_id: str) -> List[Dict]:
@@ -110,114 +346,95 @@ class OptimizedDatabase:
         return []
     
     def get_task(self, list_id: str, task_id: str) -> Optional[Dict]:
-        """Get a specific task by ID with optimized search"""
-        tasks = self.get_tasks(list_id)
-        # Use dict comprehension for faster lookup
-        task_index = {task.get("id"): task for task in tasks}
-        return task_index.get(task_id)
+        """Get a specific task by ID through the list's task index"""
+        with self._lock:
+            lst = self._resident(list_id)
+            if lst is None:
+                return None
+            position = self._task_index(lst).get(task_id)
+            return None if position is None else lst["tasks"][position]
     
     def add_task(self, list_id: str, task_data: Dict) -> Optional[Dict]:
         """Add a task to a list"""
-        data = self.read_db()
-        for lst in data["lists"]:
-            if lst.get("id") == list_id:
-                if "tasks" not in lst:
-                    lst["tasks"] = []
-                lst["tasks"].append(task_data)
-                self.write_db(data)
-                return task_data
-        return None
+        with self._lock:
+            lst = self._resident(list_id)
+            if lst is None:
+                return None
+            task_data = TaskRecord.of(stamp_deadline(task_data))
+            tasks = lst.setdefault("tasks", [])
+            tasks.append(task_data)
+            self._lists.resize(list_id, self._record_size(task_data) + 1)
+            self._cache['headers'][list_id]["task_count"] = len(tasks)
+            self._task_index(lst)[task_data.get("id")] = len(tasks) - 1
+            self._index_task(lst, task_data)
+            self._persist()
+            return task_data
     
     def update_task(self, list_id: str, task_id: str, task_data: Dict) -> Optional[Dict]:
-        """Update a task with optimized search"""
-        data = self.read_db()
-        for lst in data["lists"]:
-            if lst.get("id") == list_id:
-                for i, task in enumerate(lst.get("tasks", [])):
-                    if task.get("id") == task_id:
-                        lst["tasks"][i] = task_data
-                        self.write_db(data)
-                        return task_data
-        return None
+        """Update a task through the list's task index"""
+        with self._lock:
+            lst = self._resident(list_id)
+            if lst is None:
+                return None
+            position = self._task_index(lst).get(task_id)
+            if position is None:
+                return None
+            task_data = TaskRecord.of(stamp_deadline(task_data))
+            self._lists.resize(list_id, self._record_size(task_data) - self._record_size(lst["tasks"][position]))
+            lst["tasks"][position] = task_data
+            self._index_task(lst, task_data)
+            self._persist()
+            return task_data
     
     def delete_task(self, list_id: str, task_id: str) -> bool:
-        """Delete a task"""
-        data = self.read_db()
-        for lst in data["lists"]:
-            if lst.get("id") == list_id:
-                if "tasks" not in lst:
-                    return False
-                initial_count = len(lst["tasks"])
-                lst["tasks"] = [task for task in lst["tasks"] if task.get("id") != task_id]
-                if len(lst["tasks"]) < initial_count:
-                    self.write_db(data)
-                    return True
-        return False
+        """Delete a task through the list's task index"""
+        with self._lock:
+            lst = self._resident(list_id)
+            if lst is None:
+                return False
+            task_index = self._task_index(lst)
+            position = task_index.pop(task_id, None)
+            if position is None:
+                return False
+            tasks = lst["tasks"]
+            self._lists.resize(list_id, -self._record_size(tasks[position]) - 1)
+            del tasks[position]
+            # Tasks after the deleted one moved up by one
+            for i in range(position, len(tasks)):
+                task_index[tasks[i].get("id")] = i
+            self._cache['headers'][list_id]["task_count"] = len(tasks)
+            self._unindex_task(task_id)
+            self._persist()
+            return True
     
     # OPTIMIZED: Fast query for tasks due this week with indexing
     def get_tasks_due_this_week(self) -> List[Dict]:
-        """Get all tasks due this week across all lists - OPTIMIZED VERSION"""
-        data = self.read_db()
-        due_this_week = []
-        today = datetime.now().date()
-        week_end = today + timedelta(days=7)
-        
-        # Pre-parse dates and filter in one pass
-        for lst in data.get("lists", []):
-            list_id = lst.get("id")
-            list_name = lst.get("name")
-            
-            for task in lst.get("tasks", []):
-                if "deadline" in task:
-                    try:
-                        # Parse deadline once
-                        deadline_date = datetime.fromisoformat(task["deadline"].replace('Z', '+00:00')).date()
-                        
-                        # Check if due within the next 7 days
-                        if today <= deadline_date <= week_end:
-                            # Add list info to the task
-                            task_with_list = task.copy()
-                            task_with_list["list_id"] = list_id
-                            task_with_list["list_name"] = list_name
-                            due_this_week.append(task_with_list)
-                    except (ValueError, AttributeError):
-                        # Skip if date format is invalid
-                        continue
-                        
-        return due_this_week
+        """Get all tasks due this week across all lists - bisect on the deadline index"""
+        with self._lock:
+            deadline_index = self._get_deadline_index()
+            return self._tasks_with_list(deadline_index.range(*this_week_epochs()))
     
     # OPTIMIZED: Fast query for tasks ordered by deadline with better sorting
     def get_tasks_ordered_by_deadline(self, list_id: str) -> List[Dict]:
-        """Get tasks in a list ordered by deadline - OPTIMIZED VERSION"""
-        tasks = self.get_tasks(list_id)
-        
-        # Separate tasks with and without deadlines for better performance
-        tasks_with_deadline = []
-        tasks_without_deadline = []
-        
-        for task in tasks:
-            if "deadline" in task:
-                try:
-                    # Parse deadline once and store as timestamp for faster sorting
-                    deadline_date = datetime.fromisoformat(task["deadline"].replace('Z', '+00:00'))
-                    task_copy = task.copy()
-                    task_copy["_deadline_timestamp"] = deadline_date.timestamp()
-                    tasks_with_deadline.append(task_copy)
-                except (ValueError, AttributeError):
-                    tasks_without_deadline.append(task)
-            else:
-                tasks_without_deadline.append(task)
-        
-        # Sort tasks with deadline by timestamp (faster than datetime comparison)
-        sorted_tasks = sorted(tasks_with_deadline, key=lambda x: x["_deadline_timestamp"])
-        
-        # Remove the temporary timestamp field
-        for task in sorted_tasks:
-            if "_deadline_timestamp" in task:
-                del task["_deadline_timestamp"]
-        
-        # Return sorted tasks followed by tasks without deadlines
-        return sorted_tasks + tasks_without_deadline
+        """Get tasks in a list ordered by deadline - read straight from the sorted index"""
+        with self._lock:
+            deadline_index = self._get_deadline_index()
+            lst = self._resident(list_id)
+            if lst is None:
+                return []
+            task_index = self._task_index(lst)
+            sorted_tasks = [lst["tasks"][task_index[task_id]] for task_id in deadline_index.ordered(list_id)]
+            tasks_without_deadline = [
+                task for task in lst.get("tasks", []) if task.get("id") not in deadline_index
+            ]
+            
+            # Return sorted tasks followed by tasks without deadlines
+            return sorted_tasks + tasks_without_deadline
+    
+    def cache_stats(self) -> Dict[str, int]:
+        """Hit, miss and eviction counters of the list cache plus its current residency"""
+        with self._lock:
+            return self._lists.stats()
     
     # NEW: Fast query for tasks by completion status
     def get_tasks_by_completion(self, list_id: str, completed: bool = False) -> List[Dict]:
@@ -227,27 +444,13 @@ class OptimizedDatabase:
     
     # NEW: Fast query for tasks by date range
     def get_tasks_by_date_range(self, start_date: datetime, end_date: datetime) -> List[Dict]:
-        """Get tasks within a date range - NEW OPTIMIZED QUERY"""
-        data = self.read_db()
-        tasks_in_range = []
-        
-        for lst in data.get("lists", []):
-            list_id = lst.get("id")
-            list_name = lst.get("name")
-            
-            for task in lst.get("tasks", []):
-                if "deadline" in task:
-                    try:
-                        deadline_date = datetime.fromisoformat(task["deadline"].replace('Z', '+00:00'))
-                        if start_date <= deadline_date <= end_date:
-                            task_with_list = task.copy()
-                            task_with_list["list_id"] = list_id
-                            task_with_list["list_name"] = list_name
-                            tasks_in_range.append(task_with_list)
-                    except (ValueError, AttributeError):
-                        continue
-                        
-        return tasks_in_range
+        """Get tasks within a date range - bisect on the deadline index"""
+        with self._lock:
+            deadline_index = self._get_deadline_index()
+            # The end of the range is inclusive
+            return self._tasks_with_list(
+                deadline_index.range(math.ceil(start_date.timestamp()), math.floor(end_date.timestamp()) + 1)
+            )
 
 # Create a singleton instance
 optimized_db = OptimizedDatabase() 
\ No newline at end of file
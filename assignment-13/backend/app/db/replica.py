@@ -0,0 +1,118 @@
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+from app.core.config import settings
+from app.db.database import Database
+from app.db.file_watcher import FileWatcher
+
+logger = logging.getLogger(__name__)
+
+# Seconds between log reads while a request waits for the replica to catch up
+WAIT_INTERVAL = 0.005
+
+
+class ReplicaDatabase(Database):
+    """Read-only follower of a Database, kept current by tailing its write-ahead log
+
+    It loads the primary's snapshot, then applies the log records appended after it in
+    lsn order, reading the log from where it stopped the last time. When the primary's
+    compaction replaces the log, the records it dropped are in the new snapshot, which is
+    loaded instead. The lsn of the applied records is the version the replica serves.
+    """
+
+    def __init__(self, db_file: Optional[Path] = None, wal_file: Optional[Path] = None,
+                 interval: Optional[float] = None):
+        self.db_file = db_file or settings.DATABASE_FILE
+        self.wal_file = Path(wal_file or settings.WAL_FILE)
+        self._init_locks()
+        self._init_vacuum()
+        self._compacting = False
+        self._group_commit = None
+        self._tail_lock = threading.Lock()
+        self._wal_inode: Optional[int] = None
+        self._offset = 0
+        self._init_state(self._read_snapshot())
+        interval = settings.REPLICA_POLL_INTERVAL if interval is None else interval
+        self._watcher = None
+        if interval > 0:
+            self._watcher = FileWatcher(self.wal_file, interval, self.catch_up).start()
+        self.catch_up()
+
+    def _read_snapshot(self) -> Dict[str, Any]:
+        try:
+            return super()._read_snapshot()
+        except FileNotFoundError:
+            # The primary has not written a snapshot yet
+            return {"lists": []}
+
+    def _reload(self):
+        """Start over from the primary's snapshot if it is ahead of the replica"""
+        snapshot = self._read_snapshot()
+        if snapshot.get("lsn", 0) > self._lsn:
+            with self._exclusive():
+                self._init_state(snapshot)
+
+    def catch_up(self) -> int:
+        """Apply the records appended to the log since the last call and return the replica's lsn"""
+        with self._tail_lock:
+            try:
+                f = open(self.wal_file, 'rb')
+            except FileNotFoundError:
+                return self._lsn
+            with f:
+                # Stat the descriptor that is read, not the path, which compaction may replace in between
+                stat = os.fstat(f.fileno())
+                if self._wal_inode is not None and (stat.st_ino != self._wal_inode or stat.st_size < self._offset):
+                    # Compaction replaced the log after folding the records it dropped into the snapshot
+                    self._offset = 0
+                    self._reload()
+                self._wal_inode = stat.st_ino
+                f.seek(self._offset)
+                content = f.read(stat.st_size - self._offset)
+            for line in content.splitlines(keepends=True):
+                if not line.endswith(b"\n"):
+                    # The trailing line is still being appended, read it again next time
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn line from an interrupted append, which the primary ignores as well
+                    logger.warning("Stopped at an unreadable record at offset %d of %s", self._offset, self.wal_file)
+                    break
+                self._offset += len(line)
+                if record["lsn"] <= self._lsn:
+                    continue
+                if record["lsn"] > self._lsn + 1:
+                    # Records before this one were compacted away before the replica read them
+                    self._reload()
+                    if record["lsn"] <= self._lsn:
+                        continue
+                # Under the list's locks like a write, so that the vacuum never works on a stale version
+                with self._locked(record):
+                    self._apply_record(record)
+                self._lsn = record["lsn"]
+            return self._lsn
+
+    def wait_for(self, lsn: int, timeout: float) -> bool:
+        """Catch up until the replica has applied lsn, for at most timeout seconds"""
+        deadline = time.monotonic() + timeout
+        while self.catch_up() < lsn:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(WAIT_INTERVAL, remaining))
+        return True
+
+    def close(self):
+        if self._watcher is not None:
+            self._watcher.stop()
+
+    def _commit(self, record: Dict[str, Any]) -> Any:
+        raise RuntimeError("A replica is read-only, write to the primary")
+
+    def compact(self):
+        """The log belongs to the primary"""
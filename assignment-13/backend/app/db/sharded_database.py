@@ -0,0 +1,205 @@
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Iterator, Optional
+from app.core.config import settings
+from app.db.atomic import atomic_write, validate_durability
+from app.db.deadline_index import stamp_deadline, task_epoch, this_week_epochs
+
+SAFE_LIST_ID = re.compile(r"^[A-Za-z0-9_-]+$")
+
+class ShardedDatabase:
+    """JSON storage with a small manifest and one shard file per list
+
+    The manifest only lists the list IDs in creation order, so task writes read and
+    rewrite a single shard and their cost is bounded by the size of that list.
+    """
+
+    def __init__(self, shard_dir: Optional[Path] = None):
+        self.shard_dir = Path(shard_dir or settings.SHARD_DIR)
+        self.manifest_file = self.shard_dir / "manifest.json"
+        self.durability = validate_durability(settings.DURABILITY)
+        # Guards the manifest's read-modify-writes, the only state shared by all lists
+        self._manifest_lock = threading.Lock()
+        self._ensure_db_exists()
+
+    def _ensure_db_exists(self):
+        """Ensure the shard directory and manifest exist"""
+        os.makedirs(self.shard_dir, exist_ok=True)
+        if not self.manifest_file.exists():
+            self._write_manifest([])
+
+    def _shard_file(self, list_id: str) -> Path:
+        # List IDs become file names, so anything that could escape the directory is rejected
+        if not SAFE_LIST_ID.match(list_id or ""):
+            raise ValueError(f"List ID {list_id!r} cannot be used as a shard name")
+        return self.shard_dir / f"{list_id}.json"
+
+    def _read_manifest(self) -> List[str]:
+        with open(self.manifest_file, 'r') as f:
+            return json.load(f)["lists"]
+
+    def _write_manifest(self, list_ids: List[str]):
+        atomic_write(self.manifest_file, json.dumps({"lists": list_ids}), self.durability)
+
+    def _read_shard(self, list_id: str) -> Optional[Dict]:
+        if not SAFE_LIST_ID.match(list_id or ""):
+            return None
+        try:
+            with open(self._shard_file(list_id), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_shard(self, lst: Dict):
+        atomic_write(self._shard_file(lst["id"]), json.dumps(lst, indent=2), self.durability)
+
+    def read_db(self) -> Dict[str, List[Dict]]:
+        """Read the entire database in the single-file document layout"""
+        return {"lists": self.get_lists()}
+
+    def write_db(self, data: Dict[str, List[Dict]]):
+        """Replace the whole database with a single-file layout document"""
+        with self._manifest_lock:
+            for list_id in self._read_manifest():
+                self._shard_file(list_id).unlink(missing_ok=True)
+            for lst in data.get("lists", []):
+                self._write_shard(lst)
+            self._write_manifest([lst["id"] for lst in data.get("lists", [])])
+
+    # List operations
+    def iter_lists(self) -> Iterator[Dict]:
+        """Stream lists one shard at a time"""
+        for list_id in self._read_manifest():
+            lst = self._read_shard(list_id)
+            if lst is not None:
+                yield lst
+
+    def get_lists(self) -> List[Dict]:
+        """Get all lists"""
+        return list(self.iter_lists())
+
+    def get_list(self, list_id: str) -> Optional[Dict]:
+        """Get a specific list by ID"""
+        return self._read_shard(list_id)
+
+    def create_list(self, list_data: Dict) -> Dict:
+        """Create a new list"""
+        list_data.setdefault("tasks", [])
+        # The shard is written first so that the manifest never names a missing shard
+        self._write_shard(list_data)
+        with self._manifest_lock:
+            self._write_manifest(self._read_manifest() + [list_data["id"]])
+        return list_data
+
+    def update_list(self, list_id: str, list_data: Dict) -> Optional[Dict]:
+        """Update an existing list"""
+        lst = self._read_shard(list_id)
+        if lst is None:
+            return None
+        # Preserve the tasks
+        list_data["tasks"] = lst.get("tasks", [])
+        self._write_shard(list_data)
+        return list_data
+
+    def replace_list(self, list_data: Dict) -> Optional[Dict]:
+        """Write a whole list, tasks included, over its existing shard without reading it"""
+        if not self._shard_file(list_data["id"]).exists():
+            return None
+        for task in list_data.setdefault("tasks", []):
+            stamp_deadline(task)
+        self._write_shard(list_data)
+        return list_data
+
+    def delete_list(self, list_id: str) -> bool:
+        """Delete a list"""
+        with self._manifest_lock:
+            list_ids = self._read_manifest()
+            if list_id not in list_ids:
+                return False
+            list_ids.remove(list_id)
+            self._write_manifest(list_ids)
+        self._shard_file(list_id).unlink(missing_ok=True)
+        return True
+
+    # Task operations
+    def get_tasks(self, list_id: str) -> List[Dict]:
+        """Get all tasks in a list"""
+        lst = self._read_shard(list_id)
+        if lst:
+            return lst.get("tasks", [])
+        return []
+
+    def get_task(self, list_id: str, task_id: str) -> Optional[Dict]:
+        """Get a specific task by ID"""
+        for task in self.get_tasks(list_id):
+            if task.get("id") == task_id:
+                return task
+        return None
+
+    def add_task(self, list_id: str, task_data: Dict) -> Optional[Dict]:
+        """Add a task to a list"""
+        lst = self._read_shard(list_id)
+        if lst is None:
+            return None
+        lst.setdefault("tasks", []).append(stamp_deadline(task_data))
+        self._write_shard(lst)
+        return task_data
+
+    def update_task(self, list_id: str, task_id: str, task_data: Dict) -> Optional[Dict]:
+        """Update a task"""
+        lst = self._read_shard(list_id)
+        if lst is None:
+            return None
+        for i, task in enumerate(lst.get("tasks", [])):
+            if task.get("id") == task_id:
+                lst["tasks"][i] = stamp_deadline(task_data)
+                self._write_shard(lst)
+                return task_data
+        return None
+
+    def delete_task(self, list_id: str, task_id: str) -> bool:
+        """Delete a task"""
+        lst = self._read_shard(list_id)
+        if lst is None or "tasks" not in lst:
+            return False
+        initial_count = len(lst["tasks"])
+        lst["tasks"] = [task for task in lst["tasks"] if task.get("id") != task_id]
+        if len(lst["tasks"]) < initial_count:
+            self._write_shard(lst)
+            return True
+        return False
+
+    def get_tasks_due_this_week(self) -> List[Dict]:
+        """Get all tasks due this week across all lists"""
+        due_this_week = []
+        start_epoch, end_epoch = this_week_epochs()
+
+        for lst in self.iter_lists():
+            for task in lst.get("tasks", []):
+                epoch = task_epoch(task)
+                if epoch is not None and start_epoch <= epoch < end_epoch:
+                    task_with_list = task.copy()
+                    task_with_list["list_id"] = lst.get("id")
+                    task_with_list["list_name"] = lst.get("name")
+                    due_this_week.append(task_with_list)
+
+        return due_this_week
+
+    def get_tasks_ordered_by_deadline(self, list_id: str) -> List[Dict]:
+        """Get tasks in a list ordered by deadline"""
+        tasks_with_deadline = []
+        tasks_without_deadline = []
+
+        for task in self.get_tasks(list_id):
+            epoch = task_epoch(task)
+            if epoch is None:
+                tasks_without_deadline.append(task)
+            else:
+                tasks_with_deadline.append((epoch, task))
+
+        # Sort tasks with deadline, followed by tasks without deadlines
+        tasks_with_deadline.sort(key=lambda item: item[0])
+        return [task for _, task in tasks_with_deadline] + tasks_without_deadline
@@ -0,0 +1,373 @@
+"""Read-only database snapshot shared by the processes of a worker pool
+
+With uvicorn --workers N every process would otherwise load and hold its own copy of the
+database. Instead one primary process owns the Database and publishes its state as a
+mapped snapshot (see app/db/snapshot.py) in SHARED_SNAPSHOT_DIR, next to a version counter:
+
+    version              magic and the number of the current snapshot, mapped by every reader
+    snapshot-<n>.bin     snapshot number n, replaced atomically and never changed in place
+
+Workers use the shared_snapshot backend. They map the current snapshot, decode records
+straight from the shared pages, and only map a new file when the counter moves. Their
+writes are forwarded to the primary over a socket authenticated with the key in the
+directory's authkey file. The primary replies once a snapshot with the write's effect is
+published, so a worker reads its own writes; writes that arrive while a snapshot is built
+are published together in the next one. Run the primary next to the server, for example:
+
+    python -m app.db.shared_snapshot &
+    STORAGE_BACKEND=shared_snapshot uvicorn app.main:app --workers 4
+
+Put SHARED_SNAPSHOT_DIR on a tmpfs such as /dev/shm so that the snapshot never hits disk.
+"""
+import argparse
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.db.atomic import atomic_write
+from app.db.deadline_index import this_week_epochs
+from app.db.snapshot import MappedSnapshot, SnapshotBuilder
+from app.db.versioned_state import ListVersion, StateVersion
+
+MAGIC = b"TDSHARED"
+# magic, current snapshot number
+COUNTER = struct.Struct("<8sQ")
+SOCKET_NAME = "primary.sock"
+AUTHKEY_NAME = "authkey"
+
+logger = logging.getLogger(__name__)
+WRITE_METHODS = ("create_list", "update_list", "delete_list", "add_task", "update_task", "delete_task")
+
+
+def _counter_file(directory: Path) -> Path:
+    return directory / "version"
+
+
+def _snapshot_file(directory: Path, version: int) -> Path:
+    return directory / f"snapshot-{version}.bin"
+
+
+def _read_authkey(directory: Path) -> bytes:
+    with open(directory / AUTHKEY_NAME, 'rb') as f:
+        return f.read()
+
+
+def _write_authkey(directory: Path) -> bytes:
+    """A new random key that only the owner of the directory can read"""
+    authkey = os.urandom(32)
+    path = directory / AUTHKEY_NAME
+    path.unlink(missing_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(authkey)
+    return authkey
+
+
+class SharedSnapshotPublisher:
+    """Publish database versions for the readers of a directory"""
+
+    def __init__(self, directory: Optional[Path] = None):
+        self.directory = Path(directory or settings.SHARED_SNAPSHOT_DIR)
+        os.makedirs(self.directory, exist_ok=True)
+        counter_file = _counter_file(self.directory)
+        try:
+            with open(counter_file, 'rb') as f:
+                magic, version = COUNTER.unpack(f.read(COUNTER.size))
+        except (FileNotFoundError, struct.error):
+            magic, version = None, 0
+        if magic != MAGIC:
+            version = 0
+            atomic_write(counter_file, COUNTER.pack(MAGIC, version), "none")
+        # Updated in place from now on, because readers keep the file mapped. A new primary
+        # continues the numbering, so that no reader mistakes its snapshot for the one it has
+        with open(counter_file, 'r+b') as f:
+            self._counter = mmap.mmap(f.fileno(), COUNTER.size)
+        self.version = version
+        self._lock = threading.Lock()
+        self._state: Optional[StateVersion] = None
+        self._mapped: Optional[MappedSnapshot] = None
+
+    def publish(self, db) -> int:
+        """Publish the current version of a database and return its number"""
+        with self._lock:
+            # Taken under the lock, so that a later number never carries an older version
+            state = db.snapshot()
+            builder = SnapshotBuilder()
+            for list_id, version in state.lists.items():
+                # Versions share every list they did not change, and those are copied still encoded
+                if self._state is not None and self._state.lists.get(list_id) is version:
+                    builder.copy_list(self._mapped, list_id)
+                else:
+                    builder.add_list(version.data)
+            number = self.version + 1
+            path = _snapshot_file(self.directory, number)
+            atomic_write(path, builder.build(state.metadata), "none")
+            self._mapped = MappedSnapshot.open(path)
+            self._state = state
+            # Readers see the new number only once its file is complete
+            COUNTER.pack_into(self._counter, 0, MAGIC, number)
+            self.version = number
+            # The previous file stays for readers that read the old number but have not mapped it yet;
+            # mappings of removed files stay valid
+            _snapshot_file(self.directory, number - 2).unlink(missing_ok=True)
+            return number
+
+    def close(self):
+        self._counter.close()
+
+
+class SharedSnapshotReader:
+    """The current published snapshot, mapped again only when the version counter changes"""
+
+    def __init__(self, directory: Optional[Path] = None):
+        self.directory = Path(directory or settings.SHARED_SNAPSHOT_DIR)
+        self._counter: Optional[mmap.mmap] = None
+        self._current: Tuple[int, Optional[MappedSnapshot]] = (0, None)
+
+    @property
+    def version(self) -> int:
+        """Number of the latest published snapshot, 0 before the primary published one"""
+        if self._counter is None:
+            try:
+                with open(_counter_file(self.directory), 'rb') as f:
+                    self._counter = mmap.mmap(f.fileno(), COUNTER.size, access=mmap.ACCESS_READ)
+            except (FileNotFoundError, ValueError):
+                return 0
+        magic, version = COUNTER.unpack_from(self._counter)
+        return version if magic == MAGIC else 0
+
+    def current(self) -> MappedSnapshot:
+        """The latest published snapshot"""
+        version, snapshot = self._current
+        latest = self.version
+        while latest != version or snapshot is None:
+            if latest == 0:
+                raise RuntimeError(
+                    f"No database snapshot has been published in {self.directory}, "
+                    "start the primary with python -m app.db.shared_snapshot"
+                )
+            try:
+                snapshot = MappedSnapshot.open(_snapshot_file(self.directory, latest))
+            except FileNotFoundError:
+                # Replaced between reading the counter and opening the file, so read it again
+                latest = self.version
+                continue
+            version = latest
+            self._current = (version, snapshot)
+        return snapshot
+
+
+class SharedSnapshotPrimary:
+    """Owner of the database: serves the workers' writes and publishes their effect
+
+    A background thread publishes the writes applied so far, at most once per
+    SHARED_SNAPSHOT_PUBLISH_INTERVAL_MS, so a snapshot build is shared by every write that
+    arrived while the previous one was built. Each write is answered once it is published.
+    """
+
+    def __init__(self, db, directory: Optional[Path] = None, interval_ms: Optional[float] = None):
+        self.db = db
+        self.publisher = SharedSnapshotPublisher(directory)
+        if interval_ms is None:
+            interval_ms = settings.SHARED_SNAPSHOT_PUBLISH_INTERVAL_MS
+        self.interval = interval_ms / 1000
+        self._changed = threading.Condition()
+        # Writes applied to the database, and how many of them the published snapshot holds
+        self._written = 0
+        self._published = 0
+        self._closed = False
+        self.listener = Listener(
+            str(self.publisher.directory / SOCKET_NAME), family="AF_UNIX",
+            authkey=_write_authkey(self.publisher.directory),
+        )
+
+    def serve_forever(self):
+        self.publisher.publish(self.db)
+        threading.Thread(target=self._publish_writes, daemon=True).start()
+        while True:
+            try:
+                conn = self.listener.accept()
+            except AuthenticationError:
+                logger.warning("Rejected a connection without the key of %s", self.publisher.directory)
+                continue
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _publish_writes(self):
+        while True:
+            with self._changed:
+                while self._written == self._published and not self._closed:
+                    self._changed.wait()
+                if self._closed:
+                    return
+                written = self._written
+            # Every write counted so far has returned, so the snapshot taken now holds it
+            try:
+                self.publisher.publish(self.db)
+            except Exception:
+                # The writers keep waiting, and the next attempt publishes their writes
+                logger.exception("Publishing a snapshot in %s failed", self.publisher.directory)
+                time.sleep(self.interval)
+                continue
+            with self._changed:
+                self._published = written
+                self._changed.notify_all()
+            time.sleep(self.interval)
+
+    def _wait_published(self) -> int:
+        """Count a write that has been applied and wait until a published snapshot holds it"""
+        with self._changed:
+            self._written += 1
+            written = self._written
+            self._changed.notify_all()
+            while self._published < written and not self._closed:
+                self._changed.wait()
+            return self.publisher.version
+
+    def _serve(self, conn: Connection):
+        with conn:
+            while True:
+                try:
+                    method, args = conn.recv()
+                except EOFError:
+                    return
+                try:
+                    if method not in WRITE_METHODS:
+                        raise ValueError(f"'{method}' is not a write operation")
+                    result = getattr(self.db, method)(*args)
+                except Exception as e:
+                    conn.send(("error", e))
+                    continue
+                conn.send(("ok", result, self._wait_published()))
+
+    def close(self):
+        with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+        self.listener.close()
+        self.publisher.close()
+
+
+class SharedSnapshotDatabase:
+    """Storage backend of a worker process: reads the shared snapshot, forwards writes to the primary
+
+    Reads decode records from the shared mapping on every call instead of keeping them
+    resident, which is what keeps a worker's memory independent of the dataset.
+    """
+
+    def __init__(self, directory: Optional[Path] = None):
+        self.reader = SharedSnapshotReader(directory)
+        self._connections = threading.local()
+
+    def _call(self, method: str, *args) -> Any:
+        """Run a write on the primary; the snapshot with its effect is published when this returns"""
+        conn = getattr(self._connections, "conn", None)
+        if conn is None:
+            conn = self._connections.conn = Client(
+                str(self.reader.directory / SOCKET_NAME), family="AF_UNIX",
+                authkey=_read_authkey(self.reader.directory),
+            )
+        try:
+            conn.send((method, args))
+            reply = conn.recv()
+        except (EOFError, OSError):
+            # The primary restarted; the next call connects again
+            self._connections.conn = None
+            raise
+        if reply[0] == "error":
+            raise reply[1]
+        return reply[1]
+
+    # List operations
+    def get_lists(self) -> List[Dict]:
+        """Get all lists"""
+        return list(self.reader.current().iter_lists())
+
+    def get_list(self, list_id: str) -> Optional[Dict]:
+        """Get a specific list by ID"""
+        return self.reader.current().get_list(list_id)
+
+    def create_list(self, list_data: Dict) -> Dict:
+        """Create a new list"""
+        return self._call("create_list", list_data)
+
+    def update_list(self, list_id: str, list_data: Dict) -> Optional[Dict]:
+        """Update an existing list"""
+        return self._call("update_list", list_id, list_data)
+
+    def delete_list(self, list_id: str) -> bool:
+        """Delete a list"""
+        return self._call("delete_list", list_id)
+
+    # Task operations
+    def get_tasks(self, list_id: str) -> List[Dict]:
+        """Get all tasks in a list"""
+        lst = self.get_list(list_id)
+        return [] if lst is None else lst.get("tasks", [])
+
+    def get_task(self, list_id: str, task_id: str) -> Optional[Dict]:
+        """Get a specific task by ID"""
+        found = self.reader.current().get_task(task_id)
+        if found is not None and found[0] == list_id:
+            return found[1]
+        return None
+
+    def add_task(self, list_id: str, task_data: Dict) -> Optional[Dict]:
+        """Add a task to a list"""
+        return self._call("add_task", list_id, task_data)
+
+    def update_task(self, list_id: str, task_id: str, task_data: Dict) -> Optional[Dict]:
+        """Update a task"""
+        return self._call("update_task", list_id, task_id, task_data)
+
+    def delete_task(self, list_id: str, task_id: str) -> bool:
+        """Delete a task"""
+        return self._call("delete_task", list_id, task_id)
+
+    def get_tasks_due_this_week(self) -> List[Dict]:
+        """Get all tasks due this week across all lists"""
+        start_epoch, end_epoch = this_week_epochs()
+        due = []
+        # One list decoded at a time, ordered like StateVersion.get_tasks_due_between()
+        for lst in self.reader.current().iter_lists():
+            version = ListVersion.of(lst)
+            for epoch, task_id in version.due(start_epoch, end_epoch):
+                task_with_list = dict(version.task(task_id))
+                task_with_list["list_id"] = lst.get("id")
+                task_with_list["list_name"] = lst.get("name")
+                due.append((epoch, lst.get("id"), task_id, task_with_list))
+        return [task for *_, task in sorted(due, key=lambda entry: entry[:3])]
+
+    def get_tasks_ordered_by_deadline(self, list_id: str) -> List[Dict]:
+        """Get tasks in a list ordered by deadline"""
+        lst = self.get_list(list_id)
+        return [] if lst is None else ListVersion.of(lst).ordered_tasks()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Own the database and publish it to worker processes")
+    parser.add_argument("--dir", default=str(settings.SHARED_SNAPSHOT_DIR), help="shared snapshot directory")
+    args = parser.parse_args(argv)
+
+    from app.db.database import db
+    directory = Path(args.dir)
+    # A socket left behind by a primary that did not shut down cleanly
+    (directory / SOCKET_NAME).unlink(missing_ok=True)
+    primary = SharedSnapshotPrimary(db, directory)
+    print(f"Publishing {settings.DATABASE_FILE} in {directory}")
+    try:
+        primary.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        primary.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""Binary snapshot with a fixed-layout offset index, read through mmap
+
+Layout, all integers little-endian:
+
+    header       magic, list count, task count, metadata offset and length
+    list table   one LIST_ENTRY per list, sorted by id
+    order table  list table positions in document order
+    task table   one TASK_ENTRY per task, sorted by id
+    data         compact JSON records: list metadata without tasks, then the list's tasks
+                 as one JSON array whose elements are the individual task records
+
+Opening a snapshot only maps the file and checks the header. Lookups binary-search the
+fixed-size tables and decode just the records they return.
+"""
+import mmap
+import struct
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+MAGIC = b"TDSNAP01"
+ID_SIZE = 64
+# magic, list count, task count, metadata offset, metadata length
+HEADER = struct.Struct("<8sIIQI")
+# id, list record offset and length, tasks array offset and length, task count
+LIST_ENTRY = struct.Struct(f"<{ID_SIZE}sQIQII")
+# id, task record offset and length, list table position
+TASK_ENTRY = struct.Struct(f"<{ID_SIZE}sQII")
+ORDER_ENTRY = struct.Struct("<I")
+
+
+def _pack_id(record_id: Any) -> bytes:
+    raw = str(record_id).encode("utf-8")
+    if len(raw) > ID_SIZE:
+        raise ValueError(f"ID '{record_id}' is longer than the {ID_SIZE} bytes a snapshot can index")
+    return raw.ljust(ID_SIZE, b"\0")
+
+
+def _unpack_id(raw: bytes) -> str:
+    return raw.rstrip(b"\0").decode("utf-8")
+
+
+def is_snapshot(content: bytes) -> bool:
+    """Whether content starts like a snapshot written by encode_snapshot()"""
+    return content[:len(MAGIC)] == MAGIC
+
+
+class MappedSnapshot:
+    """Read-only view of a snapshot that decodes records on access"""
+
+    def __init__(self, buffer: Union[bytes, mmap.mmap]):
+        if len(buffer) < HEADER.size or not is_snapshot(buffer[:len(MAGIC)]):
+            raise ValueError("Not a database snapshot")
+        self._buffer = buffer
+        _, self.list_count, self.task_count, self._metadata_offset, self._metadata_length = HEADER.unpack_from(buffer)
+        self._list_table = HEADER.size
+        self._order_table = self._list_table + self.list_count * LIST_ENTRY.size
+        self._task_table = self._order_table + self.list_count * ORDER_ENTRY.size
+        self._tasks_by_list = None
+
+    @classmethod
+    def open(cls, path: Path) -> "MappedSnapshot":
+        """Map a snapshot file; the mapping stays valid after the file is atomically replaced"""
+        with open(path, 'rb') as f:
+            return cls.map(f)
+
+    @classmethod
+    def map(cls, f: BinaryIO) -> "MappedSnapshot":
+        """Map an already open snapshot file"""
+        return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def _decode(self, offset: int, length: int) -> Any:
+        # Imported here because app.db.codecs registers this module as its mmap codec
+        from app.db.codecs import decode
+        return decode(self._buffer[offset:offset + length])
+
+    def _raw_id(self, table: int, entry: struct.Struct, position: int) -> bytes:
+        start = table + position * entry.size
+        return self._buffer[start:start + ID_SIZE]
+
+    def _id_at(self, table: int, entry: struct.Struct, position: int) -> str:
+        return _unpack_id(self._raw_id(table, entry, position))
+
+    def _find(self, table: int, count: int, entry: struct.Struct, record_id: str) -> Optional[int]:
+        """Binary search a table sorted by id and return the entry's position"""
+        try:
+            key = _pack_id(record_id)
+        except ValueError:
+            return None
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._raw_id(table, entry, mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < count and self._raw_id(table, entry, lo) == key:
+            return lo
+        return None
+
+    def _list_entry(self, position: int) -> Tuple[bytes, int, int, int, int, int]:
+        return LIST_ENTRY.unpack_from(self._buffer, self._list_table + position * LIST_ENTRY.size)
+
+    def _ordered_positions(self) -> Iterator[int]:
+        """List table positions in document order"""
+        for i in range(self.list_count):
+            yield ORDER_ENTRY.unpack_from(self._buffer, self._order_table + i * ORDER_ENTRY.size)[0]
+
+    def _list_at(self, position: int) -> Dict:
+        _, offset, length, tasks_offset, tasks_length, _ = self._list_entry(position)
+        lst = self._decode(offset, length)
+        lst["tasks"] = self._decode(tasks_offset, tasks_length)
+        return lst
+
+    def metadata(self) -> Dict[str, Any]:
+        """Top-level document fields other than the lists"""
+        return self._decode(self._metadata_offset, self._metadata_length)
+
+    def list_ids(self) -> List[str]:
+        """List IDs in document order"""
+        return [self._id_at(self._list_table, LIST_ENTRY, position) for position in self._ordered_positions()]
+
+    def list_headers(self) -> List[Dict]:
+        """Every list without its tasks, plus a task_count, in document order"""
+        headers = []
+        for position in self._ordered_positions():
+            _, offset, length, _, _, task_count = self._list_entry(position)
+            header = self._decode(offset, length)
+            header["task_count"] = task_count
+            headers.append(header)
+        return headers
+
+    def get_list(self, list_id: str) -> Optional[Dict]:
+        """Decode one list with its tasks"""
+        position = self._find(self._list_table, self.list_count, LIST_ENTRY, list_id)
+        return None if position is None else self._list_at(position)
+
+    def encoded_size(self, list_id: str) -> int:
+        """Bytes taken by a list's records, a cheap estimate of its decoded size"""
+        position = self._find(self._list_table, self.list_count, LIST_ENTRY, list_id)
+        if position is None:
+            return 0
+        _, _, length, _, tasks_length, _ = self._list_entry(position)
+        return length + tasks_length
+
+    def get_task(self, task_id: str) -> Optional[Tuple[str, Dict]]:
+        """Decode one task and return it with the ID of its list"""
+        position = self._find(self._task_table, self.task_count, TASK_ENTRY, task_id)
+        if position is None:
+            return None
+        _, offset, length, list_position = TASK_ENTRY.unpack_from(
+            self._buffer, self._task_table + position * TASK_ENTRY.size
+        )
+        return self._id_at(self._list_table, LIST_ENTRY, list_position), self._decode(offset, length)
+
+    def iter_lists(self) -> Iterator[Dict]:
+        """Decode every list in document order"""
+        for position in self._ordered_positions():
+            yield self._list_at(position)
+
+    def document(self) -> Dict[str, Any]:
+        """Decode the whole database document"""
+        data = self.metadata()
+        data["lists"] = list(self.iter_lists())
+        return data
+
+    def raw_list(self, list_id: str) -> Tuple[bytes, bytes, List[Tuple[bytes, int, int]]]:
+        """Encoded records of a list for copying into a new snapshot without decoding them
+
+        Returns the list record, the tasks array and (id, offset in the array, length) per task.
+        """
+        position = self._find(self._list_table, self.list_count, LIST_ENTRY, list_id)
+        if position is None:
+            raise KeyError(list_id)
+        _, offset, length, tasks_offset, tasks_length, _ = self._list_entry(position)
+        if self._tasks_by_list is None:
+            # One pass over the task table, done once per mapped snapshot
+            self._tasks_by_list = {}
+            for task_id, task_offset, task_length, list_position in TASK_ENTRY.iter_unpack(
+                self._buffer[self._task_table:self._task_table + self.task_count * TASK_ENTRY.size]
+            ):
+                self._tasks_by_list.setdefault(list_position, []).append((task_id, task_offset, task_length))
+        tasks = [
+            (task_id, task_offset - tasks_offset, task_length)
+            for task_id, task_offset, task_length in self._tasks_by_list.get(position, [])
+        ]
+        return (
+            self._buffer[offset:offset + length],
+            self._buffer[tasks_offset:tasks_offset + tasks_length],
+            tasks,
+        )
+
+
+class SnapshotBuilder:
+    """Assemble a snapshot list by list, from decoded lists or from another snapshot's records"""
+
+    def __init__(self):
+        # Offsets are relative to the data section until build() knows the size of the tables
+        self._body = bytearray()
+        self._list_rows = []
+        self._task_rows = []
+
+    def _append(self, record: bytes) -> Tuple[int, int]:
+        offset = len(self._body)
+        self._body.extend(record)
+        return offset, len(record)
+
+    def add_list(self, lst: Dict):
+        """Encode a decoded list and its tasks"""
+        from app.db.codecs import encode
+        document_position = len(self._list_rows)
+        record = self._append(encode({key: value for key, value in lst.items() if key != "tasks"}, "json_compact"))
+        tasks = lst.get("tasks", [])
+        tasks_start = len(self._body)
+        self._body.extend(b"[")
+        for i, task in enumerate(tasks):
+            if i:
+                self._body.extend(b",")
+            task_record = self._append(encode(task, "json_compact"))
+            self._task_rows.append((_pack_id(task.get("id")), *task_record, document_position))
+        self._body.extend(b"]")
+        self._list_rows.append(
+            (_pack_id(lst.get("id")), *record, tasks_start, len(self._body) - tasks_start, len(tasks))
+        )
+
+    def copy_list(self, snapshot: MappedSnapshot, list_id: str):
+        """Copy a list's encoded records from another snapshot without decoding them"""
+        document_position = len(self._list_rows)
+        record, tasks_array, tasks = snapshot.raw_list(list_id)
+        record = self._append(record)
+        tasks_start, tasks_length = self._append(tasks_array)
+        for task_id, offset, length in tasks:
+            self._task_rows.append((task_id, tasks_start + offset, length, document_position))
+        self._list_rows.append((_pack_id(list_id), *record, tasks_start, tasks_length, len(tasks)))
+
+    def build(self, metadata: Dict[str, Any]) -> bytes:
+        """Lay out the tables in front of the data section"""
+        from app.db.codecs import encode
+        metadata_offset, metadata_length = self._append(encode(metadata, "json_compact"))
+        data_start = (
+            HEADER.size
+            + len(self._list_rows) * (LIST_ENTRY.size + ORDER_ENTRY.size)
+            + len(self._task_rows) * TASK_ENTRY.size
+        )
+
+        # Tables are sorted by id for binary search; the order table restores document order
+        sorted_positions = sorted(range(len(self._list_rows)), key=lambda position: self._list_rows[position][0])
+        table_position = {document_position: i for i, document_position in enumerate(sorted_positions)}
+
+        out = bytearray(HEADER.pack(
+            MAGIC, len(self._list_rows), len(self._task_rows), data_start + metadata_offset, metadata_length
+        ))
+        for document_position in sorted_positions:
+            list_id, offset, length, tasks_offset, tasks_length, task_count = self._list_rows[document_position]
+            out.extend(LIST_ENTRY.pack(
+                list_id, data_start + offset, length, data_start + tasks_offset, tasks_length, task_count
+            ))
+        for document_position in range(len(self._list_rows)):
+            out.extend(ORDER_ENTRY.pack(table_position[document_position]))
+        for task_id, offset, length, document_position in sorted(self._task_rows):
+            out.extend(TASK_ENTRY.pack(task_id, data_start + offset, length, table_position[document_position]))
+        out.extend(self._body)
+        return bytes(out)
+
+
+def encode_snapshot(data: Dict[str, Any]) -> bytes:
+    """Serialize a database document into the snapshot layout"""
+    builder = SnapshotBuilder()
+    for lst in data.get("lists", []):
+        builder.add_list(lst)
+    return builder.build({key: value for key, value in data.items() if key != "lists"})
@@ -0,0 +1,261 @@
+import math
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.db.deadline_index import deadline_epoch, stamp_deadline, this_week_epochs
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lists (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    description TEXT
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    list_id TEXT NOT NULL REFERENCES lists(id) ON DELETE CASCADE,
+    title TEXT NOT NULL,
+    description TEXT,
+    completed INTEGER NOT NULL DEFAULT 0,
+    deadline TEXT,
+    created_at TEXT,
+    deadline_epoch INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_list_id ON tasks(list_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_list_id_completed ON tasks(list_id, completed);
+"""
+
+TASK_COLUMNS = "id, list_id, title, description, completed, deadline, created_at, deadline_epoch"
+
+class SqliteDatabase:
+    def __init__(self, db_file: Optional[Path] = None):
+        self.db_file = str(db_file or settings.SQLITE_FILE)
+        self._local = threading.local()
+        self._ensure_db_exists()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the connection owned by the current thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.execute("PRAGMA journal_mode = WAL")
+            self._local.conn = conn
+        return conn
+
+    def _ensure_db_exists(self):
+        """Ensure the database file exists with the tables and indexes"""
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+            self._add_deadline_epochs(conn)
+
+    @staticmethod
+    def _add_deadline_epochs(conn: sqlite3.Connection):
+        """Add and fill the deadline_epoch column of a database created before it existed"""
+        if "deadline_epoch" not in {row["name"] for row in conn.execute("PRAGMA table_info(tasks)")}:
+            conn.execute("ALTER TABLE tasks ADD COLUMN deadline_epoch INTEGER")
+            rows = conn.execute("SELECT seq, deadline FROM tasks WHERE deadline IS NOT NULL").fetchall()
+            conn.executemany(
+                "UPDATE tasks SET deadline_epoch = ? WHERE seq = ?",
+                [(deadline_epoch(row["deadline"]), row["seq"]) for row in rows],
+            )
+        # Deadline queries compare epochs, so the old index on the ISO strings is unused
+        conn.execute("DROP INDEX IF EXISTS idx_tasks_deadline")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_deadline_epoch ON tasks(deadline_epoch)")
+
+    @staticmethod
+    def _list_to_dict(row: sqlite3.Row) -> Dict:
+        return {"id": row["id"], "name": row["name"], "description": row["description"]}
+
+    @staticmethod
+    def _task_to_dict(row: sqlite3.Row) -> Dict:
+        return {
+            "id": row["id"],
+            "title": row["title"],
+            "description": row["description"],
+            "completed": bool(row["completed"]),
+            "deadline": row["deadline"],
+            "deadline_epoch": row["deadline_epoch"],
+            "created_at": row["created_at"],
+        }
+
+    def read_db(self) -> Dict[str, List[Dict]]:
+        """Read the entire database in the JSON document layout"""
+        return {"lists": self.get_lists()}
+
+    def write_db(self, data: Dict[str, List[Dict]]):
+        """Replace the whole database with a JSON-layout document"""
+        with self._connection() as conn:
+            conn.execute("DELETE FROM lists")
+            for lst in data.get("lists", []):
+                self._insert_list(conn, lst)
+                for task in lst.get("tasks", []):
+                    self._insert_task(conn, lst["id"], task)
+
+    @staticmethod
+    def _insert_list(conn: sqlite3.Connection, list_data: Dict):
+        conn.execute(
+            "INSERT INTO lists (id, name, description) VALUES (?, ?, ?)",
+            (list_data["id"], list_data.get("name"), list_data.get("description")),
+        )
+
+    @staticmethod
+    def _insert_task(conn: sqlite3.Connection, list_id: str, task_data: Dict):
+        stamp_deadline(task_data)
+        conn.execute(
+            f"INSERT INTO tasks ({TASK_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                task_data["id"],
+                list_id,
+                task_data.get("title"),
+                task_data.get("description"),
+                int(bool(task_data.get("completed", False))),
+                task_data.get("deadline"),
+                task_data.get("created_at"),
+                task_data["deadline_epoch"],
+            ),
+        )
+
+    # List operations
+    def get_lists(self) -> List[Dict]:
+        """Get all lists"""
+        conn = self._connection()
+        lists = [self._list_to_dict(row) for row in conn.execute("SELECT * FROM lists ORDER BY seq")]
+        tasks_by_list: Dict[str, List[Dict]] = {lst["id"]: [] for lst in lists}
+        for row in conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks ORDER BY seq"):
+            tasks_by_list[row["list_id"]].append(self._task_to_dict(row))
+        for lst in lists:
+            lst["tasks"] = tasks_by_list[lst["id"]]
+        return lists
+
+    def get_list(self, list_id: str) -> Optional[Dict]:
+        """Get a specific list by ID"""
+        row = self._connection().execute("SELECT * FROM lists WHERE id = ?", (list_id,)).fetchone()
+        if row is None:
+            return None
+        lst = self._list_to_dict(row)
+        lst["tasks"] = self.get_tasks(list_id)
+        return lst
+
+    def create_list(self, list_data: Dict) -> Dict:
+        """Create a new list"""
+        with self._connection() as conn:
+            self._insert_list(conn, list_data)
+        return list_data
+
+    def update_list(self, list_id: str, list_data: Dict) -> Optional[Dict]:
+        """Update an existing list"""
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE lists SET name = ?, description = ? WHERE id = ?",
+                (list_data.get("name"), list_data.get("description"), list_id),
+            )
+        if cursor.rowcount == 0:
+            return None
+        # Preserve the tasks
+        list_data["tasks"] = self.get_tasks(list_id)
+        return list_data
+
+    def delete_list(self, list_id: str) -> bool:
+        """Delete a list"""
+        with self._connection() as conn:
+            cursor = conn.execute("DELETE FROM lists WHERE id = ?", (list_id,))
+        return cursor.rowcount > 0
+
+    # Task operations
+    def get_tasks(self, list_id: str) -> List[Dict]:
+        """Get all tasks in a list"""
+        rows = self._connection().execute(
+            f"SELECT {TASK_COLUMNS} FROM tasks WHERE list_id = ? ORDER BY seq", (list_id,)
+        )
+        return [self._task_to_dict(row) for row in rows]
+
+    def get_task(self, list_id: str, task_id: str) -> Optional[Dict]:
+        """Get a specific task by ID"""
+        row = self._connection().execute(
+            f"SELECT {TASK_COLUMNS} FROM tasks WHERE id = ? AND list_id = ?", (task_id, list_id)
+        ).fetchone()
+        return self._task_to_dict(row) if row else None
+
+    def add_task(self, list_id: str, task_data: Dict) -> Optional[Dict]:
+        """Add a task to a list"""
+        with self._connection() as conn:
+            if conn.execute("SELECT 1 FROM lists WHERE id = ?", (list_id,)).fetchone() is None:
+                return None
+            self._insert_task(conn, list_id, task_data)
+        return task_data
+
+    def update_task(self, list_id: str, task_id: str, task_data: Dict) -> Optional[Dict]:
+        """Update a task"""
+        stamp_deadline(task_data)
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET title = ?, description = ?, completed = ?, deadline = ?, created_at = ?, "
+                "deadline_epoch = ? WHERE id = ? AND list_id = ?",
+                (
+                    task_data.get("title"),
+                    task_data.get("description"),
+                    int(bool(task_data.get("completed", False))),
+                    task_data.get("deadline"),
+                    task_data.get("created_at"),
+                    task_data["deadline_epoch"],
+                    task_id,
+                    list_id,
+                ),
+            )
+        return task_data if cursor.rowcount > 0 else None
+
+    def delete_task(self, list_id: str, task_id: str) -> bool:
+        """Delete a task"""
+        with self._connection() as conn:
+            cursor = conn.execute("DELETE FROM tasks WHERE id = ? AND list_id = ?", (task_id, list_id))
+        return cursor.rowcount > 0
+
+    def _get_tasks_with_list(self, where: str, params: tuple) -> List[Dict]:
+        """Query tasks across all lists, tagging each one with its list ID and name"""
+        rows = self._connection().execute(
+            f"SELECT {', '.join('t.' + column for column in TASK_COLUMNS.split(', '))}, l.name AS list_name "
+            f"FROM tasks t JOIN lists l ON l.id = t.list_id WHERE {where} ORDER BY t.seq",
+            params,
+        )
+        tasks = []
+        for row in rows:
+            task_with_list = self._task_to_dict(row)
+            task_with_list["list_id"] = row["list_id"]
+            task_with_list["list_name"] = row["list_name"]
+            tasks.append(task_with_list)
+        return tasks
+
+    def get_tasks_due_this_week(self) -> List[Dict]:
+        """Get all tasks due this week across all lists"""
+        # A range scan on the epoch index
+        return self._get_tasks_with_list("t.deadline_epoch >= ? AND t.deadline_epoch < ?", this_week_epochs())
+
+    def get_tasks_ordered_by_deadline(self, list_id: str) -> List[Dict]:
+        """Get tasks in a list ordered by deadline"""
+        rows = self._connection().execute(
+            f"SELECT {TASK_COLUMNS} FROM tasks WHERE list_id = ? "
+            "ORDER BY deadline_epoch IS NULL, deadline_epoch, seq",
+            (list_id,),
+        )
+        return [self._task_to_dict(row) for row in rows]
+
+    def get_tasks_by_completion(self, list_id: str, completed: bool = False) -> List[Dict]:
+        """Get tasks by completion status"""
+        rows = self._connection().execute(
+            f"SELECT {TASK_COLUMNS} FROM tasks WHERE list_id = ? AND completed = ? ORDER BY seq",
+            (list_id, int(completed)),
+        )
+        return [self._task_to_dict(row) for row in rows]
+
+    def get_tasks_by_date_range(self, start_date: datetime, end_date: datetime) -> List[Dict]:
+        """Get tasks within a date range"""
+        return self._get_tasks_with_list(
+            "t.deadline_epoch >= ? AND t.deadline_epoch <= ?",
+            (math.ceil(start_date.timestamp()), math.floor(end_date.timestamp())),
+        )
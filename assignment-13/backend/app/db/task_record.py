@@ -0,0 +1,76 @@
+import sys
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, Mapping
+
+FIELDS = ("id", "title", "description", "completed", "deadline", "deadline_epoch", "created_at")
+
+
+class TaskRecord(MutableMapping):
+    """Compact resident form of a stored task
+
+    Known fields live in slots instead of a per-task dict, and the id is interned so that
+    indexes share one string with the record. The record is a mutable mapping, so storage
+    and service code keeps using task["field"] / task.get("field"), and FastAPI validates it
+    straight into TaskResponse at the API boundary. Unknown fields are kept in a small dict.
+    """
+
+    # A field whose slot is unset is absent, exactly like a missing key in the stored dict
+    __slots__ = FIELDS + ("extra",)
+
+    def __init__(self, data: Mapping[str, Any]):
+        self.extra = None
+        for key, value in data.items():
+            self[key] = value
+
+    @classmethod
+    def of(cls, task: Mapping[str, Any]) -> "TaskRecord":
+        """The record form of a task, reusing it when it already is one"""
+        return task if isinstance(task, cls) else cls(task)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self.extra is None:
+            raise KeyError(key)
+        return self.extra[key]
+
+    def __setitem__(self, key: str, value: Any):
+        if key in FIELDS:
+            if key == "id" and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key: str):
+        if key in FIELDS:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self.extra is None:
+            raise KeyError(key)
+        else:
+            del self.extra[key]
+
+    def __iter__(self) -> Iterator[str]:
+        for key in FIELDS:
+            if hasattr(self, key):
+                yield key
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"TaskRecord({dict(self)!r})"
+
+    def copy(self) -> Dict[str, Any]:
+        """Plain dict copy, for callers that decorate a task with extra fields"""
+        return dict(self)
@@ -0,0 +1,231 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.db.async_database import AsyncDatabase
+from app.db.backends import StorageBackend
+
+ChangeKey = Tuple[str, ...]
+
+
+class UnitOfWork:
+    """Storage view that reads each entity once, tracks changes and writes them back on commit
+
+    It offers the list and task operations of a storage backend, so the services run on it
+    unchanged. Single tasks are read through get_task() and kept as they were changed, so a
+    task update costs what it costs on the backend. Lists are loaded whole only when a whole
+    list is read, or on every access for a backend with replace_list(), which gets each
+    changed list back in a single write on commit. Otherwise commit() writes every changed
+    entity once. Nothing reaches storage without a commit.
+    """
+
+    def __init__(self, db: StorageBackend):
+        self.db = db
+        self._whole_lists = hasattr(db, "replace_list")
+        # Working copies of whole lists, None for a list that does not exist
+        self._lists: Dict[str, Optional[Dict]] = {}
+        # Tasks of lists that are not loaded whole, None for a task that does not exist
+        self._tasks: Dict[Tuple[str, str], Optional[Dict]] = {}
+        self._found: Dict[str, bool] = {}
+        # Pending changes by entity, in the order the entities were first changed
+        self._changes: Dict[ChangeKey, Tuple[str, Any]] = {}
+
+    def _load(self, list_id: str) -> Optional[Dict]:
+        """The working copy of a list, read from storage on first access with the task changes made so far"""
+        if list_id not in self._lists:
+            lst = self.db.get_list(list_id)
+            if lst is not None:
+                lst = {**lst, "tasks": list(lst.get("tasks", []))}
+                for (task_list_id, task_id), task in list(self._tasks.items()):
+                    if task_list_id != list_id:
+                        continue
+                    del self._tasks[(list_id, task_id)]
+                    position = self._position(lst, task_id)
+                    if position is None:
+                        if task is not None:
+                            lst["tasks"].append(task)
+                    elif task is None:
+                        del lst["tasks"][position]
+                    else:
+                        lst["tasks"][position] = task
+            self._lists[list_id] = lst
+        return self._lists[list_id]
+
+    def _loaded(self, list_id: str) -> bool:
+        """Whether the list's tasks are worked on in its whole working copy"""
+        return self._whole_lists or list_id in self._lists
+
+    def _exists(self, list_id: str) -> bool:
+        if self._loaded(list_id):
+            return self._load(list_id) is not None
+        if list_id not in self._found:
+            self._found[list_id] = self.db.get_list(list_id) is not None
+        return self._found[list_id]
+
+    @staticmethod
+    def _position(lst: Dict, task_id: str) -> Optional[int]:
+        for position, task in enumerate(lst["tasks"]):
+            if task.get("id") == task_id:
+                return position
+        return None
+
+    def _record(self, key: ChangeKey, op: str, payload: Any = None):
+        """Remember a change, folding it into an earlier change of the same entity"""
+        previous = self._changes.get(key)
+        if previous is not None and previous[0] == "add_task":
+            if op == "delete_task":
+                # Added and deleted within the unit of work, so storage never needs to know
+                del self._changes[key]
+            else:
+                self._changes[key] = ("add_task", payload)
+            return
+        self._changes[key] = (op, payload)
+
+    # List operations
+    def get_list(self, list_id: str) -> Optional[Dict]:
+        return self._load(list_id)
+
+    def create_list(self, list_data: Dict) -> Dict:
+        lst = {**list_data, "tasks": list(list_data.get("tasks", []))}
+        self._lists[lst["id"]] = lst
+        # Tasks added later are changes of their own, so the list is created as it is now
+        self._record(("list", lst["id"]), "create_list", {**lst, "tasks": list(lst["tasks"])})
+        return lst
+
+    def update_list(self, list_id: str, list_data: Dict) -> Optional[Dict]:
+        lst = self._load(list_id)
+        if lst is None:
+            return None
+        updated = {key: value for key, value in list_data.items() if key != "tasks"}
+        # Preserve the tasks
+        updated["tasks"] = lst["tasks"]
+        self._lists[list_id] = updated
+        self._record(("fields", list_id), "update_list", updated)
+        return updated
+
+    def delete_list(self, list_id: str) -> bool:
+        if self._load(list_id) is None:
+            return False
+        self._lists[list_id] = None
+        # Earlier changes to the list no longer matter, and a list created here never reaches storage
+        created = self._changes.get(("list", list_id), ("",))[0] == "create_list"
+        for key in [key for key in self._changes if key[1] == list_id]:
+            del self._changes[key]
+        if not created:
+            self._record(("list", list_id), "delete_list")
+        return True
+
+    # Task operations
+    def get_tasks(self, list_id: str) -> List[Dict]:
+        lst = self._load(list_id)
+        return [] if lst is None else lst["tasks"]
+
+    def get_task(self, list_id: str, task_id: str) -> Optional[Dict]:
+        if not self._loaded(list_id):
+            key = (list_id, task_id)
+            if key not in self._tasks:
+                self._tasks[key] = self.db.get_task(list_id, task_id)
+            return self._tasks[key]
+        lst = self._load(list_id)
+        position = None if lst is None else self._position(lst, task_id)
+        return None if position is None else lst["tasks"][position]
+
+    def add_task(self, list_id: str, task_data: Dict) -> Optional[Dict]:
+        if not self._exists(list_id):
+            return None
+        if self._loaded(list_id):
+            self._lists[list_id]["tasks"].append(task_data)
+        else:
+            self._tasks[(list_id, task_data.get("id"))] = task_data
+        self._record(("task", list_id, task_data.get("id")), "add_task", task_data)
+        return task_data
+
+    def update_task(self, list_id: str, task_id: str, task_data: Dict) -> Optional[Dict]:
+        if self.get_task(list_id, task_id) is None:
+            return None
+        if self._loaded(list_id):
+            lst = self._lists[list_id]
+            lst["tasks"][self._position(lst, task_id)] = task_data
+        else:
+            self._tasks[(list_id, task_id)] = task_data
+        self._record(("task", list_id, task_id), "update_task", task_data)
+        return task_data
+
+    def delete_task(self, list_id: str, task_id: str) -> bool:
+        if self.get_task(list_id, task_id) is None:
+            return False
+        if self._loaded(list_id):
+            lst = self._lists[list_id]
+            del lst["tasks"][self._position(lst, task_id)]
+        else:
+            self._tasks[(list_id, task_id)] = None
+        self._record(("task", list_id, task_id), "delete_task")
+        return True
+
+    @property
+    def dirty(self) -> bool:
+        """Whether there are changes to commit"""
+        return bool(self._changes)
+
+    def commit(self):
+        """Write the pending changes, each entity once, and start over with an empty identity map"""
+        changes, self._changes = self._changes, {}
+        lists, self._lists = self._lists, {}
+        self._tasks, self._found = {}, {}
+        replace_list = getattr(self.db, "replace_list", None)
+        replaced = set()
+        for key, (op, payload) in changes.items():
+            list_id = key[1]
+            if op == "create_list":
+                self.db.create_list(payload)
+            elif op == "delete_list":
+                self.db.delete_list(list_id)
+            elif replace_list is not None:
+                if list_id not in replaced and lists.get(list_id) is not None:
+                    replace_list(lists[list_id])
+                    replaced.add(list_id)
+            elif op == "update_list":
+                self.db.update_list(list_id, payload)
+            elif op == "add_task":
+                self.db.add_task(list_id, payload)
+            elif op == "update_task":
+                self.db.update_task(list_id, key[2], payload)
+            elif op == "delete_task":
+                self.db.delete_task(list_id, key[2])
+
+    def rollback(self):
+        """Drop the pending changes and the identity map"""
+        self._changes = {}
+        self._lists = {}
+        self._tasks = {}
+        self._found = {}
+
+
+class AsyncUnitOfWork:
+    """Unit of work of one API request
+
+    run() executes a service operation against the unit of work and commits it as one
+    command in the writer lane of its list, so the reads it is based on cannot go stale
+    before its writes land, and a failed operation writes nothing.
+    """
+
+    def __init__(self, db: AsyncDatabase):
+        self.db = db
+        self.work = UnitOfWork(db.db)
+
+    async def run(self, list_id: str, func: Callable[..., Any], *args) -> Any:
+        """Run func(unit_of_work, *args) and commit what it changed
+        
+        Its reads, changes and writes are one command of the list's writer lane, so no other
+        mutation of the list can interleave with them.
+        """
+        return await self.db.mutate(list_id, self._run, func, *args)
+
+    def _run(self, func: Callable[..., Any], *args) -> Any:
+        try:
+            result = func(self.work, *args)
+        except Exception:
+            self.work.rollback()
+            raise
+        self.work.commit()
+        return result
+
+    def rollback(self):
+        self.work.rollback()
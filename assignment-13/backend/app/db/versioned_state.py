@@ -0,0 +1,264 @@
+from bisect import bisect_left, insort
+from typing import Any, Dict, List, Optional, Tuple
+from app.db.deadline_index import task_epoch
+
+DeadlineEntry = Tuple[int, str]
+# Stored in the slot of a deleted task until the list is vacuumed
+TOMBSTONE = None
+# Task slots are stored in chunks of this size, so that a change copies one chunk and the
+# chunk index instead of every slot
+CHUNK_SIZE = 256
+
+
+class ListVersion:
+    """One immutable version of a list: its fields, task slots, positions and deadline order
+
+    Changes return a new version that shares the task records, the list's fields and every
+    chunk of slots it did not change with this one. Records handed out by a version must
+    not be mutated.
+
+    A deleted task leaves a tombstone in its slot, so that no other task moves. The
+    positions and the deadline order are shared as they are: their entries of deleted
+    tasks are skipped on read and dropped by vacuumed(), which rebuilds the list.
+    """
+
+    __slots__ = ("fields", "chunks", "dead", "positions", "deadlines", "garbage", "_data", "_derive")
+
+    def __init__(self, fields: Dict, chunks: List[List[Optional[Dict]]], dead: List[int],
+                 positions: Dict[str, int], deadlines: List[DeadlineEntry], garbage: int = 0,
+                 data: Optional[Dict] = None, derive: Optional[Tuple[List[Dict], int, int, List[Dict]]] = None):
+        # The list document without its tasks
+        self.fields = fields
+        self.chunks = chunks
+        # Tombstones per chunk
+        self.dead = dead
+        self.positions = positions
+        self.deadlines = deadlines
+        self.garbage = garbage
+        self._data = data
+        # (tasks, start, removed, added) to build the tasks from the live tasks of the previous version
+        self._derive = derive
+
+    @classmethod
+    def of(cls, lst: Dict) -> "ListVersion":
+        """Index a list document"""
+        tasks = lst.get("tasks", [])
+        chunks = [tasks[start:start + CHUNK_SIZE] for start in range(0, len(tasks), CHUNK_SIZE)]
+        positions = {task.get("id"): position for position, task in enumerate(tasks)}
+        deadlines = []
+        for task in tasks:
+            ListVersion._with_deadline(deadlines, task)
+        fields = {key: value for key, value in lst.items() if key != "tasks"}
+        return cls(fields, chunks, [0] * len(chunks), positions, deadlines, data=lst)
+
+    @property
+    def data(self) -> Dict:
+        """The list document without tombstones"""
+        # Built once per version; racing readers would only build the same document twice
+        if self._data is None:
+            derive = self._derive
+            if derive is not None:
+                tasks, start, removed, added = derive
+                tasks = tasks[:start] + added + tasks[start + removed:]
+            else:
+                tasks = [task for chunk in self.chunks for task in chunk if task is not TOMBSTONE]
+            self._data = {**self.fields, "tasks": tasks}
+            self._derive = None
+        return self._data
+
+    @property
+    def tasks(self) -> List[Dict]:
+        return self.data.get("tasks", [])
+
+    @property
+    def size(self) -> int:
+        """Number of task slots, tombstones included"""
+        return (len(self.chunks) - 1) * CHUNK_SIZE + len(self.chunks[-1]) if self.chunks else 0
+
+    @property
+    def slots(self) -> List[Optional[Dict]]:
+        """Stored tasks by position, tombstones included"""
+        return [task for chunk in self.chunks for task in chunk]
+
+    def position(self, task_id: str) -> Optional[int]:
+        """Slot of a task, None if the list does not hold it"""
+        position = self.positions.get(task_id)
+        if position is None or self._slot(position) is TOMBSTONE:
+            return None
+        return position
+
+    def task(self, task_id: str) -> Optional[Dict]:
+        position = self.positions.get(task_id)
+        return None if position is None else self._slot(position)
+
+    def _slot(self, position: int) -> Optional[Dict]:
+        return self.chunks[position // CHUNK_SIZE][position % CHUNK_SIZE]
+
+    def _live_index(self, position: int) -> int:
+        """Index in the live tasks of the task at position"""
+        chunk, offset = divmod(position, CHUNK_SIZE)
+        if not self.garbage:
+            return position
+        return position - sum(self.dead[:chunk]) - self.chunks[chunk][:offset].count(TOMBSTONE)
+
+    def _derived(self, start: int, removed: int, added: List[Dict]) -> Optional[Tuple[List[Dict], int, int, List[Dict]]]:
+        """How the next version's tasks follow from this one's, if this version has built them"""
+        data = self._data
+        return None if data is None else (data.get("tasks", []), start, removed, added)
+
+    def _with_slot(self, position: int, task: Optional[Dict], deadlines: List[DeadlineEntry],
+                   derive) -> "ListVersion":
+        """The list with the slot at position replaced, copying only its chunk"""
+        index, offset = divmod(position, CHUNK_SIZE)
+        chunk = list(self.chunks[index])
+        chunk[offset] = task
+        chunks = list(self.chunks)
+        chunks[index] = chunk
+        dead = self.dead
+        garbage = self.garbage
+        if task is TOMBSTONE:
+            dead = list(dead)
+            dead[index] += 1
+            garbage += 1
+        return ListVersion(self.fields, chunks, dead, self.positions, deadlines, garbage, derive=derive)
+
+    @staticmethod
+    def _without_deadline(deadlines: List[DeadlineEntry], task: Dict):
+        epoch = task_epoch(task)
+        if epoch is not None:
+            del deadlines[bisect_left(deadlines, (epoch, task.get("id")))]
+
+    @staticmethod
+    def _with_deadline(deadlines: List[DeadlineEntry], task: Dict):
+        epoch = task_epoch(task)
+        if epoch is not None:
+            insort(deadlines, (epoch, task.get("id")))
+
+    def with_fields(self, fields: Dict) -> "ListVersion":
+        """The list with its fields replaced, keeping the tasks"""
+        fields = {key: value for key, value in fields.items() if key != "tasks"}
+        data = self._data
+        data = None if data is None else {**fields, "tasks": data.get("tasks", [])}
+        return ListVersion(fields, self.chunks, self.dead, self.positions, self.deadlines, self.garbage,
+                           data=data, derive=self._derive)
+
+    def with_task(self, task: Dict) -> "ListVersion":
+        """The list with a task appended"""
+        if task.get("id") in self.positions and self.position(task.get("id")) is None:
+            # The id of a deleted task, whose old slot still has entries
+            return self.vacuumed().with_task(task)
+        deadlines = list(self.deadlines)
+        self._with_deadline(deadlines, task)
+        position = self.size
+        chunks = list(self.chunks)
+        dead = self.dead
+        if position % CHUNK_SIZE:
+            chunks[-1] = chunks[-1] + [task]
+        else:
+            chunks.append([task])
+            dead = dead + [0]
+        derive = self._derived(position - self.garbage, 0, [task])
+        return ListVersion(self.fields, chunks, dead, {**self.positions, task.get("id"): position}, deadlines,
+                           self.garbage, derive=derive)
+
+    def with_task_replaced(self, position: int, task: Dict) -> "ListVersion":
+        """The list with the task at position replaced"""
+        deadlines = list(self.deadlines)
+        self._without_deadline(deadlines, self._slot(position))
+        self._with_deadline(deadlines, task)
+        return self._with_slot(position, task, deadlines, self._derived(self._live_index(position), 1, [task]))
+
+    def without_task(self, position: int) -> "ListVersion":
+        """The list with the task at position replaced by a tombstone
+
+        Copies one chunk of slots and the chunk index; the positions and the deadline
+        order keep the deleted task's entries until the list is vacuumed.
+        """
+        return self._with_slot(position, TOMBSTONE, self.deadlines, self._derived(self._live_index(position), 1, []))
+
+    def vacuumed(self) -> "ListVersion":
+        """The same list without tombstones"""
+        return self if not self.garbage else ListVersion.of(self.data)
+
+    def due(self, start_epoch: int, end_epoch: int) -> List[DeadlineEntry]:
+        """(epoch, task_id) entries with start_epoch <= deadline < end_epoch, earliest first"""
+        entries = self.deadlines[bisect_left(self.deadlines, (start_epoch,)):bisect_left(self.deadlines, (end_epoch,))]
+        return entries if not self.garbage else [entry for entry in entries if self.position(entry[1]) is not None]
+
+    def ordered_tasks(self) -> List[Dict]:
+        """Tasks in deadline order, followed by the tasks without a deadline"""
+        with_deadline = [task for task in (self.task(task_id) for _, task_id in self.deadlines) if task is not TOMBSTONE]
+        ids = {task.get("id") for task in with_deadline}
+        return with_deadline + [task for task in self.tasks if task.get("id") not in ids]
+
+
+class StateVersion:
+    """An immutable version of the whole database, readable without locks
+
+    Lists are kept in document order. A new version copies the list mapping, but shares
+    every list version that did not change.
+    """
+
+    __slots__ = ("lists", "metadata", "_documents")
+
+    def __init__(self, lists: Dict[str, ListVersion], metadata: Dict[str, Any]):
+        self.lists = lists
+        self.metadata = metadata
+        self._documents = None
+
+    @classmethod
+    def of(cls, data: Dict[str, Any]) -> "StateVersion":
+        """Index a database document"""
+        lists = {lst.get("id"): ListVersion.of(lst) for lst in data.get("lists", [])}
+        return cls(lists, {key: value for key, value in data.items() if key not in ("lists", "lsn")})
+
+    def replace(self, list_id: str, version: Optional[ListVersion]) -> "StateVersion":
+        """The database with one list added, changed, or removed when version is None"""
+        lists = dict(self.lists)
+        if version is None:
+            del lists[list_id]
+        else:
+            lists[list_id] = version
+        return StateVersion(lists, self.metadata)
+
+    def document(self, lsn: int) -> Dict[str, Any]:
+        """The database document of this version"""
+        return {**self.metadata, "lists": self.get_lists(), "lsn": lsn}
+
+    # Read operations, with the signatures of the storage backends
+    def get_lists(self) -> List[Dict]:
+        # Built once per version; racing readers would only build the same list twice
+        if self._documents is None:
+            self._documents = [version.data for version in self.lists.values()]
+        return self._documents
+
+    def get_list(self, list_id: str) -> Optional[Dict]:
+        version = self.lists.get(list_id)
+        return None if version is None else version.data
+
+    def get_tasks(self, list_id: str) -> List[Dict]:
+        version = self.lists.get(list_id)
+        return [] if version is None else version.tasks
+
+    def get_task(self, list_id: str, task_id: str) -> Optional[Dict]:
+        version = self.lists.get(list_id)
+        return None if version is None else version.task(task_id)
+
+    def get_tasks_due_between(self, start_epoch: int, end_epoch: int) -> List[Dict]:
+        """Tasks of every list with start_epoch <= deadline < end_epoch, tagged with their list"""
+        due = sorted(
+            (epoch, list_id, task_id)
+            for list_id, version in self.lists.items()
+            for epoch, task_id in version.due(start_epoch, end_epoch)
+        )
+        tasks = []
+        for _, list_id, task_id in due:
+            task_with_list = dict(self.get_task(list_id, task_id))
+            task_with_list["list_id"] = list_id
+            task_with_list["list_name"] = self.lists[list_id].fields.get("name")
+            tasks.append(task_with_list)
+        return tasks
+
+    def get_tasks_ordered_by_deadline(self, list_id: str) -> List[Dict]:
+        version = self.lists.get(list_id)
+        return [] if version is None else version.ordered_tasks()
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Awaitable, Callable, List, Optional
+from app.core.config import settings
+from app.db.backends import StorageBackend
+
+
+class WriteActor:
+    """Writer lanes that apply the mutations of one backend in submission order
+
+    Commands wait in an asyncio queue per lane, and each lane runs its commands one at a
+    time on the actor's threads. A list's commands always go to the same lane, so a
+    read-modify-write command never interleaves with another mutation of that list and
+    needs no lock, while different lists are written in parallel. Changes to the set of
+    lists, which backends like ShardedDatabase record in one shared manifest, also wait
+    their turn in a collection lane, so only one of them runs at a time. Reads do not go
+    through the actor and never wait for it.
+    """
+
+    def __init__(self, lanes: Optional[int] = None, maxsize: Optional[int] = None):
+        self._lanes = max(1, lanes or settings.WRITE_LANES)
+        self._maxsize = settings.WRITE_QUEUE_SIZE if maxsize is None else maxsize
+        self._executor = ThreadPoolExecutor(max_workers=self._lanes, thread_name_prefix="storage-writer")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queues: List[asyncio.Queue] = []
+        self._collection: Optional[asyncio.Queue] = None
+        self._writers: List[asyncio.Task] = []
+
+    def _start(self):
+        """Start the lane writers on the running loop, replacing those left on a previous loop"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queues = [asyncio.Queue(self._maxsize) for _ in range(self._lanes)]
+            self._collection = asyncio.Queue(self._maxsize)
+            self._writers = [loop.create_task(self._run(queue)) for queue in self._queues + [self._collection]]
+
+    async def _run(self, queue: asyncio.Queue):
+        while True:
+            command, future = await queue.get()
+            try:
+                # A submitter that gave up before its turn no longer expects the mutation
+                if future.cancelled():
+                    continue
+                try:
+                    result = await command()
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+            finally:
+                queue.task_done()
+
+    async def _enqueue(self, queue: asyncio.Queue, command: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._loop.create_future()
+        await queue.put((command, future))
+        return await future
+
+    async def submit(self, key: Optional[str], func: Callable[..., Any], *args) -> Any:
+        """Queue a mutation in the lane of key, usually a list ID, and await its result"""
+        self._start()
+        return await self._enqueue(
+            self._queues[hash(key) % self._lanes],
+            partial(self._loop.run_in_executor, self._executor, partial(func, *args)),
+        )
+
+    async def submit_collection(self, key: Optional[str], func: Callable[..., Any], *args) -> Any:
+        """Queue the creation or deletion of the list key and await its result
+
+        The collection lane hands the mutation to the list's lane and waits for it there, so it
+        is ordered with the list's other mutations and no other collection change overlaps it.
+        """
+        self._start()
+        return await self._enqueue(self._collection, partial(self.submit, key, func, *args))
+
+    async def join(self):
+        """Wait until every queued mutation has been applied"""
+        if self._loop is asyncio.get_running_loop():
+            # Collection changes end up in the lanes, so they are waited for first
+            for queue in [self._collection] + self._queues:
+                await queue.join()
+
+
+_actors: "weakref.WeakKeyDictionary[StorageBackend, WriteActor]" = weakref.WeakKeyDictionary()
+_actors_lock = threading.Lock()
+
+
+def get_write_actor(db: StorageBackend) -> WriteActor:
+    """The writer shared by every async caller of a backend instance"""
+    with _actors_lock:
+        actor = _actors.get(db)
+        if actor is None:
+            actor = _actors[db] = WriteActor()
+        return actor
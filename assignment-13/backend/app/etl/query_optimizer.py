@@ -1,9 +1,10 @@
 import time
 import logging
 from typing import Dict, List, Any, Optional, Callable
-from datetime import datetime, timedelta
+from datetime import datetime
 from functools import wraps
 import json
+from app.db.deadline_index import task_epoch, this_week_epochs
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -232,28 +233,22 @@ def slow_get_tasks_due_this_week(db_instance) -> List[Dict]:
     return due_this_week
 
 def optimized_get_tasks_due_this_week(db_instance) -> List[Dict]:
-    """Optimized implementation with better date handling"""
+    """Optimized implementation comparing the stored deadline epochs"""
     data = db_instance.read_db()
     due_this_week = []
-    today = datetime.now().date()
-    week_end = today + timedelta(days=7)
+    start_epoch, end_epoch = this_week_epochs()
     
     for lst in data.get("lists", []):
         list_id = lst.get("id")
         list_name = lst.get("name")
         
         for task in lst.get("tasks", []):
-            if "deadline" in task:
-                try:
-                    deadline_date = datetime.fromisoformat(task["deadline"].replace('Z', '+00:00')).date()
-                    
-                    if today <= deadline_date <= week_end:
-                        task_with_list = task.copy()
-                        task_with_list["list_id"] = list_id
-                        task_with_list["list_name"] = list_name
-                        due_this_week.append(task_with_list)
-                except (ValueError, AttributeError):
-                    continue
+            epoch = task_epoch(task)
+            if epoch is not None and start_epoch <= epoch < end_epoch:
+                task_with_list = task.copy()
+                task_with_list["list_id"] = list_id
+                task_with_list["list_name"] = list_name
+                due_this_week.append(task_with_list)
                     
     return due_this_week
 
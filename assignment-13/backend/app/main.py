@@ -1,9 +1,11 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes.list_routes import router as list_router
 from app.api.routes.task_routes import router as task_router
 from app.api.routes.auth_routes import router as auth_router
+from app.api.deps import STORAGE_VERSION_HEADER
 from app.core.config import settings
+from app.db.backends import get_backend
 
 # Create FastAPI app
 app = FastAPI(
@@ -21,6 +23,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def add_storage_version(request: Request, call_next):
+    """Tell clients the storage version after the request, the token for read-your-writes on a replica"""
+    response = await call_next(request)
+    lsn = getattr(get_backend(), "lsn", None)
+    if lsn is not None:
+        response.headers[STORAGE_VERSION_HEADER] = str(lsn)
+    return response
+
 # Include API routers with prefix
 app.include_router(auth_router, prefix=settings.API_PREFIX)
 app.include_router(list_router, prefix=settings.API_PREFIX)
@@ -29,8 +40,13 @@ app.include_router(task_router, prefix=settings.API_PREFIX)
 # Root endpoint for health check
 @app.get("/")
 async def root():
-    return {
+    health = {
         "message": "Todo List API is running", 
         "docs": "/docs",
         "status": "healthy"
     }
+    # Tombstones of the Database backend, to watch the background vacuum keep up
+    garbage_stats = getattr(get_backend(), "garbage_stats", None)
+    if garbage_stats is not None:
+        health["garbage"] = garbage_stats()
+    return health
@@ -0,0 +1,108 @@
+"""Read-only API served by a replica that follows the primary's write-ahead log
+
+Run it next to the primary, on the same DATABASE_FILE and WAL_FILE:
+
+    uvicorn app.replica:app --port 8001
+
+Only the GET routes are served. Every response of the primary and the replica carries the
+storage version it reflects in X-Storage-Version. A client that must read its own writes
+sends the version of its last write in X-Min-Storage-Version; the replica waits up to
+REPLICA_MAX_STALENESS_MS to catch up and answers 503 if it cannot, so the client can read
+from the primary instead.
+"""
+import asyncio
+import threading
+from typing import Optional
+from fastapi import APIRouter, FastAPI, Request, status
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from app.api.deps import MIN_STORAGE_VERSION_HEADER, STORAGE_VERSION_HEADER
+from app.api.routes.list_routes import router as list_router
+from app.api.routes.task_routes import router as task_router
+from app.core.config import settings
+from app.db.backends import StorageBackend, get_db
+from app.db.replica import ReplicaDatabase
+
+_replica: Optional[ReplicaDatabase] = None
+_replica_lock = threading.Lock()
+
+
+def get_replica() -> ReplicaDatabase:
+    """The replica of this process, started on first use"""
+    global _replica
+    with _replica_lock:
+        if _replica is None:
+            _replica = ReplicaDatabase()
+        return _replica
+
+
+def read_only(router: APIRouter) -> APIRouter:
+    """A router with only the GET routes of router"""
+    replica_router = APIRouter()
+    replica_router.routes.extend(route for route in router.routes if route.methods == {"GET"})
+    return replica_router
+
+
+app = FastAPI(
+    title=f"{settings.APP_NAME} (read replica)",
+    description="Read-only replica of the Todo List API",
+    version="0.1.0",
+)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # Allow all origins in development
+    allow_credentials=True,
+    allow_methods=["GET"],
+    allow_headers=["*"],
+)
+
+app.include_router(read_only(list_router), prefix=settings.API_PREFIX)
+app.include_router(read_only(task_router), prefix=settings.API_PREFIX)
+
+
+def get_replica_db() -> StorageBackend:
+    """Serve the routes from the replica"""
+    return get_replica()
+
+
+app.dependency_overrides[get_db] = get_replica_db
+
+
+@app.middleware("http")
+async def enforce_min_version(request: Request, call_next):
+    """Hold a read until the replica reflects the version the client asked for"""
+    replica = get_replica()
+    min_version = request.headers.get(MIN_STORAGE_VERSION_HEADER)
+    if min_version is not None:
+        try:
+            min_version = int(min_version)
+        except ValueError:
+            return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={"detail": f"{MIN_STORAGE_VERSION_HEADER} must be an integer"},
+            )
+        caught_up = await asyncio.get_running_loop().run_in_executor(
+            None, replica.wait_for, min_version, settings.REPLICA_MAX_STALENESS_MS / 1000
+        )
+        if not caught_up:
+            return JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"detail": f"Replica is behind version {min_version}, read from the primary"},
+                headers={STORAGE_VERSION_HEADER: str(replica.lsn)},
+            )
+    # Taken before the request, so that the response reflects at least this version
+    lsn = replica.lsn
+    response = await call_next(request)
+    response.headers[STORAGE_VERSION_HEADER] = str(lsn)
+    return response
+
+
+@app.get("/")
+async def root():
+    return {
+        "message": "Todo List API read replica is running",
+        "docs": "/docs",
+        "status": "healthy",
+        "version": get_replica().lsn,
+    }
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List
 import uuid
+from app.schemas.task_schema import TaskResponse
 
 class ListBase(BaseModel):
     name: str
@@ -16,4 +17,4 @@ class ListInDB(ListBase):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     
 class ListResponse(ListInDB):
-    tasks: List[dict] = []
+    tasks: List[TaskResponse] = []
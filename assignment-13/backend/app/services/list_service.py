@@ -1,46 +1,84 @@
-from app.db.database import db
+from app.db.backends import StorageBackend
+from app.db.async_database import AsyncDatabase
+from app.db.unit_of_work import AsyncUnitOfWork
 from app.schemas.list_schema import ListCreate, ListUpdate, ListInDB, ListResponse
 from typing import List, Optional, Dict
 
 class ListService:
-    @staticmethod
-    def get_lists() -> List[Dict]:
+    def __init__(self, db: StorageBackend):
+        self.db = db
+    
+    def get_lists(self) -> List[Dict]:
         """Get all lists with their tasks"""
-        return db.get_lists()
+        return self.db.get_lists()
     
-    @staticmethod
-    def get_list(list_id: str) -> Optional[Dict]:
+    def get_list(self, list_id: str) -> Optional[Dict]:
         """Get a specific list by ID"""
-        return db.get_list(list_id)
+        return self.db.get_list(list_id)
     
     @staticmethod
-    def create_list(list_data: ListCreate) -> Dict:
-        """Create a new list"""
+    def build_list(list_data: ListCreate) -> Dict:
+        """Convert a new list to its stored form"""
         # Convert to DB model with ID
-        list_in_db = ListInDB(**list_data.model_dump())
-        
+        return ListInDB(**list_data.model_dump()).model_dump()
+    
+    @staticmethod
+    def apply_update(existing_list: Dict, list_data: ListUpdate) -> Dict:
+        """A copy of a stored list with the provided fields of an update applied, see TaskService.apply_update()"""
+        updated_list = dict(existing_list)
+        for key, value in list_data.model_dump(exclude_unset=True).items():
+            if value is not None:
+                updated_list[key] = value
+        return updated_list
+    
+    def create_list(self, list_data: ListCreate) -> Dict:
+        """Create a new list"""
         # Create in database
-        created_list = db.create_list(list_in_db.model_dump())
+        created_list = self.db.create_list(self.build_list(list_data))
         return created_list
     
-    @staticmethod
-    def update_list(list_id: str, list_data: ListUpdate) -> Optional[Dict]:
+    def update_list(self, list_id: str, list_data: ListUpdate) -> Optional[Dict]:
         """Update an existing list"""
         # Get current list
-        existing_list = db.get_list(list_id)
+        existing_list = self.db.get_list(list_id)
         if not existing_list:
             return None
         
         # Update only provided fields
-        for key, value in list_data.model_dump(exclude_unset=True).items():
-            if value is not None:
-                existing_list[key] = value
+        updated_list = self.apply_update(existing_list, list_data)
         
         # Update in database
-        updated_list = db.update_list(list_id, existing_list)
+        updated_list = self.db.update_list(list_id, updated_list)
         return updated_list
     
-    @staticmethod
-    def delete_list(list_id: str) -> bool:
+    def delete_list(self, list_id: str) -> bool:
+        """Delete a list"""
+        return self.db.delete_list(list_id)
+
+
+class AsyncListService:
+    """Async variant of ListService whose storage calls never block the event loop"""
+    
+    def __init__(self, db: AsyncDatabase, uow: Optional[AsyncUnitOfWork] = None):
+        self.db = db
+        self.uow = uow or AsyncUnitOfWork(db)
+    
+    async def get_lists(self) -> List[Dict]:
+        """Get all lists with their tasks"""
+        return await self.db.get_lists()
+    
+    async def get_list(self, list_id: str) -> Optional[Dict]:
+        """Get a specific list by ID"""
+        return await self.db.get_list(list_id)
+    
+    async def create_list(self, list_data: ListCreate) -> Dict:
+        """Create a new list"""
+        return await self.db.create_list(ListService.build_list(list_data))
+    
+    async def update_list(self, list_id: str, list_data: ListUpdate) -> Optional[Dict]:
+        """Update an existing list"""
+        return await self.uow.run(list_id, lambda work: ListService(work).update_list(list_id, list_data))
+    
+    async def delete_list(self, list_id: str) -> bool:
         """Delete a list"""
-        return db.delete_list(list_id)
+        return await self.db.delete_list(list_id)
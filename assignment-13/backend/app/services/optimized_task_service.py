@@ -1,5 +1,6 @@
-from app.db.optimized_database import optimized_db
+from app.db.backends import StorageBackend
 from app.schemas.task_schema import TaskCreate, TaskUpdate, TaskInDB, TaskResponse
+from app.services.task_service import TaskService
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import time
@@ -10,155 +11,136 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class OptimizedTaskService:
-    @staticmethod
-    def get_tasks(list_id: str) -> List[Dict]:
+    def __init__(self, db: StorageBackend):
+        self.db = db
+    
+    def get_tasks(self, list_id: str) -> List[Dict]:
         """Get all tasks in a list with performance monitoring"""
         start_time = time.time()
-        result = optimized_db.get_tasks(list_id)
+        result = self.db.get_tasks(list_id)
         execution_time = (time.time() - start_time) * 1000
         
         logger.info(f"get_tasks({list_id}) executed in {execution_time:.2f}ms")
         return result
     
-    @staticmethod
-    def get_task(list_id: str, task_id: str) -> Optional[Dict]:
+    def get_task(self, list_id: str, task_id: str) -> Optional[Dict]:
         """Get a specific task by ID with performance monitoring"""
         start_time = time.time()
-        result = optimized_db.get_task(list_id, task_id)
+        result = self.db.get_task(list_id, task_id)
         execution_time = (time.time() - start_time) * 1000
         
         logger.info(f"get_task({list_id}, {task_id}) executed in {execution_time:.2f}ms")
         return result
     
-    @staticmethod
-    def add_task(list_id: str, task_data: TaskCreate) -> Optional[Dict]:
+    def add_task(self, list_id: str, task_data: TaskCreate) -> Optional[Dict]:
         """Add a task to a list with performance monitoring"""
         start_time = time.time()
         
-        # Convert to DB model with ID and timestamps
-        task_in_db = TaskInDB(**task_data.model_dump())
-        
-        # Format datetime to ISO string for JSON storage
-        task_dict = task_in_db.model_dump()
-        if task_dict.get("deadline"):
-            task_dict["deadline"] = task_dict["deadline"].isoformat()
-        task_dict["created_at"] = task_dict["created_at"].isoformat()
-        
         # Add to database
-        added_task = optimized_db.add_task(list_id, task_dict)
+        added_task = self.db.add_task(list_id, TaskService.build_task(task_data))
         execution_time = (time.time() - start_time) * 1000
         
         logger.info(f"add_task({list_id}) executed in {execution_time:.2f}ms")
         return added_task
     
-    @staticmethod
-    def update_task(list_id: str, task_id: str, task_data: TaskUpdate) -> Optional[Dict]:
+    def update_task(self, list_id: str, task_id: str, task_data: TaskUpdate) -> Optional[Dict]:
         """Update a task with performance monitoring"""
         start_time = time.time()
         
         # Get current task
-        existing_task = optimized_db.get_task(list_id, task_id)
+        existing_task = self.db.get_task(list_id, task_id)
         if not existing_task:
             return None
         
         # Update only provided fields
-        for key, value in task_data.model_dump(exclude_unset=True).items():
-            if value is not None:
-                # Format datetime to ISO string for JSON storage
-                if key == "deadline" and value:
-                    existing_task[key] = value.isoformat()
-                else:
-                    existing_task[key] = value
+        updated_task = TaskService.apply_update(existing_task, task_data)
         
         # Update in database
-        updated_task = optimized_db.update_task(list_id, task_id, existing_task)
+        updated_task = self.db.update_task(list_id, task_id, updated_task)
         execution_time = (time.time() - start_time) * 1000
         
         logger.info(f"update_task({list_id}, {task_id}) executed in {execution_time:.2f}ms")
         return updated_task
     
-    @staticmethod
-    def delete_task(list_id: str, task_id: str) -> bool:
+    def delete_task(self, list_id: str, task_id: str) -> bool:
         """Delete a task with performance monitoring"""
         start_time = time.time()
-        result = optimized_db.delete_task(list_id, task_id)
+        result = self.db.delete_task(list_id, task_id)
         execution_time = (time.time() - start_time) * 1000
         
         logger.info(f"delete_task({list_id}, {task_id}) executed in {execution_time:.2f}ms")
         return result
     
-    @staticmethod
-    def toggle_task_completion(list_id: str, task_id: str) -> Optional[Dict]:
+    def toggle_task_completion(self, list_id: str, task_id: str) -> Optional[Dict]:
         """Toggle a task's completion status with performance monitoring"""
         start_time = time.time()
         
         # Get current task
-        existing_task = optimized_db.get_task(list_id, task_id)
+        existing_task = self.db.get_task(list_id, task_id)
         if not existing_task:
             return None
         
         # Toggle completion
-        existing_task["completed"] = not existing_task.get("completed", False)
+        updated_task = TaskService.toggle_completion(existing_task)
         
         # Update in database
-        updated_task = optimized_db.update_task(list_id, task_id, existing_task)
+        updated_task = self.db.update_task(list_id, task_id, updated_task)
         execution_time = (time.time() - start_time) * 1000
         
         logger.info(f"toggle_task_completion({list_id}, {task_id}) executed in {execution_time:.2f}ms")
         return updated_task
     
-    @staticmethod
-    def get_tasks_due_this_week() -> List[Dict]:
+    def get_tasks_due_this_week(self) -> List[Dict]:
         """Get all tasks due this week across all lists - OPTIMIZED VERSION"""
         start_time = time.time()
-        result = optimized_db.get_tasks_due_this_week()
+        result = self.db.get_tasks_due_this_week()
         execution_time = (time.time() - start_time) * 1000
         
         logger.info(f"get_tasks_due_this_week() executed in {execution_time:.2f}ms")
         return result
     
-    @staticmethod
-    def get_tasks_ordered_by_deadline(list_id: str) -> List[Dict]:
+    def get_tasks_ordered_by_deadline(self, list_id: str) -> List[Dict]:
         """Get tasks in a list ordered by deadline - OPTIMIZED VERSION"""
         start_time = time.time()
-        result = optimized_db.get_tasks_ordered_by_deadline(list_id)
+        result = self.db.get_tasks_ordered_by_deadline(list_id)
         execution_time = (time.time() - start_time) * 1000
         
         logger.info(f"get_tasks_ordered_by_deadline({list_id}) executed in {execution_time:.2f}ms")
         return result
     
     # NEW: Optimized queries for better performance
-    @staticmethod
-    def get_tasks_by_completion(list_id: str, completed: bool = False) -> List[Dict]:
+    def get_tasks_by_completion(self, list_id: str, completed: bool = False) -> List[Dict]:
         """Get tasks by completion status - NEW OPTIMIZED QUERY"""
         start_time = time.time()
-        result = optimized_db.get_tasks_by_completion(list_id, completed)
+        result = self.db.get_tasks_by_completion(list_id, completed)
         execution_time = (time.time() - start_time) * 1000
         
         logger.info(f"get_tasks_by_completion({list_id}, {completed}) executed in {execution_time:.2f}ms")
         return result
     
-    @staticmethod
-    def get_tasks_by_date_range(start_date: datetime, end_date: datetime) -> List[Dict]:
+    def get_tasks_by_date_range(self, start_date: datetime, end_date: datetime) -> List[Dict]:
         """Get tasks within a date range - NEW OPTIMIZED QUERY"""
         start_time = time.time()
-        result = optimized_db.get_tasks_by_date_range(start_date, end_date)
+        result = self.db.get_tasks_by_date_range(start_date, end_date)
         execution_time = (time.time() - start_time) * 1000
         
         logger.info(f"get_tasks_by_date_range() executed in {execution_time:.2f}ms")
         return result
     
-    @staticmethod
-    def get_performance_metrics() -> Dict[str, Any]:
-        """Get performance metrics for all queries"""
+    def get_performance_metrics(self) -> Dict[str, Any]:
+        """Get the list cache counters of the storage backend, empty if it has no cache"""
+        cache_stats = getattr(self.db, "cache_stats", None)
+        if cache_stats is None:
+            return {}
+        stats = cache_stats()
+        lookups = stats["hits"] + stats["misses"]
         return {
-            'database_cache_hit_rate': '95%',  # Estimated based on implementation
-            'average_query_time_ms': 15.5,  # Estimated based on optimizations
-            'memory_usage_mb': 2.1,  # Estimated based on caching
-            'optimization_improvements': {
-                'get_tasks_due_this_week': '40% faster',
-                'get_tasks_ordered_by_deadline': '25% faster',
-                'get_list': '60% faster with caching',
-                'memory_usage': '30% reduction'
-            }
-        } 
\ No newline at end of file
+            "cache_hits": stats["hits"],
+            "cache_misses": stats["misses"],
+            "cache_hit_rate": stats["hits"] / lookups if lookups else 0.0,
+            "cache_evictions": stats["evictions"],
+            "cache_evicted_bytes": stats["evicted_bytes"],
+            "cache_resident_lists": stats["resident_lists"],
+            "cache_resident_bytes": stats["resident_bytes"],
+            "cache_budget_bytes": stats["budget_bytes"],
+        }
@@ -1,82 +1,142 @@
-from app.db.database import db
+from app.db.backends import StorageBackend
+from app.db.async_database import AsyncDatabase
+from app.db.unit_of_work import AsyncUnitOfWork
+from app.db.deadline_index import datetime_epoch
 from app.schemas.task_schema import TaskCreate, TaskUpdate, TaskInDB, TaskResponse
 from typing import List, Optional, Dict
 from datetime import datetime
 
 class TaskService:
-    @staticmethod
-    def get_tasks(list_id: str) -> List[Dict]:
+    def __init__(self, db: StorageBackend):
+        self.db = db
+    
+    def get_tasks(self, list_id: str) -> List[Dict]:
         """Get all tasks in a list"""
-        return db.get_tasks(list_id)
+        return self.db.get_tasks(list_id)
     
-    @staticmethod
-    def get_task(list_id: str, task_id: str) -> Optional[Dict]:
+    def get_task(self, list_id: str, task_id: str) -> Optional[Dict]:
         """Get a specific task by ID"""
-        return db.get_task(list_id, task_id)
+        return self.db.get_task(list_id, task_id)
     
     @staticmethod
-    def add_task(list_id: str, task_data: TaskCreate) -> Optional[Dict]:
-        """Add a task to a list"""
+    def build_task(task_data: TaskCreate) -> Dict:
+        """Convert a new task to its stored form"""
         # Convert to DB model with ID and timestamps
         task_in_db = TaskInDB(**task_data.model_dump())
         
-        # Format datetime to ISO string for JSON storage
+        # Format datetime to ISO string for JSON storage, with its epoch for the deadline queries
         task_dict = task_in_db.model_dump()
+        task_dict["deadline_epoch"] = None
         if task_dict.get("deadline"):
+            task_dict["deadline_epoch"] = datetime_epoch(task_dict["deadline"])
             task_dict["deadline"] = task_dict["deadline"].isoformat()
         task_dict["created_at"] = task_dict["created_at"].isoformat()
+        return task_dict
+    
+    @staticmethod
+    def apply_update(existing_task: Dict, task_data: TaskUpdate) -> Dict:
+        """A copy of a stored task with the provided fields of an update applied
         
+        Stored records can be shared with concurrent readers, so they are never changed in place.
+        """
+        updated_task = dict(existing_task)
+        for key, value in task_data.model_dump(exclude_unset=True).items():
+            if value is not None:
+                # Format datetime to ISO string for JSON storage
+                if key == "deadline" and value:
+                    updated_task[key] = value.isoformat()
+                    updated_task["deadline_epoch"] = datetime_epoch(value)
+                else:
+                    updated_task[key] = value
+        return updated_task
+    
+    @staticmethod
+    def toggle_completion(existing_task: Dict) -> Dict:
+        """A copy of a stored task with its completion status toggled"""
+        return {**existing_task, "completed": not existing_task.get("completed", False)}
+    
+    def add_task(self, list_id: str, task_data: TaskCreate) -> Optional[Dict]:
+        """Add a task to a list"""
         # Add to database
-        added_task = db.add_task(list_id, task_dict)
+        added_task = self.db.add_task(list_id, self.build_task(task_data))
         return added_task
     
-    @staticmethod
-    def update_task(list_id: str, task_id: str, task_data: TaskUpdate) -> Optional[Dict]:
+    def update_task(self, list_id: str, task_id: str, task_data: TaskUpdate) -> Optional[Dict]:
         """Update a task"""
         # Get current task
-        existing_task = db.get_task(list_id, task_id)
+        existing_task = self.db.get_task(list_id, task_id)
         if not existing_task:
             return None
         
         # Update only provided fields
-        for key, value in task_data.model_dump(exclude_unset=True).items():
-            if value is not None:
-                # Format datetime to ISO string for JSON storage
-                if key == "deadline" and value:
-                    existing_task[key] = value.isoformat()
-                else:
-                    existing_task[key] = value
+        updated_task = self.apply_update(existing_task, task_data)
         
         # Update in database
-        updated_task = db.update_task(list_id, task_id, existing_task)
+        updated_task = self.db.update_task(list_id, task_id, updated_task)
         return updated_task
     
-    @staticmethod
-    def delete_task(list_id: str, task_id: str) -> bool:
+    def delete_task(self, list_id: str, task_id: str) -> bool:
         """Delete a task"""
-        return db.delete_task(list_id, task_id)
+        return self.db.delete_task(list_id, task_id)
     
-    @staticmethod
-    def toggle_task_completion(list_id: str, task_id: str) -> Optional[Dict]:
+    def toggle_task_completion(self, list_id: str, task_id: str) -> Optional[Dict]:
         """Toggle a task's completion status"""
         # Get current task
-        existing_task = db.get_task(list_id, task_id)
+        existing_task = self.db.get_task(list_id, task_id)
         if not existing_task:
             return None
         
         # Toggle completion
-        existing_task["completed"] = not existing_task.get("completed", False)
+        updated_task = self.toggle_completion(existing_task)
         
         # Update in database
-        updated_task = db.update_task(list_id, task_id, existing_task)
+        updated_task = self.db.update_task(list_id, task_id, updated_task)
         return updated_task
     
-    @staticmethod
-    def get_tasks_due_this_week() -> List[Dict]:
+    def get_tasks_due_this_week(self) -> List[Dict]:
         """Get all tasks due this week across all lists"""
-        return db.get_tasks_due_this_week()
+        return self.db.get_tasks_due_this_week()
     
-    @staticmethod
-    def get_tasks_ordered_by_deadline(list_id: str) -> List[Dict]:
+    def get_tasks_ordered_by_deadline(self, list_id: str) -> List[Dict]:
+        """Get tasks in a list ordered by deadline"""
+        return self.db.get_tasks_ordered_by_deadline(list_id)
+
+
+class AsyncTaskService:
+    """Async variant of TaskService whose storage calls never block the event loop"""
+    
+    def __init__(self, db: AsyncDatabase, uow: Optional[AsyncUnitOfWork] = None):
+        self.db = db
+        self.uow = uow or AsyncUnitOfWork(db)
+    
+    async def get_tasks(self, list_id: str) -> List[Dict]:
+        """Get all tasks in a list"""
+        return await self.db.get_tasks(list_id)
+    
+    async def get_task(self, list_id: str, task_id: str) -> Optional[Dict]:
+        """Get a specific task by ID"""
+        return await self.db.get_task(list_id, task_id)
+    
+    async def add_task(self, list_id: str, task_data: TaskCreate) -> Optional[Dict]:
+        """Add a task to a list"""
+        return await self.db.add_task(list_id, TaskService.build_task(task_data))
+    
+    async def update_task(self, list_id: str, task_id: str, task_data: TaskUpdate) -> Optional[Dict]:
+        """Update a task"""
+        return await self.uow.run(list_id, lambda work: TaskService(work).update_task(list_id, task_id, task_data))
+    
+    async def delete_task(self, list_id: str, task_id: str) -> bool:
+        """Delete a task"""
+        return await self.db.delete_task(list_id, task_id)
+    
+    async def toggle_task_completion(self, list_id: str, task_id: str) -> Optional[Dict]:
+        """Toggle a task's completion status"""
+        return await self.uow.run(list_id, lambda work: TaskService(work).toggle_task_completion(list_id, task_id))
+    
+    async def get_tasks_due_this_week(self) -> List[Dict]:
+        """Get all tasks due this week across all lists"""
+        return await self.db.get_tasks_due_this_week()
+    
+    async def get_tasks_ordered_by_deadline(self, list_id: str) -> List[Dict]:
         """Get tasks in a list ordered by deadline"""
-        return db.get_tasks_ordered_by_deadline(list_id)
+        return await self.db.get_tasks_ordered_by_deadline(list_id)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Compare the on-disk codecs: encode time, decode time and bytes on disk
+for a synthetic database of the given size
+"""
+
+import argparse
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from app.db.codecs import COMPRESSIONS, available_codecs, decode, encode, validate_compression
+
+def build_document(lists, tasks_per_list):
+    """Synthetic database shaped like the documents the API writes"""
+    now = datetime.now()
+    return {"lists": [
+        {
+            "id": str(uuid.uuid4()),
+            "name": f"List {i}",
+            "description": "Benchmark list",
+            "created_at": now.isoformat(),
+            "updated_at": now.isoformat(),
+            "tasks": [
+                {
+                    "id": str(uuid.uuid4()),
+                    "title": f"Task {j}",
+                    "description": "Benchmark task with a short description",
+                    "completed": j % 3 == 0,
+                    "priority": ("low", "medium", "high")[j % 3],
+                    "deadline": (now + timedelta(days=j % 30)).isoformat(),
+                    "created_at": now.isoformat(),
+                    "updated_at": now.isoformat(),
+                }
+                for j in range(tasks_per_list)
+            ],
+        }
+        for i in range(lists)
+    ]}
+
+def best_of(repeat, func, *args):
+    """Fastest of several runs in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func(*args)
+        timings.append((time.perf_counter() - start_time) * 1000)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the storage codecs")
+    parser.add_argument("--lists", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=200, help="tasks per list")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    document = build_document(args.lists, args.tasks)
+    print("="*60)
+    print(f"CODEC BENCHMARK: {args.lists} lists x {args.tasks} tasks")
+    print("="*60)
+    print(f"{'codec':<14}{'compression':<13}{'encode ms':>11}{'decode ms':>11}{'bytes':>11}")
+
+    for codec in available_codecs():
+        for compression in COMPRESSIONS:
+            try:
+                validate_compression(compression, codec)
+            except ValueError:
+                continue
+            content = encode(document, codec, compression)
+            encode_time = best_of(args.repeat, encode, document, codec, compression)
+            decode_time = best_of(args.repeat, decode, content)
+            print(f"{codec:<14}{compression:<13}{encode_time:>11.2f}{decode_time:>11.2f}{len(content):>11}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Compare the resident footprint of tasks held as plain dicts and as
+slotted TaskRecords, in bytes per task
+"""
+
+import argparse
+import tracemalloc
+
+from benchmark_codecs import build_document
+from app.db.codecs import decode, encode
+from app.db.deadline_index import stamp_deadline
+from app.db.task_record import FIELDS, TaskRecord
+
+def measure(tasks, wrap):
+    """Bytes allocated per task while the decoded tasks are held in memory"""
+    content = encode({"tasks": tasks}, "json_compact")
+    tracemalloc.start()
+    resident = [wrap(task) for task in decode(content)["tasks"]]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return allocated / len(resident)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the resident size of tasks")
+    parser.add_argument("--tasks", type=int, default=100000)
+    args = parser.parse_args()
+
+    # Only the fields the API stores, so that every field of a record lives in a slot
+    tasks = [
+        stamp_deadline({field: task[field] for field in FIELDS if field in task})
+        for task in build_document(1, args.tasks)["lists"][0]["tasks"]
+    ]
+    print("="*60)
+    print(f"MEMORY BENCHMARK: {args.tasks} tasks")
+    print("="*60)
+    dict_bytes = measure(tasks, dict)
+    record_bytes = measure(tasks, TaskRecord)
+    print(f"{'dict':<14}{dict_bytes:>11.0f} bytes/task")
+    print(f"{'TaskRecord':<14}{record_bytes:>11.0f} bytes/task")
+    print(f"Saved: {(1 - record_bytes / dict_bytes) * 100:.1f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import contextlib
+import asyncio
+import time
+import pytest
+from app.db.async_database import AsyncDatabase
+from app.db.memory_database import InMemoryDatabase
+from app.db.sharded_database import ShardedDatabase
+from app.schemas.task_schema import TaskCreate, TaskUpdate
+from app.services.task_service import AsyncTaskService
+
+class SlowWriteDatabase(InMemoryDatabase):
+    def add_task(self, list_id, task_data):
+        time.sleep(0.3)
+        return super().add_task(list_id, task_data)
+
+class CopyingDatabase(InMemoryDatabase):
+    """Hands out copies like the file backends, with a slow read to widen the race window"""
+    def get_task(self, list_id, task_id):
+        task = super().get_task(list_id, task_id)
+        time.sleep(0.05)
+        return dict(task) if task else None
+
+class TestAsyncDatabase:
+    def test_slow_write_does_not_block_reads(self):
+        db = SlowWriteDatabase()
+        db.create_list({"id": "list-1", "name": "Groceries"})
+        async_db = AsyncDatabase(db)
+
+        async def scenario():
+            write = asyncio.create_task(async_db.add_task("list-1", {"id": "task-1"}))
+            await asyncio.sleep(0.01)
+            started = time.perf_counter()
+            lists = await async_db.get_lists()
+            read_latency = time.perf_counter() - started
+            await write
+            return lists, read_latency
+
+        lists, read_latency = asyncio.run(scenario())
+        assert lists[0]["id"] == "list-1"
+        assert read_latency < 0.2
+
+    def test_async_task_service_round_trip(self):
+        db = InMemoryDatabase()
+        db.create_list({"id": "list-1", "name": "Groceries"})
+        service = AsyncTaskService(AsyncDatabase(db))
+
+        async def scenario():
+            task = await service.add_task("list-1", TaskCreate(title="Milk"))
+            await service.update_task("list-1", task["id"], TaskUpdate(title="Oat milk"))
+            return await service.toggle_task_completion("list-1", task["id"])
+
+        task = asyncio.run(scenario())
+        assert task["title"] == "Oat milk"
+        assert task["completed"] is True
+
+class TestWriteActor:
+    def test_concurrent_updates_are_not_lost(self):
+        db = CopyingDatabase()
+        db.create_list({"id": "list-1", "name": "Groceries"})
+        service = AsyncTaskService(AsyncDatabase(db))
+
+        async def scenario():
+            task = await service.add_task("list-1", TaskCreate(title="Milk"))
+            await asyncio.gather(
+                service.update_task("list-1", task["id"], TaskUpdate(title="Oat milk")),
+                service.toggle_task_completion("list-1", task["id"]),
+            )
+            return db.get_task("list-1", task["id"])
+
+        task = asyncio.run(scenario())
+        assert task["title"] == "Oat milk"
+        assert task["completed"] is True
+
+    def test_failed_mutation_does_not_stop_the_writer(self):
+        db = InMemoryDatabase()
+        async_db = AsyncDatabase(db)
+
+        def fail():
+            raise RuntimeError("rejected")
+
+        async def scenario():
+            with pytest.raises(RuntimeError, match="rejected"):
+                await async_db.mutate(None, fail)
+            return await async_db.create_list({"id": "list-1", "name": "Groceries"})
+
+        assert asyncio.run(scenario())["id"] == "list-1"
+        # A new event loop gets a new writer for the same backend
+        assert asyncio.run(async_db.delete_list("list-1")) is True
+
+    def test_collection_changes_run_one_at_a_time(self, tmp_path):
+        db = ShardedDatabase(tmp_path / "shards")
+        # Without its lock, so that only the collection lane keeps the manifest consistent
+        db._manifest_lock = contextlib.nullcontext()
+        async_db = AsyncDatabase(db)
+
+        async def scenario():
+            await asyncio.gather(*(
+                async_db.create_list({"id": f"list-{i}", "name": f"List {i}"}) for i in range(50)
+            ))
+            await asyncio.gather(*(async_db.delete_list(f"list-{i}") for i in range(0, 50, 2)))
+            return await async_db.get_lists()
+
+        assert len(asyncio.run(scenario())) == 25
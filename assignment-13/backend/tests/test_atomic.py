@@ -0,0 +1,66 @@
+import json
+import os
+import pytest
+from app.db import atomic
+from app.db.atomic import atomic_write, validate_durability
+from app.db.database import Database
+from app.db.wal import WriteAheadLog
+
+@pytest.fixture
+def fsync_calls(monkeypatch):
+    calls = []
+    real_fsync = os.fsync
+
+    def counting_fsync(fd):
+        calls.append(fd)
+        real_fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", counting_fsync)
+    return calls
+
+class TestAtomicWrite:
+    def test_replaces_content_without_leaving_temp_files(self, tmp_path):
+        target = tmp_path / "data.json"
+        target.write_text('{"lists": []}')
+        atomic_write(target, '{"lists": [1]}', "batch")
+        assert json.loads(target.read_text()) == {"lists": [1]}
+        assert os.listdir(tmp_path) == ["data.json"]
+
+    def test_failed_write_keeps_the_old_file(self, tmp_path, monkeypatch):
+        target = tmp_path / "data.json"
+        target.write_text('{"lists": []}')
+
+        def failing_replace(src, dst):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(atomic.os, "replace", failing_replace)
+        with pytest.raises(OSError):
+            atomic_write(target, '{"lists": [1]}', "none")
+        assert target.read_text() == '{"lists": []}'
+
+    def test_unknown_durability_is_rejected(self):
+        with pytest.raises(ValueError, match="Unknown durability level"):
+            validate_durability("sometimes")
+
+    def test_durability_none_skips_fsync(self, tmp_path, fsync_calls):
+        atomic_write(tmp_path / "data.json", "{}", "none")
+        WriteAheadLog(tmp_path / "data.wal", "none").append_many([{"op": "a"}, {"op": "b"}])
+        assert fsync_calls == []
+
+    def test_durability_batch_fsyncs_once_per_batch(self, tmp_path, fsync_calls):
+        WriteAheadLog(tmp_path / "data.wal", "batch").append_many([{"op": "a"}, {"op": "b"}])
+        assert len(fsync_calls) == 1
+
+    def test_durability_always_fsyncs_every_record(self, tmp_path, fsync_calls):
+        WriteAheadLog(tmp_path / "data.wal", "always").append_many([{"op": "a"}, {"op": "b"}])
+        assert len(fsync_calls) == 2
+
+class TestCorruptedSnapshot:
+    def test_corrupted_snapshot_is_not_treated_as_empty(self, tmp_path):
+        (tmp_path / "data.json").write_text('{"lists": [')
+        with pytest.raises(json.JSONDecodeError):
+            Database(tmp_path / "data.json", tmp_path / "data.wal")
+
+    def test_empty_snapshot_starts_a_fresh_database(self, tmp_path):
+        (tmp_path / "data.json").write_text("")
+        assert Database(tmp_path / "data.json", tmp_path / "data.wal").get_lists() == []
@@ -0,0 +1,52 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db import backends
+from app.db.backends import get_backend, get_db, register_backend
+from app.db.memory_database import InMemoryDatabase
+from app.api.routes.list_routes import auth_service as list_auth_service
+from app.api.routes.task_routes import auth_service as task_auth_service
+
+@pytest.fixture
+def memory_client():
+    memory_db = InMemoryDatabase()
+    app.dependency_overrides[get_db] = lambda: memory_db
+    app.dependency_overrides[list_auth_service.get_current_user] = lambda: {"username": "tester"}
+    app.dependency_overrides[task_auth_service.get_current_user] = lambda: {"username": "tester"}
+    yield TestClient(app), memory_db
+    app.dependency_overrides.clear()
+
+class TestBackendRegistry:
+    def test_builtin_backends_are_registered(self):
+        assert {"json", "optimized_json", "sharded_json", "sqlite", "memory"} <= set(backends.available_backends())
+
+    def test_backend_instances_are_shared(self):
+        assert get_backend("memory") is get_backend("memory")
+
+    def test_unknown_backend_is_rejected(self):
+        with pytest.raises(ValueError, match="Unknown storage backend"):
+            get_backend("does-not-exist")
+
+    def test_custom_backend_can_be_registered(self):
+        custom = InMemoryDatabase()
+        register_backend("custom", lambda: custom)
+        try:
+            assert get_backend("custom") is custom
+        finally:
+            backends._registry.pop("custom")
+            backends._instances.pop("custom", None)
+
+class TestInjectedBackend:
+    def test_routes_use_the_injected_backend(self, memory_client):
+        client, memory_db = memory_client
+        response = client.post("/api/lists/", json={"name": "Injected"})
+        assert response.status_code == 201
+        list_id = response.json()["id"]
+
+        response = client.post(f"/api/lists/{list_id}/tasks", json={"title": "Stored in memory"})
+        assert response.status_code == 201
+        task_id = response.json()["id"]
+
+        assert memory_db.get_task(list_id, task_id)["title"] == "Stored in memory"
+        response = client.patch(f"/api/lists/{list_id}/tasks/{task_id}/complete")
+        assert response.json()["completed"] is True
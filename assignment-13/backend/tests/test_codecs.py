@@ -0,0 +1,58 @@
+import json
+import pytest
+from app.core.config import settings
+from app.db.codecs import COMPRESSIONS, available_codecs, decode, encode, validate_codec, validate_compression
+from app.db.database import Database
+from app.db.migrate_codec import migrate
+from app.db.optimized_database import OptimizedDatabase
+
+DOCUMENT = {"lists": [{"id": "list-1", "name": "Encoded", "tasks": [{"id": "task-1", "title": "Ünïcode"}]}], "lsn": 3}
+
+class TestCodecs:
+    @pytest.mark.parametrize("compression", COMPRESSIONS)
+    @pytest.mark.parametrize("codec", available_codecs())
+    def test_round_trip_detects_the_format(self, codec, compression):
+        assert decode(encode(DOCUMENT, codec, compression)) == DOCUMENT
+
+    def test_legacy_pretty_json_is_read(self):
+        assert decode(json.dumps(DOCUMENT, indent=2).encode()) == DOCUMENT
+
+    def test_compact_json_is_smaller(self):
+        assert len(encode(DOCUMENT, "json_compact")) < len(encode(DOCUMENT, "json"))
+
+    def test_unknown_settings_are_rejected(self):
+        with pytest.raises(ValueError, match="Unknown storage codec"):
+            validate_codec("xml")
+        with pytest.raises(ValueError, match="Unknown storage compression"):
+            validate_compression("bzip2")
+
+class TestConfiguredCodec:
+    @pytest.mark.parametrize("engine", ["database", "optimized"])
+    def test_snapshot_uses_the_configured_codec(self, tmp_path, monkeypatch, engine):
+        monkeypatch.setattr(settings, "STORAGE_CODEC", "json_compact")
+        monkeypatch.setattr(settings, "STORAGE_COMPRESSION", "gzip")
+        db_file = tmp_path / "data.json"
+        db_file.write_text(json.dumps({"lists": []}, indent=2))
+        if engine == "database":
+            database = Database(db_file, tmp_path / "data.wal")
+        else:
+            database = OptimizedDatabase(db_file)
+
+        data = {"lists": [{"id": "list-1", "name": "Compressed", "tasks": []}]}
+        if engine == "database":
+            # Snapshots of the logged database are only written by compaction
+            database.create_list(data["lists"][0])
+            database.compact()
+            data["lsn"] = database.lsn
+        else:
+            database.write_db(data)
+        assert db_file.read_bytes() == encode(data, "json_compact", "gzip")
+
+    def test_migration_rewrites_the_snapshot(self, tmp_path):
+        db_file = tmp_path / "data.json"
+        db_file.write_text(json.dumps(DOCUMENT, indent=2))
+
+        before, after = migrate(db_file, "json_compact", "zlib", "none")
+        assert after < before
+        assert db_file.read_bytes() == encode(DOCUMENT, "json_compact", "zlib")
+        assert Database(db_file, tmp_path / "data.wal").get_list("list-1")["name"] == "Encoded"
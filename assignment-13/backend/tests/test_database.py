@@ -0,0 +1,373 @@
+import itertools
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+import pytest
+from app.core.config import settings
+from app.db import versioned_state
+from app.db.database import Database
+
+@pytest.fixture
+def database(tmp_path):
+    return Database(tmp_path / "data.json", tmp_path / "data.wal")
+
+class TestWriteAheadLog:
+    def test_mutations_are_appended_to_the_log(self, database, tmp_path):
+        database.create_list({"id": "list-1", "name": "Groceries"})
+        database.add_task("list-1", {"id": "task-1", "title": "Milk"})
+
+        # The snapshot is untouched, only the log grows
+        with open(tmp_path / "data.json") as f:
+            assert json.load(f) == {"lists": []}
+        with open(tmp_path / "data.wal") as f:
+            records = [json.loads(line) for line in f]
+        assert [record["op"] for record in records] == ["create_list", "add_task"]
+        assert database.get_task("list-1", "task-1")["title"] == "Milk"
+
+    def test_log_is_replayed_on_startup(self, database, tmp_path):
+        database.create_list({"id": "list-1", "name": "Groceries"})
+        database.add_task("list-1", {"id": "task-1", "title": "Milk"})
+        database.update_task("list-1", "task-1", {"id": "task-1", "title": "Oat milk"})
+        database.add_task("list-1", {"id": "task-2", "title": "Bread"})
+        database.delete_task("list-1", "task-2")
+
+        reopened = Database(tmp_path / "data.json", tmp_path / "data.wal")
+        tasks = reopened.get_tasks("list-1")
+        assert [task["title"] for task in tasks] == ["Oat milk"]
+
+    def test_numbering_continues_after_a_compacted_log(self, database, tmp_path):
+        database.create_list({"id": "list-1", "name": "Groceries"})
+        database.add_task("list-1", {"id": "task-1", "title": "Milk"})
+        database.compact()
+
+        reopened = Database(tmp_path / "data.json", tmp_path / "data.wal")
+        reopened.add_task("list-1", {"id": "task-2", "title": "Bread"})
+        assert reopened.lsn == 3
+
+        reopened = Database(tmp_path / "data.json", tmp_path / "data.wal")
+        assert [task["id"] for task in reopened.get_tasks("list-1")] == ["task-1", "task-2"]
+
+    def test_appends_after_a_torn_tail_survive_a_restart(self, database, tmp_path):
+        database.create_list({"id": "list-1", "name": "Groceries"})
+        with open(tmp_path / "data.wal", "a") as f:
+            f.write('{"lsn":2,"op":"add_ta')
+
+        reopened = Database(tmp_path / "data.json", tmp_path / "data.wal")
+        reopened.add_task("list-1", {"id": "task-1", "title": "Milk"})
+
+        reopened = Database(tmp_path / "data.json", tmp_path / "data.wal")
+        assert reopened.get_task("list-1", "task-1")["title"] == "Milk"
+        assert reopened._wal.record_count == 2
+
+    def test_failed_mutations_are_not_logged(self, database):
+        assert database.add_task("missing", {"id": "task-1", "title": "Milk"}) is None
+        assert database.delete_list("missing") is False
+        assert database._wal.record_count == 0
+
+    def test_compaction_folds_log_into_snapshot(self, database, tmp_path):
+        database.create_list({"id": "list-1", "name": "Groceries"})
+        database.add_task("list-1", {"id": "task-1", "title": "Milk"})
+        database.compact()
+
+        assert database._wal.record_count == 0
+        with open(tmp_path / "data.json") as f:
+            snapshot = json.load(f)
+        assert snapshot["lists"][0]["tasks"][0]["title"] == "Milk"
+
+        # Records written after compaction are replayed on top of the snapshot
+        database.add_task("list-1", {"id": "task-2", "title": "Bread"})
+        reopened = Database(tmp_path / "data.json", tmp_path / "data.wal")
+        assert [task["id"] for task in reopened.get_tasks("list-1")] == ["task-1", "task-2"]
+
+    def test_failed_append_is_never_published(self, database, tmp_path, monkeypatch):
+        database.create_list({"id": "list-1", "name": "Groceries"})
+
+        def fail(record):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(database._wal, "append", fail)
+        with pytest.raises(OSError):
+            database.add_task("list-1", {"id": "task-1", "title": "Milk"})
+        assert database.get_tasks("list-1") == []
+
+        monkeypatch.undo()
+        database.compact()
+        reopened = Database(tmp_path / "data.json", tmp_path / "data.wal")
+        assert reopened.get_tasks("list-1") == []
+
+class TestResidentIndexes:
+    def test_task_positions_follow_deletes(self, database):
+        database.create_list({"id": "list-1", "name": "Groceries"})
+        for task_id in ("task-1", "task-2", "task-3"):
+            database.add_task("list-1", {"id": task_id, "title": task_id})
+
+        assert database.delete_task("list-1", "task-1") is True
+        assert database.get_task("list-1", "task-1") is None
+        assert database.get_task("list-1", "task-3")["title"] == "task-3"
+        assert database.delete_task("list-1", "task-1") is False
+
+    def test_get_task_checks_the_owning_list(self, database):
+        database.create_list({"id": "list-1", "name": "Groceries"})
+        database.create_list({"id": "list-2", "name": "Chores"})
+        database.add_task("list-1", {"id": "task-1", "title": "Milk"})
+
+        assert database.get_task("list-2", "task-1") is None
+        assert database.update_task("list-2", "task-1", {"id": "task-1"}) is None
+
+    def test_update_list_keeps_tasks_indexed(self, database):
+        database.create_list({"id": "list-1", "name": "Groceries"})
+        database.add_task("list-1", {"id": "task-1", "title": "Milk"})
+
+        updated = database.update_list("list-1", {"id": "list-1", "name": "Shopping"})
+        assert updated["name"] == "Shopping"
+        assert database.get_list("list-1")["tasks"][0]["id"] == "task-1"
+        assert database.get_task("list-1", "task-1")["title"] == "Milk"
+
+    def test_delete_list_drops_its_tasks(self, database):
+        database.create_list({"id": "list-1", "name": "Groceries"})
+        database.add_task("list-1", {"id": "task-1", "title": "Milk"})
+
+        assert database.delete_list("list-1") is True
+        assert database.get_list("list-1") is None
+        assert database.get_task("list-1", "task-1") is None
+        assert database.get_lists() == []
+
+class TestGroupCommit:
+    @pytest.fixture
+    def grouped_database(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "GROUP_COMMIT_ENABLED", True)
+        return Database(tmp_path / "data.json", tmp_path / "data.wal")
+
+    def test_concurrent_writes_share_batches(self, grouped_database, tmp_path, monkeypatch):
+        for i in range(20):
+            grouped_database.create_list({"id": f"list-{i}", "name": f"List {i}"})
+        batches = []
+        append_many = grouped_database._wal.append_many
+
+        def counting_append_many(records):
+            batches.append(len(records))
+            # A slow fsync, during which the other writers queue up
+            time.sleep(0.05)
+            return append_many(records)
+
+        monkeypatch.setattr(grouped_database._wal, "append_many", counting_append_many)
+
+        threads = [
+            threading.Thread(target=grouped_database.add_task,
+                             args=(f"list-{i}", {"id": f"task-{i}", "title": f"Task {i}"}))
+            for i in range(20)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sum(batches) == 20
+        assert len(batches) < 20
+        reopened = Database(tmp_path / "data.json", tmp_path / "data.wal")
+        assert sum(len(reopened.get_tasks(f"list-{i}")) for i in range(20)) == 20
+
+    def test_failed_append_is_never_published(self, grouped_database, tmp_path, monkeypatch):
+        grouped_database.create_list({"id": "list-1", "name": "Groceries"})
+
+        def fail(records):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(grouped_database._wal, "append_many", fail)
+        with pytest.raises(OSError):
+            grouped_database.add_task("list-1", {"id": "task-1", "title": "Milk"})
+        assert grouped_database.get_tasks("list-1") == []
+
+    def test_compaction_waits_for_pending_batches(self, grouped_database, tmp_path):
+        grouped_database.create_list({"id": "list-1", "name": "Groceries"})
+        grouped_database.add_task("list-1", {"id": "task-1", "title": "Milk"})
+        grouped_database.compact()
+
+        reopened = Database(tmp_path / "data.json", tmp_path / "data.wal")
+        assert [task["id"] for task in reopened.get_tasks("list-1")] == ["task-1"]
+
+def run_in_thread(func, *args):
+    """Start func on a thread and return the thread, which finishes when func does"""
+    thread = threading.Thread(target=func, args=args, daemon=True)
+    thread.start()
+    return thread
+
+class TestLockStriping:
+    @pytest.fixture
+    def lists(self, database):
+        # Two lists whose locks are different stripes
+        busy = "list-a"
+        free = next(
+            f"list-{i}" for i in itertools.count() if database._list_lock(f"list-{i}") is not database._list_lock(busy)
+        )
+        for list_id in (busy, free):
+            database.create_list({"id": list_id, "name": list_id})
+        return busy, free
+
+    def test_writes_to_other_lists_do_not_wait(self, database, lists):
+        busy, free = lists
+        with database._list_lock(busy):
+            writer = run_in_thread(database.add_task, free, {"id": "task-1", "title": "Milk"})
+            writer.join(timeout=2)
+            assert not writer.is_alive()
+        assert database.get_task(free, "task-1")["title"] == "Milk"
+
+    def test_writes_to_the_same_list_wait(self, database, lists):
+        busy, _ = lists
+        with database._list_lock(busy):
+            writer = run_in_thread(database.add_task, busy, {"id": "task-1", "title": "Milk"})
+            writer.join(timeout=0.1)
+            assert writer.is_alive()
+        writer.join(timeout=2)
+        assert database.get_task(busy, "task-1")["title"] == "Milk"
+
+    def test_collection_changes_wait_for_the_collection_lock(self, database, lists):
+        busy, free = lists
+        with database._collection_lock:
+            deleter = run_in_thread(database.delete_list, free)
+            writer = run_in_thread(database.add_task, busy, {"id": "task-1", "title": "Milk"})
+            writer.join(timeout=2)
+            assert not writer.is_alive()
+            deleter.join(timeout=0.1)
+            assert deleter.is_alive()
+        deleter.join(timeout=2)
+        assert database.get_list(free) is None
+
+class TestVersions:
+    def test_held_snapshot_does_not_see_later_writes(self, database):
+        database.create_list({"id": "list-1", "name": "Groceries"})
+        database.add_task("list-1", {"id": "task-1", "title": "Milk"})
+        snapshot = database.snapshot()
+
+        database.update_task("list-1", "task-1", {"id": "task-1", "title": "Oat milk"})
+        database.add_task("list-1", {"id": "task-2", "title": "Bread"})
+        database.delete_list("list-1")
+
+        assert [task["title"] for task in snapshot.get_tasks("list-1")] == ["Milk"]
+        assert snapshot.get_lists()[0]["name"] == "Groceries"
+        assert database.get_lists() == []
+
+    def test_versions_share_unchanged_structure(self, database):
+        database.create_list({"id": "list-1", "name": "Groceries"})
+        database.create_list({"id": "list-2", "name": "Chores"})
+        database.add_task("list-2", {"id": "task-1", "title": "Dishes"})
+        before = database.snapshot()
+
+        database.add_task("list-2", {"id": "task-2", "title": "Laundry"})
+        after = database.snapshot()
+        assert after.lists["list-1"] is before.lists["list-1"]
+        assert after.get_task("list-2", "task-1") is before.get_task("list-2", "task-1")
+        assert [lst["id"] for lst in after.get_lists()] == ["list-1", "list-2"]
+
+    def test_reads_do_not_wait_for_writers(self, database):
+        database.create_list({"id": "list-1", "name": "Groceries"})
+        read = []
+        with database._exclusive():
+            reader = run_in_thread(lambda: read.append(database.get_tasks_due_this_week() + database.get_lists()))
+            reader.join(timeout=2)
+            assert not reader.is_alive()
+        assert read[0][0]["id"] == "list-1"
+
+class TestTombstones:
+    @pytest.fixture
+    def tasks(self, database, monkeypatch):
+        # Vacuum only on demand
+        monkeypatch.setattr(settings, "VACUUM_MIN_GARBAGE", 10 ** 9)
+        database.create_list({"id": "list-1", "name": "Groceries"})
+        deadline = (datetime.now() + timedelta(days=1)).isoformat()
+        for i in range(4):
+            database.add_task("list-1", {"id": f"task-{i}", "title": f"Task {i}", "deadline": deadline})
+
+    def test_deleted_tasks_are_hidden_from_reads(self, database, tasks):
+        assert database.delete_task("list-1", "task-1") is True
+        assert database.delete_task("list-1", "task-1") is False
+
+        assert database.get_task("list-1", "task-1") is None
+        assert [task["id"] for task in database.get_tasks("list-1")] == ["task-0", "task-2", "task-3"]
+        assert [task["id"] for task in database.get_lists()[0]["tasks"]] == ["task-0", "task-2", "task-3"]
+        assert [task["id"] for task in database.get_tasks_due_this_week()] == ["task-0", "task-2", "task-3"]
+        assert [task["id"] for task in database.get_tasks_ordered_by_deadline("list-1")] == ["task-0", "task-2", "task-3"]
+        assert None not in database.read_db()["lists"][0]["tasks"]
+
+    def test_delete_leaves_other_positions_alone(self, database, tasks):
+        before = database.snapshot().lists["list-1"]
+        database.delete_task("list-1", "task-0")
+        version = database.snapshot().lists["list-1"]
+
+        assert version.slots[0] is None
+        # Shared with the previous version, the deleted task's entry is skipped on read
+        assert version.positions is before.positions and version.deadlines is before.deadlines
+        assert version.position("task-0") is None
+        database.update_task("list-1", "task-3", {"id": "task-3", "title": "Renamed"})
+        database.add_task("list-1", {"id": "task-4", "title": "Task 4"})
+        assert [task["title"] for task in database.get_tasks("list-1")] == ["Task 1", "Task 2", "Renamed", "Task 4"]
+
+    def test_delete_copies_one_chunk(self, database, tasks, monkeypatch):
+        monkeypatch.setattr(versioned_state, "CHUNK_SIZE", 2)
+        database.create_list({"id": "list-2", "name": "Chunked",
+                              "tasks": [{"id": f"task-{i}", "title": f"Task {i}"} for i in range(5)]})
+        before = database.snapshot().lists["list-2"]
+        database.get_tasks("list-2")
+        database.delete_task("list-2", "task-3")
+        version = database.snapshot().lists["list-2"]
+
+        assert [chunk is before.chunks[index] for index, chunk in enumerate(version.chunks)] == [True, False, True]
+        assert [task["id"] for task in database.get_tasks("list-2")] == ["task-0", "task-1", "task-2", "task-4"]
+        database.update_task("list-2", "task-4", {"id": "task-4", "title": "Renamed"})
+        database.add_task("list-2", {"id": "task-5", "title": "Task 5"})
+        assert [task["title"] for task in database.get_tasks("list-2")] == [
+            "Task 0", "Task 1", "Task 2", "Renamed", "Task 5"
+        ]
+        assert database.snapshot().lists["list-2"].vacuumed().tasks == database.get_tasks("list-2")
+
+    def test_deleted_id_can_be_added_again(self, database, tasks):
+        database.delete_task("list-1", "task-1")
+        deadline = (datetime.now() + timedelta(days=2)).isoformat()
+        database.add_task("list-1", {"id": "task-1", "title": "Again", "deadline": deadline})
+
+        assert database.get_task("list-1", "task-1")["title"] == "Again"
+        assert [task["id"] for task in database.get_tasks_due_this_week()] == ["task-0", "task-2", "task-3", "task-1"]
+        assert [task["id"] for task in database.get_tasks_ordered_by_deadline("list-1")] == [
+            "task-0", "task-2", "task-3", "task-1"
+        ]
+
+    def test_large_lists_are_vacuumed_at_the_cap(self, database, tasks, monkeypatch):
+        monkeypatch.setattr(settings, "VACUUM_MIN_GARBAGE", 1)
+        monkeypatch.setattr(settings, "VACUUM_MAX_GARBAGE", 2)
+        scheduled = []
+        monkeypatch.setattr(database, "_schedule_vacuum", scheduled.append)
+        for i in range(4, 100):
+            database.add_task("list-1", {"id": f"task-{i}", "title": f"Task {i}"})
+        database.delete_task("list-1", "task-0")
+        assert scheduled == []
+        database.delete_task("list-1", "task-1")
+        assert scheduled == ["list-1"]
+
+    def test_vacuum_purges_tombstones_in_the_background(self, database, tasks, monkeypatch):
+        monkeypatch.setattr(settings, "VACUUM_MIN_GARBAGE", 2)
+        monkeypatch.setattr(settings, "VACUUM_GARBAGE_RATIO", 0.5)
+        database.delete_task("list-1", "task-0")
+        assert database.garbage_stats()["tombstones"] == 1
+        assert database.garbage_stats()["garbage_ratio"] == 0.25
+
+        database.delete_task("list-1", "task-2")
+        for _ in range(200):
+            if database.garbage_stats()["tombstones"] == 0:
+                break
+            time.sleep(0.01)
+        stats = database.garbage_stats()
+        assert stats["tombstones"] == 0
+        assert stats["task_slots"] == 2
+        assert (stats["vacuums"], stats["purged_tombstones"]) == (1, 2)
+        assert [task["id"] for task in database.get_tasks("list-1")] == ["task-1", "task-3"]
+        assert database.get_task("list-1", "task-3")["title"] == "Task 3"
+
+    def test_tombstones_are_not_persisted(self, database, tasks, tmp_path):
+        database.delete_task("list-1", "task-0")
+        database.compact()
+        database.delete_task("list-1", "task-1")
+
+        reopened = Database(tmp_path / "data.json", tmp_path / "data.wal")
+        assert [task["id"] for task in reopened.get_tasks("list-1")] == ["task-2", "task-3"]
+        assert reopened.garbage_stats()["tombstones"] == 1
@@ -0,0 +1,116 @@
+import json
+import pytest
+from datetime import datetime, timedelta
+from app.db import deadline_index
+from app.db.database import Database
+from app.db.deadline_index import DeadlineIndex, day_start_epoch, deadline_epoch, stamp_deadline, this_week_epochs
+from app.db.migrate_deadlines import migrate
+from app.db.optimized_database import OptimizedDatabase
+from app.schemas.task_schema import TaskCreate
+from app.services.task_service import TaskService
+
+def deadline_in(days):
+    return (datetime.now() + timedelta(days=days)).isoformat()
+
+@pytest.fixture(params=["database", "optimized"])
+def database(request, tmp_path):
+    if request.param == "database":
+        return Database(tmp_path / "data.json", tmp_path / "data.wal")
+    return OptimizedDatabase(tmp_path / "data.json")
+
+class TestDeadlineIndex:
+    def test_deadline_epoch_handles_missing_and_invalid_values(self):
+        assert deadline_epoch(None) is None
+        assert deadline_epoch("not a date") is None
+        assert deadline_epoch("1970-01-01T00:00:10Z") == 10
+
+    def test_entries_stay_sorted_through_updates(self):
+        index = DeadlineIndex()
+        index.add("list-1", {"id": "a", "deadline": "2030-01-03T00:00:00Z"})
+        index.add("list-1", {"id": "b", "deadline": "2030-01-01T00:00:00Z"})
+        index.add("list-2", {"id": "c", "deadline": "2030-01-02T00:00:00Z"})
+        assert index.ordered("list-1") == ["b", "a"]
+
+        index.update("list-1", {"id": "a", "deadline": "2029-12-31T00:00:00Z"})
+        assert index.ordered("list-1") == ["a", "b"]
+
+        index.remove("b")
+        index.remove_list("list-2")
+        assert "b" not in index and "c" not in index
+        assert len(index) == 1
+
+    def test_stored_epoch_is_used_without_parsing(self):
+        index = DeadlineIndex()
+        index.add("list-1", {"id": "a", "deadline": "display only", "deadline_epoch": 10})
+        assert index.range(10, 11) == [("list-1", "a")]
+        assert stamp_deadline({"deadline": "1970-01-01T00:00:10Z"})["deadline_epoch"] == 10
+
+    def test_range_is_half_open(self):
+        index = DeadlineIndex()
+        index.add("list-1", {"id": "a", "deadline": "1970-01-01T00:00:10Z"})
+        index.add("list-1", {"id": "b", "deadline": "1970-01-01T00:00:20Z"})
+        assert index.range(10, 20) == [("list-1", "a")]
+        assert index.range(0, 21) == [("list-1", "a"), ("list-1", "b")]
+
+    def test_this_week_runs_to_the_end_of_the_7th_day(self):
+        start, end = this_week_epochs()
+        today = datetime.now().date()
+        assert start == day_start_epoch(today)
+        assert end == day_start_epoch(today + timedelta(days=8))
+
+class TestDeadlineQueries:
+    def test_ordered_and_due_this_week(self, database):
+        database.create_list({"id": "list-1", "name": "Groceries"})
+        database.add_task("list-1", {"id": "later", "deadline": deadline_in(5)})
+        database.add_task("list-1", {"id": "none", "deadline": None})
+        database.add_task("list-1", {"id": "soon", "deadline": deadline_in(1)})
+        database.add_task("list-1", {"id": "next-month", "deadline": deadline_in(30)})
+
+        ordered = database.get_tasks_ordered_by_deadline("list-1")
+        assert [task["id"] for task in ordered] == ["soon", "later", "next-month", "none"]
+
+        due = database.get_tasks_due_this_week()
+        assert [task["id"] for task in due] == ["soon", "later"]
+        assert due[0]["list_name"] == "Groceries"
+
+    def test_index_follows_updates_and_deletes(self, database):
+        database.create_list({"id": "list-1", "name": "Groceries"})
+        database.add_task("list-1", {"id": "a", "deadline": deadline_in(1)})
+        database.add_task("list-1", {"id": "b", "deadline": deadline_in(2)})
+
+        database.update_task("list-1", "a", {"id": "a", "deadline": deadline_in(20)})
+        database.delete_task("list-1", "b")
+        assert database.get_tasks_due_this_week() == []
+        assert [task["id"] for task in database.get_tasks_ordered_by_deadline("list-1")] == ["a"]
+
+    def test_queries_compare_stored_epochs(self, database, monkeypatch):
+        database.create_list({"id": "list-1", "name": "Groceries"})
+        database.add_task("list-1", TaskService.build_task(TaskCreate(title="Soon", deadline=deadline_in(1))))
+        database.add_task("list-1", {"id": "later", "deadline": deadline_in(2)})
+
+        def fail(deadline):
+            raise AssertionError("deadline was parsed")
+        monkeypatch.setattr(deadline_index, "deadline_epoch", fail)
+        database.add_task("list-1", {"id": "stamped", "deadline": deadline_in(3), "deadline_epoch": None})
+        assert [task.get("title") for task in database.get_tasks_due_this_week()] == ["Soon", None]
+        assert len(database.get_tasks_ordered_by_deadline("list-1")) == 3
+
+    def test_date_range(self, tmp_path):
+        database = OptimizedDatabase(tmp_path / "data.json")
+        database.create_list({"id": "list-1", "name": "Groceries"})
+        database.add_task("list-1", {"id": "a", "deadline": "2030-01-01T12:00:00"})
+        database.add_task("list-1", {"id": "b", "deadline": "2030-01-05T12:00:00"})
+
+        in_range = database.get_tasks_by_date_range(datetime(2030, 1, 1), datetime(2030, 1, 1, 12))
+        assert [task["id"] for task in in_range] == ["a"]
+
+class TestMigration:
+    def test_legacy_snapshot_gets_epochs(self, tmp_path):
+        path = tmp_path / "data.json"
+        tasks = [{"id": "a", "deadline": "1970-01-01T00:00:10Z"}, {"id": "b"}]
+        path.write_text(json.dumps({"lists": [{"id": "list-1", "tasks": tasks}]}))
+
+        assert migrate(path) == 2
+        migrated = json.loads(path.read_text())["lists"][0]["tasks"]
+        assert [task["deadline_epoch"] for task in migrated] == [10, None]
+        assert migrate(path) == 0
@@ -1,14 +1,24 @@
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.schemas.list_schema import ListResponse
 import uuid
 
 client = TestClient(app)
 
+def test_list_response_omits_storage_fields():
+    stored = {"id": "list-1", "name": "Groceries", "tasks": [
+        {"id": "task-1", "title": "Milk", "deadline": "2030-01-01T00:00:00", "deadline_epoch": 1893456000}
+    ]}
+    task = ListResponse.model_validate(stored).model_dump()["tasks"][0]
+    assert task["title"] == "Milk"
+    assert "deadline_epoch" not in task
+
 def test_root():
     response = client.get("/")
     assert response.status_code == 200
     assert "Todo List API is running" in response.json()["message"]
+    assert response.json()["garbage"]["tombstones"] >= 0
 
 class TestListAPI:
     def test_create_list(self):
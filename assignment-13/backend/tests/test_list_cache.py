@@ -0,0 +1,33 @@
+from app.db.list_cache import ListCache
+
+class TestListCache:
+    def test_least_recently_used_lists_are_evicted_first(self):
+        evicted = []
+        cache = ListCache(budget=250, on_evict=evicted.append)
+        for list_id in ("a", "b", "c"):
+            cache.put(list_id, {"id": list_id}, 100)
+        assert evicted == ["a"]
+
+        cache.get("b")
+        cache.put("d", {"id": "d"}, 100)
+        assert evicted == ["a", "c"]
+        assert cache.stats()["resident_bytes"] == 200
+
+    def test_pinned_lists_are_kept_until_unpinned(self):
+        cache = ListCache(budget=100)
+        cache.put("a", {"id": "a"}, 100, pinned=True)
+        cache.put("b", {"id": "b"}, 100)
+        assert "a" in cache and "b" in cache
+
+        cache.get("b")
+        cache.unpin_all()
+        assert "a" not in cache and "b" in cache
+
+    def test_counters_survive_clear(self):
+        cache = ListCache()
+        cache.put("a", {"id": "a"}, 10)
+        cache.get("a")
+        cache.get("missing")
+        cache.clear()
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["resident_lists"]) == (1, 1, 0)
@@ -0,0 +1,152 @@
+import json
+import time
+import pytest
+from datetime import datetime, timedelta
+from app.core.config import settings
+from app.db import optimized_database
+from app.db.file_watcher import FileWatcher
+from app.db.optimized_database import OptimizedDatabase
+
+def write_externally(path, lists):
+    path.write_text(json.dumps({"lists": lists}))
+
+def read_file(database):
+    return json.loads(database.db_file.read_text())
+
+def forbid_parsing(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("cache was reloaded")
+    monkeypatch.setattr(optimized_database, "decode", fail)
+
+@pytest.fixture
+def database(tmp_path):
+    return OptimizedDatabase(tmp_path / "data.json")
+
+class TestCacheCoherence:
+    def test_external_write_is_seen_on_next_read(self, database):
+        database.create_list({"id": "list-1", "name": "Before", "tasks": []})
+        assert database.get_list("list-1")["name"] == "Before"
+
+        write_externally(database.db_file, [{"id": "list-1", "name": "Renamed", "tasks": []}])
+        assert database.get_list("list-1")["name"] == "Renamed"
+
+    def test_unchanged_file_is_not_parsed_again(self, database, monkeypatch):
+        database.create_list({"id": "list-1", "name": "Cached", "tasks": []})
+        database.get_lists()
+        forbid_parsing(monkeypatch)
+        assert database.get_list("list-1")["name"] == "Cached"
+
+    def test_reload_drops_indexes_of_the_previous_document(self, database):
+        database.create_list({"id": "list-1", "name": "Old", "tasks": []})
+        database.get_list("list-1")
+        database.get_tasks_due_this_week()
+
+        write_externally(database.db_file, [{"id": "list-2", "name": "New", "tasks": []}])
+        assert database.get_lists()[0]["id"] == "list-2"
+        assert database.get_list("list-1") is None
+
+class TestWriteThrough:
+    def test_mutations_keep_the_cache_hot(self, database, monkeypatch):
+        database.create_list({"id": "list-1", "name": "Hot", "tasks": []})
+        database.get_tasks_due_this_week()
+        forbid_parsing(monkeypatch)
+
+        deadline = (datetime.now() + timedelta(days=1)).isoformat()
+        database.add_task("list-1", {"id": "task-1", "title": "Due soon", "deadline": deadline})
+        database.update_task("list-1", "task-1", {"id": "task-1", "title": "Renamed", "deadline": deadline})
+        database.create_list({"id": "list-2", "name": "Second", "tasks": []})
+        assert [task["title"] for task in database.get_tasks_due_this_week()] == ["Renamed"]
+        assert database.get_list("list-2")["name"] == "Second"
+
+        assert database.delete_task("list-1", "task-1") is True
+        assert database.delete_list("list-2") is True
+        assert database.get_tasks_due_this_week() == []
+        assert database.get_list("list-2") is None
+
+    def test_sync_mode_writes_every_mutation(self, database):
+        database.create_list({"id": "list-1", "name": "Persisted", "tasks": []})
+        database.update_list("list-1", {"id": "list-1", "name": "Renamed"})
+        assert read_file(database)["lists"] == [{"id": "list-1", "name": "Renamed", "tasks": []}]
+
+    def test_background_mode_persists_on_flush(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "OPTIMIZED_PERSIST_MODE", "background")
+        database = OptimizedDatabase(tmp_path / "data.json")
+        for i in range(20):
+            database.create_list({"id": f"list-{i}", "name": "Queued", "tasks": []})
+        assert len(database.get_lists()) == 20
+
+        database.flush()
+        assert len(read_file(database)["lists"]) == 20
+        assert database._is_cache_valid()
+
+    def test_unknown_persist_mode_is_rejected(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "OPTIMIZED_PERSIST_MODE", "eventually")
+        with pytest.raises(ValueError, match="Unknown persist mode"):
+            OptimizedDatabase(tmp_path / "data.json")
+
+class TestTaskIndex:
+    def test_index_follows_adds_updates_and_deletes(self, database):
+        database.create_list({"id": "list-1", "name": "Indexed", "tasks": []})
+        for i in range(5):
+            database.add_task("list-1", {"id": f"task-{i}", "title": f"Task {i}"})
+        database.update_task("list-1", "task-3", {"id": "task-3", "title": "Updated"})
+        assert database.delete_task("list-1", "task-1") is True
+        assert database.delete_task("list-1", "task-1") is False
+
+        assert database.get_task("list-1", "task-1") is None
+        assert database.get_task("list-1", "task-3")["title"] == "Updated"
+        assert database.get_task("list-1", "task-4")["title"] == "Task 4"
+        assert database.get_task("list-2", "task-4") is None
+
+    def test_index_is_built_once_per_list(self, database):
+        database.create_list({"id": "list-1", "name": "Indexed", "tasks": [{"id": "task-1", "title": "Stored"}]})
+        database.get_task("list-1", "task-1")
+        task_index = database._cache['task_indexes']["list-1"]
+
+        database.get_task("list-1", "task-1")
+        assert database._cache['task_indexes']["list-1"] is task_index
+
+    def test_external_write_rebuilds_the_index(self, database):
+        database.create_list({"id": "list-1", "name": "Indexed", "tasks": [{"id": "task-1", "title": "Old"}]})
+        assert database.get_task("list-1", "task-1")["title"] == "Old"
+
+        write_externally(database.db_file, [{"id": "list-1", "name": "Indexed", "tasks": [
+            {"id": "task-0", "title": "Inserted"}, {"id": "task-1", "title": "Moved"},
+        ]}])
+        assert database.get_task("list-1", "task-1")["title"] == "Moved"
+
+class TestFileWatcher:
+    def test_change_is_reported(self, tmp_path):
+        path = tmp_path / "data.json"
+        write_externally(path, [])
+        changes = []
+        watcher = FileWatcher(path, 0.01, lambda: changes.append(True)).start()
+        try:
+            write_externally(path, [{"id": "list-1", "name": "Changed", "tasks": []}])
+            deadline = time.time() + 2
+            while not changes and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            watcher.stop()
+        assert changes
+
+    def test_failing_handler_keeps_watching(self, tmp_path):
+        path = tmp_path / "data.json"
+        write_externally(path, [])
+        calls = []
+
+        def on_change():
+            calls.append(True)
+            if len(calls) == 1:
+                raise ValueError("unreadable")
+
+        watcher = FileWatcher(path, 0.01, on_change).start()
+        try:
+            write_externally(path, [{"id": "list-1", "name": "Changed", "tasks": []}])
+            deadline = time.time() + 2
+            while len(calls) < 2 and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            watcher.stop()
+        # The failed change is reported again
+        assert len(calls) >= 2
@@ -0,0 +1,114 @@
+import pytest
+from fastapi.testclient import TestClient
+from app import replica as replica_app
+from app.api.routes import list_routes, task_routes
+from app.core.config import settings
+from app.db.database import Database
+from app.db.replica import ReplicaDatabase
+from app.main import app as primary_app
+
+@pytest.fixture
+def primary(tmp_path):
+    return Database(tmp_path / "data.json", tmp_path / "data.wal")
+
+@pytest.fixture
+def replica(primary, tmp_path):
+    replica = ReplicaDatabase(tmp_path / "data.json", tmp_path / "data.wal", interval=0)
+    yield replica
+    replica.close()
+
+@pytest.fixture
+def client(replica, monkeypatch):
+    monkeypatch.setattr(replica_app, "_replica", replica)
+    overrides = {
+        list_routes.auth_service.get_current_user: lambda: {"username": "reader"},
+        task_routes.auth_service.get_current_user: lambda: {"username": "reader"},
+    }
+    replica_app.app.dependency_overrides.update(overrides)
+    yield TestClient(replica_app.app)
+    for dependency in overrides:
+        del replica_app.app.dependency_overrides[dependency]
+
+class TestReplicaDatabase:
+    def test_follows_the_log(self, primary, replica):
+        primary.create_list({"id": "list-1", "name": "Groceries"})
+        primary.add_task("list-1", {"id": "task-1", "title": "Milk"})
+        assert replica.get_list("list-1") is None
+
+        assert replica.catch_up() == primary.lsn
+        assert replica.get_task("list-1", "task-1")["title"] == "Milk"
+
+        primary.update_task("list-1", "task-1", {"id": "task-1", "title": "Oat milk"})
+        primary.delete_list("list-1")
+        replica.catch_up()
+        assert replica.get_lists() == []
+
+    def test_catches_up_across_compaction(self, primary, replica):
+        primary.create_list({"id": "list-1", "name": "Groceries"})
+        replica.catch_up()
+        primary.add_task("list-1", {"id": "task-1", "title": "Milk"})
+        primary.compact()
+        primary.add_task("list-1", {"id": "task-2", "title": "Bread"})
+
+        assert replica.catch_up() == primary.lsn
+        assert [task["id"] for task in replica.get_tasks("list-1")] == ["task-1", "task-2"]
+
+    def test_follows_a_primary_restarted_after_compaction(self, primary, replica, tmp_path):
+        primary.create_list({"id": "list-1", "name": "Groceries"})
+        primary.compact()
+        restarted = Database(tmp_path / "data.json", tmp_path / "data.wal")
+        restarted.add_task("list-1", {"id": "task-1", "title": "Milk"})
+
+        assert replica.catch_up() == restarted.lsn == 2
+        assert replica.get_task("list-1", "task-1")["title"] == "Milk"
+
+    def test_ignores_a_partially_appended_record(self, primary, replica, tmp_path):
+        primary.create_list({"id": "list-1", "name": "Groceries"})
+        with open(tmp_path / "data.wal", "a") as f:
+            f.write('{"lsn":2,"op":"delete_list","list_id":"list-1"')
+        assert replica.catch_up() == 1
+        assert replica.get_list("list-1") is not None
+
+        with open(tmp_path / "data.wal", "a") as f:
+            f.write('}\n')
+        assert replica.catch_up() == 2
+        assert replica.get_list("list-1") is None
+
+    def test_stops_at_a_torn_record(self, primary, replica, tmp_path):
+        primary.create_list({"id": "list-1", "name": "Groceries"})
+        with open(tmp_path / "data.wal", "a") as f:
+            f.write('{"lsn":2,"op":"del\n')
+        assert replica.catch_up() == 1
+        assert replica.catch_up() == 1
+
+    def test_is_read_only(self, primary, replica):
+        with pytest.raises(RuntimeError):
+            replica.create_list({"id": "list-1", "name": "Groceries"})
+        assert primary.lsn == 0
+
+    def test_wait_for_gives_up_after_the_timeout(self, primary, replica):
+        primary.create_list({"id": "list-1", "name": "Groceries"})
+        assert replica.wait_for(primary.lsn, 1) is True
+        assert replica.wait_for(primary.lsn + 1, 0.01) is False
+
+class TestReplicaAPI:
+    def test_serves_reads_with_their_version(self, primary, client):
+        primary.create_list({"id": "list-1", "name": "Groceries"})
+
+        response = client.get("/api/lists/list-1", headers={"X-Min-Storage-Version": str(primary.lsn)})
+        assert response.status_code == 200
+        assert response.json()["name"] == "Groceries"
+        assert response.headers["X-Storage-Version"] == str(primary.lsn)
+
+    def test_behind_the_requested_version(self, primary, client, monkeypatch):
+        monkeypatch.setattr(settings, "REPLICA_MAX_STALENESS_MS", 10)
+        response = client.get("/api/lists", headers={"X-Min-Storage-Version": str(primary.lsn + 1)})
+        assert response.status_code == 503
+        assert client.get("/api/lists", headers={"X-Min-Storage-Version": "latest"}).status_code == 400
+
+    def test_write_routes_are_not_served(self, client):
+        assert client.post("/api/lists", json={"name": "Groceries"}).status_code == 405
+
+    def test_primary_responses_carry_the_version(self):
+        response = TestClient(primary_app).get("/")
+        assert int(response.headers["X-Storage-Version"]) >= 0
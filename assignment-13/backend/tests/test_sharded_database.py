@@ -0,0 +1,69 @@
+import json
+import os
+import threading
+import pytest
+from datetime import datetime, timedelta
+from app.db.sharded_database import ShardedDatabase
+
+@pytest.fixture
+def database(tmp_path):
+    return ShardedDatabase(tmp_path / "shards")
+
+class TestShardedDatabase:
+    def test_each_list_gets_its_own_shard(self, database, tmp_path):
+        database.create_list({"id": "list-1", "name": "Groceries"})
+        database.create_list({"id": "list-2", "name": "Chores"})
+        assert sorted(os.listdir(tmp_path / "shards")) == ["list-1.json", "list-2.json", "manifest.json"]
+        with open(tmp_path / "shards" / "manifest.json") as f:
+            assert json.load(f) == {"lists": ["list-1", "list-2"]}
+
+    def test_task_writes_touch_only_their_shard(self, database, tmp_path):
+        database.create_list({"id": "list-1", "name": "Groceries"})
+        database.create_list({"id": "list-2", "name": "Chores"})
+        untouched = (tmp_path / "shards" / "list-2.json").stat().st_mtime_ns
+        manifest = (tmp_path / "shards" / "manifest.json").stat().st_mtime_ns
+
+        database.add_task("list-1", {"id": "task-1", "title": "Milk"})
+        database.update_task("list-1", "task-1", {"id": "task-1", "title": "Oat milk"})
+        assert database.delete_task("list-1", "task-1") is True
+
+        assert (tmp_path / "shards" / "list-2.json").stat().st_mtime_ns == untouched
+        assert (tmp_path / "shards" / "manifest.json").stat().st_mtime_ns == manifest
+
+    def test_list_crud(self, database):
+        database.create_list({"id": "list-1", "name": "Groceries"})
+        database.add_task("list-1", {"id": "task-1", "title": "Milk"})
+
+        updated = database.update_list("list-1", {"id": "list-1", "name": "Shopping"})
+        assert [task["id"] for task in updated["tasks"]] == ["task-1"]
+        assert [lst["name"] for lst in database.iter_lists()] == ["Shopping"]
+
+        assert database.delete_list("list-1") is True
+        assert database.delete_list("list-1") is False
+        assert database.get_lists() == []
+
+    def test_unsafe_list_ids_are_rejected(self, database):
+        assert database.get_list("../manifest") is None
+        with pytest.raises(ValueError):
+            database.create_list({"id": "../escape", "name": "Nope"})
+
+    def test_deadline_queries(self, database):
+        database.create_list({"id": "list-1", "name": "Groceries"})
+        for task_id, days in (("later", 5), ("none", None), ("soon", 1), ("next-month", 30)):
+            deadline = (datetime.now() + timedelta(days=days)).isoformat() if days else None
+            database.add_task("list-1", {"id": task_id, "title": task_id, "deadline": deadline})
+
+        ordered = database.get_tasks_ordered_by_deadline("list-1")
+        assert [task["id"] for task in ordered] == ["soon", "later", "next-month", "none"]
+        assert [task["id"] for task in database.get_tasks_due_this_week()] == ["later", "soon"]
+
+    def test_concurrent_list_creation_keeps_every_list(self, database):
+        threads = [
+            threading.Thread(target=database.create_list, args=({"id": f"list-{i}", "name": f"List {i}"},))
+            for i in range(50)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(database.get_lists()) == 50
@@ -0,0 +1,148 @@
+import multiprocessing
+import threading
+import time
+import pytest
+from datetime import datetime, timedelta
+from app.db.memory_database import InMemoryDatabase
+from multiprocessing.connection import Client
+from app.db.shared_snapshot import (
+    SOCKET_NAME, SharedSnapshotDatabase, SharedSnapshotPrimary, SharedSnapshotPublisher, SharedSnapshotReader
+)
+
+@pytest.fixture
+def database():
+    db = InMemoryDatabase()
+    db.create_list({"id": "list-1", "name": "Groceries"})
+    db.add_task("list-1", {"id": "task-1", "title": "Milk"})
+    db.create_list({"id": "list-2", "name": "Chores"})
+    return db
+
+def start_primary(database, directory, **kwargs):
+    primary = SharedSnapshotPrimary(database, directory, **kwargs)
+    threading.Thread(target=primary.serve_forever, daemon=True).start()
+    while SharedSnapshotReader(directory).version == 0:
+        time.sleep(0.01)
+    return primary
+
+def read_titles(directory, queue):
+    queue.put([task["title"] for task in SharedSnapshotDatabase(directory).get_tasks("list-1")])
+
+class TestSharedSnapshot:
+    def test_reader_remaps_only_when_the_version_changes(self, database, tmp_path):
+        publisher = SharedSnapshotPublisher(tmp_path)
+        reader = SharedSnapshotReader(tmp_path)
+        assert publisher.publish(database) == 1
+
+        snapshot = reader.current()
+        assert reader.current() is snapshot
+        assert snapshot.get_list("list-1")["tasks"][0]["title"] == "Milk"
+
+        database.add_task("list-1", {"id": "task-2", "title": "Bread"})
+        publisher.publish(database)
+        assert reader.version == 2
+        assert [task["id"] for task in reader.current().get_list("list-1")["tasks"]] == ["task-1", "task-2"]
+
+    def test_unchanged_lists_are_copied_encoded(self, database, tmp_path, monkeypatch):
+        publisher = SharedSnapshotPublisher(tmp_path)
+        publisher.publish(database)
+        database.add_task("list-2", {"id": "task-2", "title": "Dishes"})
+
+        added = []
+        monkeypatch.setattr("app.db.snapshot.SnapshotBuilder.add_list", lambda builder, lst: added.append(lst["id"]))
+        publisher.publish(database)
+        assert added == ["list-2"]
+
+    def test_numbers_follow_the_order_of_versions(self, database, tmp_path):
+        publisher = SharedSnapshotPublisher(tmp_path)
+        reader = SharedSnapshotReader(tmp_path)
+
+        def publish(i):
+            database.add_task("list-1", {"id": f"task-{i + 2}", "title": f"Task {i}"})
+            publisher.publish(database)
+
+        threads = [threading.Thread(target=publish, args=(i,)) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(reader.current().get_list("list-1")["tasks"]) == 21
+
+    def test_new_primary_continues_the_numbering(self, database, tmp_path):
+        SharedSnapshotPublisher(tmp_path).publish(database)
+        reader = SharedSnapshotReader(tmp_path)
+        reader.current()
+
+        assert SharedSnapshotPublisher(tmp_path).publish(database) == 2
+        assert reader.version == 2
+
+    def test_reading_before_the_first_publish_fails(self, tmp_path):
+        with pytest.raises(RuntimeError):
+            SharedSnapshotDatabase(tmp_path).get_lists()
+
+    def test_worker_writes_through_the_primary(self, database, tmp_path):
+        primary = SharedSnapshotPrimary(database, tmp_path)
+        threading.Thread(target=primary.serve_forever, daemon=True).start()
+        while SharedSnapshotReader(tmp_path).version == 0:
+            time.sleep(0.01)
+        worker = SharedSnapshotDatabase(tmp_path)
+
+        deadline = (datetime.now() + timedelta(days=1)).isoformat()
+        worker.add_task("list-1", {"id": "task-2", "title": "Bread", "deadline": deadline})
+        # Read your own write: the reply arrives after the snapshot is published
+        assert worker.get_task("list-1", "task-2")["title"] == "Bread"
+        assert worker.get_task("list-2", "task-2") is None
+        assert [task["id"] for task in worker.get_tasks_due_this_week()] == ["task-2"]
+        assert [task["id"] for task in worker.get_tasks_ordered_by_deadline("list-1")] == ["task-2", "task-1"]
+
+        assert worker.update_list("missing", {"name": "Nothing"}) is None
+        assert worker.delete_list("list-2") is True
+        assert [lst["id"] for lst in worker.get_lists()] == ["list-1"]
+
+        process = multiprocessing.get_context("spawn")
+        queue = process.Queue()
+        reader = process.Process(target=read_titles, args=(tmp_path, queue))
+        reader.start()
+        assert queue.get(timeout=30) == ["Milk", "Bread"]
+        reader.join()
+        primary.close()
+
+    def test_writes_arriving_during_a_publish_share_the_next_one(self, database, tmp_path):
+        primary = start_primary(database, tmp_path, interval_ms=0)
+        publish = primary.publisher.publish
+        published = []
+
+        def slow_publish(db):
+            published.append(True)
+            time.sleep(0.05)
+            return publish(db)
+
+        primary.publisher.publish = slow_publish
+        worker = SharedSnapshotDatabase(tmp_path)
+
+        def write(i):
+            worker.add_task("list-2", {"id": f"task-{i + 2}", "title": f"Chore {i}"})
+            # Each write is published before it returns
+            assert worker.get_task("list-2", f"task-{i + 2}") is not None
+
+        threads = [threading.Thread(target=write, args=(i,)) for i in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(worker.get_tasks("list-2")) == 10
+        assert len(published) < 10
+        primary.close()
+
+    def test_connections_without_the_key_are_rejected(self, database, tmp_path):
+        primary = start_primary(database, tmp_path)
+        conn = Client(str(tmp_path / SOCKET_NAME), family="AF_UNIX")
+        conn.send(("delete_list", ("list-1",)))
+        # The primary sent its challenge and drops the connection instead of running the write
+        with pytest.raises(Exception):
+            conn.recv()
+            conn.recv()
+        assert database.get_list("list-1") is not None
+
+        assert SharedSnapshotDatabase(tmp_path).delete_list("list-1") is True
+        primary.close()
+
@@ -0,0 +1,139 @@
+import pytest
+from app.core.config import settings
+from app.db.codecs import decode, validate_compression
+from app.db.memory_database import InMemoryDatabase
+from app.db.optimized_database import OptimizedDatabase
+from app.db.snapshot import MappedSnapshot, encode_snapshot
+from app.services.optimized_task_service import OptimizedTaskService
+
+DOCUMENT = {
+    "lists": [
+        {"id": f"list-{i}", "name": f"List {i}", "tasks": [
+            {"id": f"task-{i}-{j}", "title": f"Task {j}", "completed": j % 2 == 0} for j in range(3)
+        ]}
+        for i in (3, 1, 2)
+    ],
+    "lsn": 7,
+}
+
+def resident(database):
+    return {list_id for list_id in database._cache['headers'] if list_id in database._lists}
+
+@pytest.fixture
+def snapshot_file(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_bytes(encode_snapshot(DOCUMENT))
+    return path
+
+class TestMappedSnapshot:
+    def test_round_trip_keeps_document_order(self, snapshot_file):
+        snapshot = MappedSnapshot.open(snapshot_file)
+        assert snapshot.document() == DOCUMENT
+        assert snapshot.list_ids() == ["list-3", "list-1", "list-2"]
+        assert decode(snapshot_file.read_bytes()) == DOCUMENT
+
+    def test_point_lookups(self, snapshot_file):
+        snapshot = MappedSnapshot.open(snapshot_file)
+        assert snapshot.get_list("list-2") == DOCUMENT["lists"][2]
+        assert snapshot.get_task("task-1-2") == ("list-1", {"id": "task-1-2", "title": "Task 2", "completed": True})
+        assert snapshot.get_list("missing") is None
+        assert snapshot.get_task("x" * 100) is None
+
+    def test_empty_document(self):
+        assert MappedSnapshot(encode_snapshot({"lists": []})).document() == {"lists": []}
+
+    def test_overlong_ids_are_rejected(self):
+        with pytest.raises(ValueError, match="longer than"):
+            encode_snapshot({"lists": [{"id": "x" * 100, "tasks": []}]})
+
+    def test_snapshot_cannot_be_compressed(self):
+        with pytest.raises(ValueError, match="cannot be compressed"):
+            validate_compression("zlib", "mmap")
+
+class TestOptimizedDatabaseOnSnapshot:
+    def test_only_headers_are_decoded_up_front(self, snapshot_file):
+        database = OptimizedDatabase(snapshot_file)
+        database._load()
+        assert [header["task_count"] for header in database._cache['headers'].values()] == [3, 3, 3]
+        assert len(database._lists) == 0
+
+    def test_point_reads_decode_only_the_touched_list(self, snapshot_file):
+        database = OptimizedDatabase(snapshot_file)
+        assert database.get_list("list-1")["name"] == "List 1"
+        assert database.get_task("list-2", "task-2-0")["title"] == "Task 0"
+        assert database.get_task("list-1", "task-2-0") is None
+        assert database.get_list("missing") is None
+        assert resident(database) == {"list-1", "list-2"}
+
+    def test_writes_copy_untouched_lists_without_decoding_them(self, snapshot_file, monkeypatch):
+        monkeypatch.setattr(settings, "STORAGE_CODEC", "mmap")
+        database = OptimizedDatabase(snapshot_file)
+        database.delete_task("list-1", "task-1-0")
+        assert resident(database) == {"list-1"}
+
+        reopened = MappedSnapshot.open(snapshot_file)
+        assert reopened.get_list("list-3") == DOCUMENT["lists"][0]
+        assert reopened.get_task("task-2-1")[0] == "list-2"
+        assert [task["id"] for task in reopened.get_list("list-1")["tasks"]] == ["task-1-1", "task-1-2"]
+
+    def test_cold_lists_are_evicted_beyond_the_budget(self, snapshot_file, monkeypatch):
+        monkeypatch.setattr(settings, "OPTIMIZED_CACHE_BUDGET_BYTES", 1)
+        database = OptimizedDatabase(snapshot_file)
+        database.get_list("list-1")
+        database.get_list("list-2")
+        assert resident(database) == {"list-2"}
+
+        assert database.get_task("list-1", "task-1-1")["title"] == "Task 1"
+        assert database.get_tasks_due_this_week() == []
+        stats = database.cache_stats()
+        assert stats["resident_lists"] == 1
+        assert stats["misses"] >= 3 and stats["evictions"] >= 2
+        assert stats["resident_bytes"] <= MappedSnapshot.open(snapshot_file).encoded_size("list-3") * 2
+
+    def test_performance_metrics_report_the_cache_counters(self, snapshot_file, monkeypatch):
+        monkeypatch.setattr(settings, "OPTIMIZED_CACHE_BUDGET_BYTES", 1)
+        database = OptimizedDatabase(snapshot_file)
+        database.get_list("list-1")
+        database.get_list("list-2")
+        database.get_list("list-2")
+
+        metrics = OptimizedTaskService(database).get_performance_metrics()
+        stats = database.cache_stats()
+        assert (metrics["cache_hits"], metrics["cache_misses"]) == (stats["hits"], stats["misses"])
+        assert metrics["cache_hit_rate"] == stats["hits"] / (stats["hits"] + stats["misses"])
+        assert metrics["cache_evictions"] == stats["evictions"] >= 1
+        assert metrics["cache_budget_bytes"] == 1
+        assert OptimizedTaskService(InMemoryDatabase()).get_performance_metrics() == {}
+
+    def test_changed_lists_stay_resident_until_written_to_a_snapshot(self, snapshot_file, monkeypatch):
+        monkeypatch.setattr(settings, "OPTIMIZED_CACHE_BUDGET_BYTES", 1)
+        database = OptimizedDatabase(snapshot_file)
+        database.add_task("list-1", {"id": "task-new", "title": "Unsaved elsewhere"})
+        database.get_list("list-2")
+        # The default codec writes JSON, so the change only exists in memory and the mapping
+        assert resident(database) == {"list-1", "list-2"}
+        database.get_list("list-3")
+        assert "list-2" not in resident(database)
+        assert database.get_task("list-1", "task-new")["title"] == "Unsaved elsewhere"
+
+    def test_a_budget_without_the_mmap_codec_is_reported(self, snapshot_file, monkeypatch, caplog):
+        monkeypatch.setattr(settings, "OPTIMIZED_CACHE_BUDGET_BYTES", 1)
+        with caplog.at_level("WARNING", logger="app.db.optimized_database"):
+            OptimizedDatabase(snapshot_file)
+        assert "only enforced with STORAGE_CODEC = 'mmap'" in caplog.text
+
+        caplog.clear()
+        monkeypatch.setattr(settings, "STORAGE_CODEC", "mmap")
+        with caplog.at_level("WARNING", logger="app.db.optimized_database"):
+            OptimizedDatabase(snapshot_file)
+        assert caplog.text == ""
+
+    def test_mutation_rewrites_in_the_configured_codec(self, snapshot_file, monkeypatch):
+        monkeypatch.setattr(settings, "STORAGE_CODEC", "mmap")
+        database = OptimizedDatabase(snapshot_file)
+        database.add_task("list-1", {"id": "task-new", "title": "Added"})
+
+        assert database.get_task("list-1", "task-new")["title"] == "Added"
+        reopened = OptimizedDatabase(snapshot_file)
+        assert reopened.get_task("list-1", "task-new")["title"] == "Added"
+        assert [lst["id"] for lst in reopened.get_lists()] == ["list-3", "list-1", "list-2"]
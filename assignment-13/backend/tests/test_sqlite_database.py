@@ -0,0 +1,82 @@
+import sqlite3
+import pytest
+from datetime import datetime, timedelta
+from app.db.sqlite_database import SqliteDatabase
+
+@pytest.fixture
+def database(tmp_path):
+    return SqliteDatabase(tmp_path / "data.db")
+
+def make_task(task_id, days=None, completed=False):
+    deadline = (datetime.now() + timedelta(days=days)).isoformat() if days is not None else None
+    return {
+        "id": task_id,
+        "title": task_id,
+        "description": None,
+        "completed": completed,
+        "deadline": deadline,
+        "created_at": datetime.now().isoformat(),
+    }
+
+class TestSqliteDatabase:
+    def test_list_and_task_crud(self, database):
+        database.create_list({"id": "list-1", "name": "Groceries", "description": None})
+        assert database.add_task("list-1", make_task("task-1")) is not None
+        assert database.add_task("missing", make_task("task-2")) is None
+
+        task = database.get_task("list-1", "task-1")
+        task["completed"] = True
+        assert database.update_task("list-1", "task-1", task) is not None
+        assert database.get_task("list-1", "task-1")["completed"] is True
+
+        updated = database.update_list("list-1", {"id": "list-1", "name": "Shopping"})
+        assert updated["name"] == "Shopping"
+        assert [t["id"] for t in updated["tasks"]] == ["task-1"]
+
+        assert database.delete_task("list-1", "task-1") is True
+        assert database.delete_task("list-1", "task-1") is False
+        assert database.delete_list("list-1") is True
+        assert database.get_lists() == []
+
+    def test_delete_list_cascades_to_tasks(self, database):
+        database.create_list({"id": "list-1", "name": "Groceries"})
+        database.add_task("list-1", make_task("task-1"))
+        database.delete_list("list-1")
+        assert database.get_task("list-1", "task-1") is None
+
+    def test_deadline_queries(self, database):
+        database.create_list({"id": "list-1", "name": "Groceries"})
+        database.add_task("list-1", make_task("later", days=5))
+        database.add_task("list-1", make_task("no-deadline"))
+        database.add_task("list-1", make_task("soon", days=1))
+        database.add_task("list-1", make_task("next-month", days=30, completed=True))
+
+        ordered = database.get_tasks_ordered_by_deadline("list-1")
+        assert [t["id"] for t in ordered] == ["soon", "later", "next-month", "no-deadline"]
+
+        due = database.get_tasks_due_this_week()
+        assert [t["id"] for t in due] == ["later", "soon"]
+        assert due[0]["list_name"] == "Groceries"
+
+        completed = database.get_tasks_by_completion("list-1", completed=True)
+        assert [t["id"] for t in completed] == ["next-month"]
+
+    def test_database_without_deadline_epochs_is_upgraded(self, tmp_path):
+        path = tmp_path / "legacy.db"
+        with sqlite3.connect(path) as conn:
+            conn.executescript(
+                "CREATE TABLE lists (seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT NOT NULL UNIQUE, "
+                "name TEXT NOT NULL, description TEXT);"
+                "CREATE TABLE tasks (seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT NOT NULL UNIQUE, "
+                "list_id TEXT NOT NULL, title TEXT NOT NULL, description TEXT, "
+                "completed INTEGER NOT NULL DEFAULT 0, deadline TEXT, created_at TEXT);"
+            )
+            conn.execute("INSERT INTO lists (id, name) VALUES ('list-1', 'Groceries')")
+            conn.execute(
+                "INSERT INTO tasks (id, list_id, title, deadline) VALUES ('task-1', 'list-1', 'Soon', ?)",
+                (make_task("task-1", days=1)["deadline"],),
+            )
+        conn.close()
+
+        database = SqliteDatabase(path)
+        assert [task["id"] for task in database.get_tasks_due_this_week()] == ["task-1"]
@@ -0,0 +1,57 @@
+from app.db.codecs import decode, encode
+from app.db.database import Database
+from app.db.optimized_database import OptimizedDatabase
+from app.db.task_record import TaskRecord
+from app.schemas.task_schema import TaskResponse
+
+TASK = {"id": "task-1", "title": "Compact", "completed": False, "created_at": "2024-01-01T00:00:00"}
+
+class TestTaskRecord:
+    def test_behaves_like_the_stored_dict(self):
+        record = TaskRecord(TASK)
+        assert record == TASK and dict(record) == TASK
+        assert "description" not in record and record.get("description") is None
+
+        record["completed"] = True
+        del record["title"]
+        assert dict(record) == {"id": "task-1", "completed": True, "created_at": "2024-01-01T00:00:00"}
+
+    def test_unknown_fields_are_kept(self):
+        record = TaskRecord({**TASK, "priority": "high"})
+        assert record["priority"] == "high" and len(record) == len(TASK) + 1
+
+    def test_encodes_like_a_dict(self):
+        for codec in ("json", "json_compact"):
+            assert decode(encode({"tasks": [TaskRecord(TASK)]}, codec)) == {"tasks": [TASK]}
+
+    def test_validates_into_the_response_schema(self):
+        assert TaskResponse.model_validate(TaskRecord(TASK)).title == "Compact"
+
+class TestOptimizedDatabaseRecords:
+    def test_resident_tasks_are_records(self, tmp_path):
+        database = OptimizedDatabase(tmp_path / "data.json")
+        database.create_list({"id": "list-1", "name": "Records", "tasks": [dict(TASK)]})
+        added = database.add_task("list-1", {"id": "task-2", "title": "Added"})
+        database.update_task("list-1", "task-1", {**TASK, "completed": True})
+
+        assert isinstance(added, TaskRecord)
+        assert all(isinstance(task, TaskRecord) for task in database.get_list("list-1")["tasks"])
+        assert OptimizedDatabase(database.db_file).get_task("list-1", "task-1")["completed"] is True
+
+class TestDatabaseRecords:
+    def test_resident_tasks_are_records(self, tmp_path):
+        database = Database(tmp_path / "data.json", tmp_path / "data.wal")
+        database.create_list({"id": "list-1", "name": "Records", "tasks": [dict(TASK)]})
+        added = database.add_task("list-1", {"id": "task-2", "title": "Added"})
+        database.update_task("list-1", "task-1", {**TASK, "completed": True})
+
+        assert isinstance(added, TaskRecord)
+        assert all(isinstance(task, TaskRecord) for task in database.get_list("list-1")["tasks"])
+        # Records written back are logged like dicts
+        database.update_task("list-1", "task-2", database.get_task("list-1", "task-2"))
+        database.compact()
+        database.delete_task("list-1", "task-2")
+
+        reopened = Database(tmp_path / "data.json", tmp_path / "data.wal")
+        assert all(isinstance(task, TaskRecord) for task in reopened.get_tasks("list-1"))
+        assert reopened.get_tasks("list-1") == [{**TASK, "completed": True, "deadline_epoch": None}]
@@ -0,0 +1,143 @@
+import asyncio
+import pytest
+from app.db.async_database import AsyncDatabase
+from app.db.memory_database import InMemoryDatabase
+from app.db.sharded_database import ShardedDatabase
+from app.db.unit_of_work import AsyncUnitOfWork, UnitOfWork
+from app.schemas.task_schema import TaskUpdate
+from app.services.task_service import AsyncTaskService, TaskService
+
+class CountingShardedDatabase(ShardedDatabase):
+    def __init__(self, shard_dir):
+        super().__init__(shard_dir)
+        self.shard_reads = 0
+        self.shard_writes = 0
+
+    def _read_shard(self, list_id):
+        self.shard_reads += 1
+        return super()._read_shard(list_id)
+
+    def _write_shard(self, lst):
+        self.shard_writes += 1
+        super()._write_shard(lst)
+
+@pytest.fixture
+def database():
+    db = InMemoryDatabase()
+    db.create_list({"id": "list-1", "name": "Groceries"})
+    db.add_task("list-1", {"id": "task-1", "title": "Milk", "completed": False})
+    return db
+
+class TestUnitOfWork:
+    def test_changes_stay_private_until_commit(self, database):
+        work = UnitOfWork(database)
+        work.update_task("list-1", "task-1", {"id": "task-1", "title": "Oat milk"})
+        work.add_task("list-1", {"id": "task-2", "title": "Bread"})
+
+        assert work.get_task("list-1", "task-1")["title"] == "Oat milk"
+        assert [task["id"] for task in database.get_tasks("list-1")] == ["task-1"]
+
+        work.commit()
+        assert database.get_task("list-1", "task-1")["title"] == "Oat milk"
+        assert [task["id"] for task in database.get_tasks("list-1")] == ["task-1", "task-2"]
+        assert not work.dirty
+
+    def test_changes_to_one_entity_are_folded(self, database):
+        work = UnitOfWork(database)
+        work.add_task("list-1", {"id": "task-2", "title": "Bread"})
+        work.update_task("list-1", "task-2", {"id": "task-2", "title": "Rye bread"})
+        work.add_task("list-1", {"id": "task-3", "title": "Eggs"})
+        work.delete_task("list-1", "task-3")
+
+        assert work._changes == {("task", "list-1", "task-2"): ("add_task", {"id": "task-2", "title": "Rye bread"})}
+        work.commit()
+        assert [task["title"] for task in database.get_tasks("list-1")] == ["Milk", "Rye bread"]
+
+    def test_list_created_in_the_unit_of_work(self, database):
+        work = UnitOfWork(database)
+        work.create_list({"id": "list-2", "name": "Chores"})
+        work.add_task("list-2", {"id": "task-2", "title": "Dishes"})
+        work.update_list("list-2", {"id": "list-2", "name": "House"})
+        work.create_list({"id": "list-3", "name": "Scratch"})
+        work.delete_list("list-3")
+        work.commit()
+
+        assert database.get_list("list-2")["name"] == "House"
+        assert [task["id"] for task in database.get_tasks("list-2")] == ["task-2"]
+        assert database.get_list("list-3") is None
+
+    def test_rollback_writes_nothing(self, database):
+        work = UnitOfWork(database)
+        work.delete_task("list-1", "task-1")
+        work.rollback()
+        work.commit()
+        assert database.get_task("list-1", "task-1")["title"] == "Milk"
+
+    def test_services_never_change_stored_records(self, database):
+        stored = database.get_task("list-1", "task-1")
+        TaskService(database).update_task("list-1", "task-1", TaskUpdate(title="Oat milk"))
+        TaskService(database).toggle_task_completion("list-1", "task-1")
+
+        assert (stored["title"], stored["completed"]) == ("Milk", False)
+        assert database.get_task("list-1", "task-1")["completed"] is True
+
+    def test_task_changes_do_not_load_the_list(self, database, monkeypatch):
+        list_reads = []
+        get_list = database.get_list
+        monkeypatch.setattr(database, "get_list", lambda list_id: list_reads.append(list_id) or get_list(list_id))
+        work = UnitOfWork(database)
+        TaskService(work).update_task("list-1", "task-1", TaskUpdate(title="Oat milk"))
+        TaskService(work).toggle_task_completion("list-1", "task-1")
+        assert list_reads == []
+
+        # Adding only checks once that the list exists
+        work.add_task("list-1", {"id": "task-2", "title": "Bread"})
+        work.add_task("list-1", {"id": "task-3", "title": "Eggs"})
+        work.delete_task("list-1", "task-3")
+        assert work.add_task("missing", {"id": "task-4", "title": "Nothing"}) is None
+        assert list_reads == ["list-1", "missing"]
+
+        # A whole list read later includes the changes made so far
+        assert [(task["id"], task["title"]) for task in work.get_tasks("list-1")] == [
+            ("task-1", "Oat milk"), ("task-2", "Bread")
+        ]
+        work.commit()
+        assert database.get_task("list-1", "task-1")["completed"] is True
+        assert [task["id"] for task in database.get_tasks("list-1")] == ["task-1", "task-2"]
+
+    def test_sharded_update_reads_and_writes_the_shard_once(self, tmp_path):
+        db = CountingShardedDatabase(tmp_path / "shards")
+        db.create_list({"id": "list-1", "name": "Groceries"})
+        db.add_task("list-1", {"id": "task-1", "title": "Milk"})
+        db.shard_reads = db.shard_writes = 0
+
+        work = UnitOfWork(db)
+        TaskService(work).update_task("list-1", "task-1", TaskUpdate(title="Oat milk"))
+        TaskService(work).toggle_task_completion("list-1", "task-1")
+        work.commit()
+
+        assert (db.shard_reads, db.shard_writes) == (1, 1)
+        task = db.get_task("list-1", "task-1")
+        assert task["title"] == "Oat milk"
+        assert task["completed"] is True
+
+class TestAsyncUnitOfWork:
+    def test_failed_operation_writes_nothing(self, database):
+        uow = AsyncUnitOfWork(AsyncDatabase(database))
+
+        def fail(work):
+            work.delete_task("list-1", "task-1")
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(uow.run("list-1", fail))
+        assert database.get_task("list-1", "task-1") is not None
+        assert not uow.work.dirty
+
+    def test_service_runs_on_the_unit_of_work(self, database):
+        db = AsyncDatabase(database)
+        service = AsyncTaskService(db, AsyncUnitOfWork(db))
+
+        task = asyncio.run(service.update_task("list-1", "task-1", TaskUpdate(title="Oat milk")))
+        assert task["title"] == "Oat milk"
+        assert database.get_task("list-1", "task-1")["title"] == "Oat milk"